@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Throughput of plan validation, command building and dispatch through the action registry
+
+Usage: python benchmarks/bench_actions.py [--actions 1000] [--repeat 20]
+
+A synthetic plan mixing every built-in action type is validated in one
+pass, turned into Commands and dispatched through the registry to an
+automation object whose methods return immediately, so only the
+framework's own cost is measured (no shell, GUI or disk work).
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.actions import registry
+from mcp.parser import CommandParser
+
+class NullAutomation:
+    """Accepts every action without doing anything"""
+
+    def execute_command(self, command):
+        return '', '', 0
+
+    def perform_gui_action(self, action, target=None, coordinates=None, text=None):
+        return True
+
+    def file_operation(self, action, path, content=None):
+        return True, ''
+
+def synthetic_plan(actions: int):
+    random.seed(actions)
+    samples = [
+        {'type': 'command_line', 'command': 'ls ~/work', 'description': 'List files'},
+        {'type': 'gui_action', 'action': 'click', 'coordinates': [640, 360], 'target': 'OK button'},
+        {'type': 'gui_action', 'action': 'type', 'text': 'hello world'},
+        {'type': 'gui_action', 'action': 'hotkey', 'text': 'ctrl+s'},
+        {'type': 'gui_action', 'action': 'scroll', 'text': '-5'},
+        {'type': 'file_operation', 'action': 'write', 'path': '~/notes.txt', 'content': 'note'},
+        {'type': 'file_operation', 'action': 'read', 'path': '~/notes.txt'}
+    ]
+    return {'actions': [dict(random.choice(samples)) for _ in range(actions)]}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actions', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    plan = synthetic_plan(args.actions)
+    command_parser = CommandParser()
+    automation = NullAutomation()
+    timings = {'validate': [], 'parse': [], 'dispatch': []}
+
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        problems = registry.validate_plan(plan['actions'])
+        timings['validate'].append(time.perf_counter() - start)
+        assert not problems, problems
+
+        start = time.perf_counter()
+        commands = command_parser.parse(plan)
+        timings['parse'].append(time.perf_counter() - start)
+        assert len(commands) == args.actions
+
+        start = time.perf_counter()
+        for cmd in commands:
+            success, _, _ = registry.get(cmd.type).run(cmd.action, automation)
+            assert success
+        timings['dispatch'].append(time.perf_counter() - start)
+
+    print(f"{args.actions} actions, best of {args.repeat}:")
+    for label, values in timings.items():
+        best = min(values)
+        print(f"  {label:<9} {best * 1000:7.2f} ms  {best / args.actions * 1e6:6.2f} us/action  "
+              f"{args.actions / best:>12,.0f} actions/s")
+    total = min(timings['parse']) + min(timings['dispatch'])
+    print(f"  parse (incl. validation) + dispatch: {args.actions / total:,.0f} actions/s")
+
+if __name__ == "__main__":
+    main()
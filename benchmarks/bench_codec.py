@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Measure per-call request serialization and response decoding cost
+
+Usage: python benchmarks/bench_codec.py [--calls 20000] [--turns 4]
+
+"before" rebuilds the whole request dict and serializes it with the
+stdlib json module, as requests does for ``json=``, then decodes the
+response with json.loads. "template" splices the per-call messages into
+the pre-serialized static body; it is run with the stdlib codec and, when
+installed, with orjson. No network traffic is involved.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp import codec
+from mcp.interface import LLMInterface
+
+RESPONSE = json.dumps({
+    'id': 'chatcmpl-bench',
+    'object': 'chat.completion',
+    'model': 'gpt-4o-mini',
+    'choices': [{
+        'index': 0,
+        'message': {'role': 'assistant', 'content': json.dumps({
+            'actions': [
+                {'type': 'command_line', 'command': f'mkdir -p ~/work/project-{i}',
+                 'description': f'Create project folder {i}'} for i in range(6)
+            ],
+            'reasoning': 'Create each folder, then list the parent directory to confirm.'
+        })},
+        'finish_reason': 'stop'
+    }],
+    'usage': {'prompt_tokens': 612, 'completion_tokens': 148, 'total_tokens': 760,
+              'prompt_tokens_details': {'cached_tokens': 512}}
+}).encode('utf-8')
+
+def make_llm(turns: int) -> LLMInterface:
+    llm = LLMInterface({
+        'provider': 'local',
+        'model': 'bench',
+        'warm_up': False,
+        'cache': {'enabled': False},
+        'ledger': {'enabled': False},
+        'rate_limit': {'enabled': False},
+        'memory': {'enabled': True, 'max_tokens': 4000, 'recent_turns': turns}
+    })
+    for turn in range(turns):
+        llm.memory.add(f"create a folder named project-{turn} in ~/work",
+                       {'actions': [{'type': 'command_line', 'command': f'mkdir ~/work/project-{turn}'}]})
+    return llm
+
+def dict_request(llm: LLMInterface, user_prompt: str) -> bytes:
+    """The request path before templates: a fresh dict serialized in full"""
+    messages = [{'role': 'system', 'content': llm.system_prompt}]
+    context = llm.memory.context()
+    if context:
+        messages.append({'role': 'system', 'content': context})
+    messages.extend(llm.memory.messages())
+    messages.append({'role': 'user', 'content': user_prompt})
+    data = {'model': llm.model, 'messages': messages, 'temperature': 0.2,
+            'response_format': {'type': 'json_object'}}
+    return json.dumps(data, allow_nan=False).encode('utf-8')
+
+def bench(label: str, calls: int, encode, decode):
+    start = time.perf_counter()
+    for i in range(calls):
+        body = encode(f"list the files in ~/work/project-{i % 50}")
+    encoded = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        decode(RESPONSE)
+    decoded = time.perf_counter() - start
+
+    per_call = (encoded + decoded) / calls * 1e6
+    print(f"{label:<18} encode {encoded / calls * 1e6:6.1f} us  decode {decoded / calls * 1e6:6.1f} us  "
+          f"total {per_call:6.1f} us/call  ({len(body)} byte body)")
+    return per_call
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--turns', type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    llm = make_llm(args.turns)
+    # The templated body must be the same document the dict path produced
+    assert json.loads(llm._openai_request('x')[1]) == json.loads(dict_request(llm, 'x'))
+
+    baseline = bench('before (json)', args.calls, lambda p: dict_request(llm, p), json.loads)
+
+    backend = codec.dumps, codec.loads
+    codec.dumps, codec.loads = codec._json_dumps, json.loads
+    llm._templates.clear()
+    stdlib = bench('template (json)', args.calls, lambda p: llm._openai_request(p)[1], codec.loads)
+    codec.dumps, codec.loads = backend
+    llm._templates.clear()
+
+    results = [stdlib]
+    if codec.BACKEND != 'json':
+        results.append(bench(f'template ({codec.BACKEND})', args.calls,
+                             lambda p: llm._openai_request(p)[1], codec.loads))
+    print(f"speedup: {baseline / min(results):.1f}x per call "
+          f"(static part {llm._openai_template(False).static_bytes} bytes serialized once)")
+    llm.close()
+
+if __name__ == "__main__":
+    main()
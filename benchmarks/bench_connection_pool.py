@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Compare one-shot requests.post against the pooled LLMInterface transport
+
+Usage: python benchmarks/bench_connection_pool.py [--requests 200] [--url URL]
+
+Without --url a local stub server is started. Point --url at a real HTTPS
+endpoint to include the TLS handshake in the comparison.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from mcp.stub_server import serve
+from mcp.transport import ConnectionPool
+
+def bench(label, send, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        send()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {n} requests in {elapsed:.3f}s ({elapsed / n * 1000:.2f} ms/request)")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--url', type=str, default=None)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = serve()
+        url = server.url + '/v1/chat/completions'
+
+    body = {'model': 'stub', 'messages': [{'role': 'user', 'content': 'hello'}]}
+
+    cold = bench('requests.post', lambda: requests.post(url, json=body).close(), args.requests)
+
+    pool = ConnectionPool(pool_size=4)
+    pool.warm_up('bench', url)
+    warm = bench('ConnectionPool.post', lambda: pool.post('bench', url, json=body).close(), args.requests)
+
+    print(f"speedup: {cold / warm:.2f}x")
+    print(f"pool stats: {pool.stats()['bench']}")
+
+    pool.close()
+    if server:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
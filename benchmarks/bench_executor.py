@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Wall-clock time of sequential versus dependency-aware parallel plan execution
+
+Usage: python benchmarks/bench_executor.py [--projects 8] [--delay 0.05] [--workers 4]
+
+The plan sets up ``--projects`` independent project directories (mkdir,
+write a file, copy a large dependency tree in, read the file back)
+followed by a few GUI actions and a final listing of the parent
+directory. Every action sleeps ``--delay`` seconds (the copies four times
+as long) instead of touching the system, so the numbers reflect
+scheduling alone. Programs the plan analysis does not know, such as
+``npm install``, are barriers and would serialize the plan. The ideal
+parallel time is the plan's critical path; GUI actions wait for everything
+before them and stay serialized.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.controller import ActionController
+from mcp.executor import PlanExecutor
+from mcp.parser import CommandParser
+from mcp.plan import build_plan_graph
+
+class SleepAutomation:
+    """Pretends to run each action by sleeping"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def execute_command(self, command):
+        time.sleep(self.delay * (4 if command.startswith('cp ') else 1))
+        return '', '', 0
+
+    def perform_gui_action(self, action, target=None, coordinates=None, text=None):
+        time.sleep(self.delay)
+        return True
+
+    def file_operation(self, action, path, content=None):
+        time.sleep(self.delay)
+        return True, ''
+
+def synthetic_plan(projects: int):
+    actions = []
+    for i in range(projects):
+        actions += [
+            {'type': 'command_line', 'command': f'mkdir -p /tmp/bench/p{i}'},
+            {'type': 'file_operation', 'action': 'write', 'path': f'/tmp/bench/p{i}/package.json', 'content': '{}'},
+            {'type': 'command_line', 'command': f'cp -r /tmp/bench/cache/modules-{i} /tmp/bench/p{i}/node_modules'},
+            {'type': 'file_operation', 'action': 'read', 'path': f'/tmp/bench/p{i}/package.json'}
+        ]
+    actions += [
+        {'type': 'gui_action', 'action': 'hotkey', 'text': 'ctrl+alt+t'},
+        {'type': 'gui_action', 'action': 'type', 'text': 'cd /tmp/bench'},
+        {'type': 'gui_action', 'action': 'press', 'text': 'enter'},
+        {'type': 'command_line', 'command': 'ls /tmp/bench'}
+    ]
+    return {'actions': actions}
+
+def weight(delay: float):
+    return lambda cmd: delay * (4 if cmd.action.get('command', '').startswith('cp ') else 1)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--projects', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    commands = CommandParser().parse(synthetic_plan(args.projects))
+    graph = build_plan_graph(commands, weight=weight(args.delay))
+    controller = ActionController()
+    automation = SleepAutomation(args.delay)
+    print(f"{len(graph)} actions, {len(graph.edges)} dependencies, {len(graph.levels)} levels, "
+          f"critical path {graph.critical_path_length:.2f}s")
+
+    start = time.perf_counter()
+    for cmd in commands:
+        assert controller.execute(cmd, automation)['success']
+    sequential = time.perf_counter() - start
+    print(f"  sequential           {sequential:6.2f}s")
+
+    for workers in sorted({1, args.workers, args.workers * 2}):
+        executor = PlanExecutor(controller, automation, workers=workers)
+        start = time.perf_counter()
+        results = list(executor.run(graph))
+        elapsed = time.perf_counter() - start
+        executor.close()
+        assert len(results) == len(commands) and all(r['success'] for _, r in results)
+        print(f"  parallel, {workers:>2} workers {elapsed:6.2f}s  speedup {sequential / elapsed:4.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Compare full-context and server-side conversation state over a multi-turn session
+
+Usage: python benchmarks/bench_stateful.py [--turns 20] [--prefill-delay 0.0002] [--state-ttl SECONDS]
+
+A local stub server is started that charges ``--prefill-delay`` seconds
+per uncached input token. Both modes keep the same conversation memory;
+the stateful mode sends only the new message once the server holds the
+conversation, and falls back to full context whenever the state expires.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.interface import LLMInterface
+from mcp.metrics import summarize
+from mcp.stub_server import StubServer, serve
+
+def run_session(url: str, stateful: bool, turns: int, ledger_path: str):
+    llm = LLMInterface({
+        'provider': 'local',
+        'api_url': url,
+        'model': 'stub',
+        'stateful': stateful,
+        'warm_up': False,
+        'cache': {'enabled': False},
+        'ledger': {'path': ledger_path},
+        'memory': {'enabled': True, 'max_tokens': 1500, 'recent_turns': 4}
+    })
+    llm.warm_up()
+    latencies, sizes = [], []
+    for turn in range(turns):
+        llm.process_prompt(f"create a folder named project-{turn} in ~/work and list it")
+        llm.memory.add_results([{'success': True, 'output': f"project-{turn} created"}])
+        metrics = llm.last_metrics
+        latencies.append(metrics.latency)
+        sizes.append(metrics.request_bytes)
+    fallbacks = llm.state_fallbacks
+    llm.close()
+    return latencies, sizes, fallbacks
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--prefill-delay', type=float, default=0.0002)
+    parser.add_argument('--state-ttl', type=float, default=None)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    server: StubServer = serve()
+    server.prefill_delay = args.prefill_delay
+    server.state_ttl = args.state_ttl
+    url = server.url + '/v1/chat/completions'
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, stateful in (('full context', False), ('server state', True)):
+            latencies, sizes, fallbacks = run_session(url, stateful, args.turns,
+                                                      os.path.join(directory, 'ledger.db'))
+            latency = summarize(latencies)
+            print(f"{label:<14} {args.turns} turns: {sum(sizes) / len(sizes):>7.0f} request bytes/turn "
+                  f"(last {sizes[-1]}), latency p50 {latency['p50'] * 1000:.1f} ms "
+                  f"p95 {latency['p95'] * 1000:.1f} ms, {fallbacks} fallbacks")
+
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare whole-response parsing with incremental streaming parsing of large plans
+
+Usage: python benchmarks/bench_stream_parse.py [--actions 1000 2000 4000] [--chunk 16]
+
+The plan text is cut into ``--chunk``-character pieces, roughly what a
+token stream delivers. "parse" joins every chunk, extracts the plan and
+runs CommandParser.parse, so the first command exists only once the
+whole response is in. "parse_stream" feeds the chunks to
+CommandParser.parse_stream and gets each command as its object closes.
+Per-action cost should stay flat as plans grow if scanning is linear.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp.extract import extract_plan
+from mcp.parser import CommandParser
+
+def synthetic_plan(actions: int) -> str:
+    random.seed(actions)
+    items = []
+    for i in range(actions):
+        kind = random.choice(('command_line', 'gui_action', 'file_operation'))
+        if kind == 'command_line':
+            items.append({'type': kind, 'command': f'mkdir -p ~/work/project-{i} && ls "~/work"',
+                          'description': f'Create project {i}'})
+        elif kind == 'gui_action':
+            items.append({'type': kind, 'action': 'type', 'target': 'editor', 'coordinates': [i % 1920, i % 1080],
+                          'text': f'line {i} with "quotes" and {{braces}}', 'description': f'Type line {i}'})
+        else:
+            items.append({'type': kind, 'action': 'write', 'path': f'~/work/notes-{i}.txt',
+                          'content': f'note {i}\nsecond line', 'description': f'Write note {i}'})
+    return json.dumps({'actions': items, 'reasoning': 'Synthetic plan for benchmarking.'}, indent=2)
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def run_parse(parser: CommandParser, chunks):
+    start = time.perf_counter()
+    _, plan = extract_plan(''.join(chunks))
+    commands = parser.parse(plan)
+    total = time.perf_counter() - start
+    return len(commands), total, total
+
+def run_stream(parser: CommandParser, chunks):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in parser.parse_stream(iter(chunks)):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return count, first, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actions', type=int, nargs='+', default=[1000, 2000, 4000])
+    parser.add_argument('--chunk', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    command_parser = CommandParser()
+
+    print(f"{'actions':>8} {'bytes':>9} {'mode':<13} {'first cmd':>10} {'total':>10} {'per action':>11}")
+    for actions in args.actions:
+        chunks = chunked(synthetic_plan(actions), args.chunk)
+        size = sum(len(c) for c in chunks)
+        for label, run in (('parse', run_parse), ('parse_stream', run_stream)):
+            best = min((run(command_parser, chunks) for _ in range(args.repeat)), key=lambda r: r[2])
+            count, first, total = best
+            assert count == actions, (label, count)
+            print(f"{actions:>8} {size:>9} {label:<13} {first * 1000:>8.2f}ms {total * 1000:>8.2f}ms "
+                  f"{total / actions * 1e6:>9.2f}us")
+
+if __name__ == "__main__":
+    main()
@@ -33,10 +33,19 @@ except ImportError:
 # Now try importing our modules
 try:
     from mcp.interface import LLMInterface
+    from mcp.async_interface import AsyncLLMInterface
     from mcp.parser import CommandParser
+    from mcp.plan import build_plan_graph
+    from mcp.executor import PlanExecutor
+    from mcp.optimize import PlanOptimizer, format_report as format_optimize_report
+    from mcp.intents import IntentMatcher
+    from mcp.macros import MacroStore, Macro, command_to_action, parse_slots
+    from mcp.ledger import TokenLedger, format_report
+    from mcp.router import route_report, format_route_report
     from mcp.controller import ActionController
     from mcp.automation import SystemAutomation
     from mcp.display import FeedbackDisplay
+    from mcp.batch import BatchRunner, read_prompts, format_summary
 except ImportError as e:
     logger.critical(f"Failed to import required modules: {e}")
     sys.stderr.write(f"ERROR: Failed to import required modules: {e}\nPlease ensure you've installed all dependencies with 'pip install -e .'\n")
@@ -50,11 +59,42 @@ class MCPTool:
         self.config = config
         
         # Initialize components
-        self.llm = LLMInterface(config['llm'])
+        if config['llm'].get('async', False):
+            self.llm = AsyncLLMInterface(config['llm'])
+        else:
+            self.llm = LLMInterface(config['llm'])
+        if config['llm'].get('warm_up', True):
+            self.llm.warm_up()
         self.parser = CommandParser()
+        
+        # Common prompts are answered by local rules before reaching the LLM
+        self.intents = None
+        if config.get('intents', {}).get('enabled', True):
+            self.intents = IntentMatcher(self.parser, config.get('intents', {}))
+        
+        # Saved plans replay without the LLM
+        self.macros = None
+        if config.get('macros', {}).get('enabled', True):
+            self.macros = MacroStore(config.get('macros', {}).get('path'))
+        self._last_plan = None
+        
         self.controller = ActionController()
         self.automation = SystemAutomation()
         
+        # Plans run in order and past failures unless configured otherwise
+        execution = config.get('execution', {})
+        self.fail_fast = execution.get('fail_fast', False)
+        self.executor = None
+        if execution.get('parallel', False):
+            self.executor = PlanExecutor(self.controller, self.automation,
+                                         workers=execution.get('workers', 4),
+                                         fail_fast=self.fail_fast)
+        
+        # Wasteful LLM plans are rewritten into fewer equivalent actions
+        self.optimizer = None
+        if config.get('optimizer', {}).get('enabled', True):
+            self.optimizer = PlanOptimizer(config.get('optimizer', {}))
+        
         # Set up safety configurations
         if 'safety' in config:
             self.automation.restricted_paths = config['safety'].get('restricted_paths', [])
@@ -78,25 +118,310 @@ class MCPTool:
                 if user_prompt.lower() in ['exit', 'quit']:
                     break
                 
+                if self.macros is not None and user_prompt.split(' ', 1)[0].lower() == 'macro':
+                    self._handle_macro(user_prompt.split()[1:])
+                    continue
+                
+                found = self.macros.find(user_prompt) if self.macros is not None else None
+                if found is not None:
+                    self._replay(user_prompt, *found)
+                    continue
+                
+                fast_commands = self.intents.match(user_prompt) if self.intents else None
+                if fast_commands is not None:
+                    results = [self._execute(cmd) for cmd in fast_commands]
+                    self._note_local_turn(user_prompt, fast_commands, results)
+                    continue
+                
+                if self.llm.stream:
+                    self._run_streaming(user_prompt)
+                    continue
+                
                 # Process through pipeline
                 llm_response = self.llm.process_prompt(user_prompt)
                 parsed_commands = self.parser.parse(llm_response)
+                if not parsed_commands and llm_response.get('actions'):
+                    problems = self.parser.validate(llm_response)
+                    if problems:
+                        self.display.update_status(f"Plan rejected, nothing was run: {'; '.join(problems)}")
+                
+                parsed_commands = self._optimize(parsed_commands)
                 
                 # Execute commands with real-time feedback
-                for cmd in parsed_commands:
-                    self.display.update_status(f"Executing: {cmd.description}")
-                    result = self.controller.execute(cmd, self.automation)
-                    self.display.show_result(result)
+                results = self._execute_plan(parsed_commands)
+                self._remember_plan(user_prompt, parsed_commands, results, llm_response)
                 
         except KeyboardInterrupt:
             logger.info("User interrupted the program")
         finally:
+            logger.info(f"LLM connection stats: {self.llm.connection_stats()}")
+            logger.info(f"LLM request stats: {self.llm.request_stats()}")
+            logger.info(f"LLM plan parsing stats: {self.llm.extractor.stats()}")
+            if self.intents is not None:
+                logger.info(f"Intent fast path stats: {self.intents.stats()}")
+            if self.llm.cache is not None:
+                logger.info(f"LLM cache stats: {self.llm.cache.stats()}")
+            if self.llm.similarity is not None:
+                logger.info(f"Similar prompt cache stats: {self.llm.similarity.stats()}")
+            if self.llm.ledger is not None:
+                logger.info(f"Token usage for session {self.llm.ledger.session}: {self.llm.ledger.totals}")
+            if self.llm.memory is not None:
+                logger.info(f"Conversation memory stats: {self.llm.memory.stats()}")
+            if self.macros is not None:
+                logger.info(f"Macro stats: {self.macros.stats()}")
+                self.macros.close()
+            if self.optimizer is not None:
+                logger.info(f"Plan optimizer stats: {self.optimizer.stats()}")
+            if self.executor is not None:
+                logger.info(f"Plan executor stats: {self.executor.stats()}")
+                self.executor.close()
+            self.llm.close()
             self.display.show_exit_message()
+    
+    def run_batch(self, path: str, concurrency: int = 4, output_path: str = None):
+        """Process a JSONL file of prompts without the interactive loop"""
+        prompts = read_prompts(path)
+        # Batch prompts are independent; sharing one conversation would mix them up
+        self.llm.detach_conversation()
+        runner = BatchRunner(self.llm, self.parser, self.controller, self.automation,
+                             concurrency=concurrency, intents=self.intents)
+        
+        output = open(output_path, 'w') if output_path else sys.stdout
+        try:
+            summary = runner.run(prompts, output)
+        finally:
+            if output_path:
+                output.close()
+            self.llm.close()
+        
+        logger.info(f"Batch summary: {summary}")
+        sys.stderr.write(format_summary(summary) + "\n")
+        return summary
+    
+    def _execute(self, cmd):
+        """Execute a single command and display its result"""
+        self.display.update_status(f"Executing: {cmd.description}")
+        result = self.controller.execute(cmd, self.automation)
+        self.display.show_result(result)
+        return result
+    
+    def _optimize(self, commands):
+        """Rewrite a parsed plan into fewer actions and report what was saved"""
+        if self.optimizer is None or len(commands) < 2:
+            return commands
+        commands, report = self.optimizer.optimize(commands, fail_fast=self.fail_fast)
+        if report['saved']:
+            self.display.update_status(format_optimize_report(report))
+        return commands
+    
+    def _execute_plan(self, commands):
+        """Execute a parsed plan, in order or with independent actions run concurrently"""
+        if len(commands) > 1:
+            graph = build_plan_graph(commands)
+            self.display.show_plan(graph)
+        if self.executor is None or len(commands) < 2:
+            results = []
+            for cmd in commands:
+                results.append(self._execute(cmd))
+                if self.fail_fast and not results[-1]['success']:
+                    break
+            return results
+        
+        results = [None] * len(commands)
+        run = self.executor.run(graph, on_start=lambda i: self.display.update_status(f"Executing: {commands[i].description}"))
+        try:
+            for index, result in run:
+                results[index] = result
+                self.display.show_result(result)
+        finally:
+            # Drops actions still queued if the user interrupted
+            run.close()
+        return results
+    
+    def _run_streaming(self, user_prompt: str):
+        """Execute each action as soon as the streamed LLM response closes it
+        
+        Nothing runs past an invalid action. The rest of the response is
+        still read so the call is accounted for as usual.
+        """
+        commands, results = [], []
+        rejected = False
+        for action in self.llm.stream_prompt(user_prompt):
+            if rejected:
+                continue
+            cmd = self.parser.parse_action(action)
+            if cmd is None:
+                rejected = True
+                results.append({
+                    'success': False,
+                    'description': action.get('description', 'Invalid action'),
+                    'type': action.get('type', ''),
+                    'output': '',
+                    'error': f"Invalid action, stopped the plan: {self.parser.registry.problem(action)}"
+                })
+                self.display.show_result(results[-1])
+                continue
+            commands.append(cmd)
+            results.append(self._execute(cmd))
+        logger.info(f"Executed {len(commands)} streamed commands")
+        self._remember_plan(user_prompt, commands, results, self.llm.last_response)
+    
+    def _remember_plan(self, user_prompt: str, commands, results, response):
+        """Keep the last fully successful LLM plan so it can be saved as a macro or reused for similar prompts"""
+        if self.llm.memory is not None:
+            self.llm.memory.add_results(results)
+        if commands and all(r['success'] for r in results):
+            self._last_plan = (user_prompt, [command_to_action(cmd) for cmd in commands])
+            if response is not None:
+                self.llm.remember_success(user_prompt, response)
+    
+    def _note_local_turn(self, user_prompt: str, commands, results):
+        """Let follow-up prompts see plans that ran without the LLM"""
+        if self.llm.memory is not None:
+            self.llm.memory.add(user_prompt, {'actions': [command_to_action(cmd) for cmd in commands]})
+            self.llm.memory.add_results(results)
+    
+    def _replay(self, user_prompt: str, macro: Macro, values: Dict[str, str]):
+        """Run a stored macro's actions without involving the LLM"""
+        self.display.update_status(f"Replaying macro '{macro.name}'")
+        commands, results = [], []
+        for cmd in self.parser.parse({'actions': self.macros.replay(macro, values)}):
+            commands.append(cmd)
+            results.append(self._execute(cmd))
+            if not results[-1]['success']:
+                break
+        self._note_local_turn(user_prompt, commands, results)
+    
+    def _handle_macro(self, args):
+        """Handle 'macro save|run|list|delete' typed at the prompt"""
+        if not args or args[0] == 'list':
+            for macro in self.macros.list():
+                self.display.update_status(f"{macro.name}: {macro.prompt} ({len(macro.actions)} actions, used {macro.uses}x)")
+            return
+        
+        try:
+            action, rest = args[0], args[1:]
+            names = [a for a in rest if '=' not in a]
+            slots = parse_slots([a for a in rest if '=' in a])
+            if action == 'save':
+                if self._last_plan is None:
+                    self.display.update_status("No successful plan to save yet")
+                    return
+                prompt, actions = self._last_plan
+                macro = self.macros.record(' '.join(names) or None, prompt, actions, slots)
+                self.display.update_status(f"Saved macro '{macro.name}' ({len(macro.actions)} actions)")
+            elif action == 'run' and names:
+                macro = self.macros.get(' '.join(names))
+                if macro is None:
+                    self.display.update_status(f"No macro named '{' '.join(names)}'")
+                    return
+                self._replay(f"macro run {macro.name}", macro, slots)
+            elif action == 'delete' and names:
+                deleted = self.macros.delete(' '.join(names))
+                self.display.update_status("Macro deleted" if deleted else "No such macro")
+            else:
+                self.display.update_status("Usage: macro save [NAME] [slot=value ...] | run NAME [slot=value ...] | list | delete NAME")
+        except ValueError as e:
+            self.display.update_status(f"Macro error: {e}")
             
+def manage_macros(args, config: Dict[str, Any]) -> int:
+    """List, show, edit, delete, export or import stored macros"""
+    import json
+    import shlex
+    import subprocess
+    import tempfile
+    
+    store = MacroStore(config.get('macros', {}).get('path'))
+    try:
+        if args.action == 'list':
+            for macro in store.list():
+                slots = ', '.join(f"{k}={v}" for k, v in macro.params.items())
+                print(f"{macro.name}\t{macro.prompt}\t{len(macro.actions)} actions\tused {macro.uses}x" + (f"\t[{slots}]" if slots else ''))
+            return 0
+        
+        if args.action == 'export':
+            data = json.dumps(store.export(), indent=2)
+            if args.target:
+                with open(args.target, 'w') as f:
+                    f.write(data + "\n")
+            else:
+                print(data)
+            return 0
+        
+        if not args.target:
+            sys.stderr.write(f"ERROR: macros {args.action} needs a {'file' if args.action == 'import' else 'macro name'}\n")
+            return 1
+        
+        if args.action == 'import':
+            with open(args.target, 'r') as f:
+                count = store.load(json.load(f))
+            print(f"Imported {count} macros")
+            return 0
+        
+        macro = store.get(args.target)
+        if macro is None:
+            sys.stderr.write(f"ERROR: No macro named '{args.target}'\n")
+            return 1
+        
+        if args.action == 'show':
+            print(json.dumps(store.export_one(macro), indent=2))
+        elif args.action == 'delete':
+            store.delete(macro.name)
+            print(f"Deleted macro '{macro.name}'")
+        elif args.action == 'edit':
+            with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+                json.dump(store.export_one(macro), f, indent=2)
+                path = f.name
+            try:
+                subprocess.call(shlex.split(os.environ.get('EDITOR', 'vi')) + [path])
+                with open(path, 'r') as f:
+                    edited = json.load(f)
+                if edited.get('name', macro.name) != macro.name:
+                    store.delete(macro.name)
+                edited.setdefault('name', macro.name)
+                if not store.load([edited]):
+                    sys.stderr.write("ERROR: Edited macro is invalid; nothing was saved\n")
+                    return 1
+                print(f"Saved macro '{edited['name']}'")
+            except json.JSONDecodeError as e:
+                sys.stderr.write(f"ERROR: Edited macro is not valid JSON: {e}\n")
+                return 1
+            finally:
+                os.unlink(path)
+        return 0
+    finally:
+        store.close()
+
+def show_stats(args, config: Dict[str, Any]) -> int:
+    """Print token usage recorded in the ledger, or model routing outcomes"""
+    if args.what == 'routes':
+        print(format_route_report(route_report(config['llm'].get('router', {}).get('path'))))
+        return 0
+    
+    ledger = TokenLedger(config['llm'].get('ledger', {}).get('path'))
+    try:
+        print(format_report(ledger.report(session=args.session, limit=args.limit)))
+    finally:
+        ledger.close()
+    return 0
+
 def main():
     """Entry point for the MCP tool"""
     parser = argparse.ArgumentParser(description="MCP Tool - Control your computer with LLM prompts")
     parser.add_argument('--config', type=str, default='config.json', help='Path to configuration file')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass the LLM response cache')
+    parser.add_argument('--no-optimize', action='store_true', help='Run LLM plans exactly as written')
+    parser.add_argument('--batch', type=str, help='Process prompts from a JSONL file instead of interactively')
+    parser.add_argument('--concurrency', type=int, default=4, help='Prompts processed in parallel in batch mode')
+    parser.add_argument('--output', type=str, help='Write batch results to this file instead of stdout')
+    subparsers = parser.add_subparsers(dest='command')
+    macros_parser = subparsers.add_parser('macros', help='Manage saved plans')
+    macros_parser.add_argument('action', choices=['list', 'show', 'edit', 'delete', 'export', 'import'])
+    macros_parser.add_argument('target', nargs='?', help='Macro name, or file for export/import')
+    stats_parser = subparsers.add_parser('stats', help='Show recorded usage')
+    stats_parser.add_argument('what', choices=['tokens', 'routes'])
+    stats_parser.add_argument('--session', type=str, help="Session to break down ('all' for every session)")
+    stats_parser.add_argument('--limit', type=int, default=10, help='Rows per table')
     args = parser.parse_args()
     
     # Load configuration
@@ -109,8 +434,22 @@ def main():
         sys.stderr.write(f"ERROR: Failed to load configuration from {args.config}: {e}\n")
         sys.exit(1)
     
+    if args.no_cache:
+        config['llm'].setdefault('cache', {})['enabled'] = False
+        config['llm'].setdefault('similarity', {})['enabled'] = False
+    if args.no_optimize:
+        config.setdefault('optimizer', {})['enabled'] = False
+    
+    if args.command == 'macros':
+        sys.exit(manage_macros(args, config))
+    if args.command == 'stats':
+        sys.exit(show_stats(args, config))
+    
     # Initialize and run the tool
     mcp = MCPTool(config)
+    if args.batch:
+        summary = mcp.run_batch(args.batch, concurrency=args.concurrency, output_path=args.output)
+        sys.exit(1 if any(summary['failures'].values()) else 0)
     mcp.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+import logging
+import threading
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Dict, Any, List, Callable, Iterable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Plugins add action types by exposing an ActionType (or a callable returning one) here
+ENTRY_POINT_GROUP = 'mcp.actions'
+
+Validator = Callable[[Dict[str, Any]], Optional[str]]
+
+class SubAction(NamedTuple):
+    """An allowed value of an action's 'action' field and the fields it needs"""
+    requires: Tuple[str, ...] = ()
+    check: Optional[Validator] = None
+
+def _type_names(types) -> str:
+    types = types if isinstance(types, tuple) else (types,)
+    return '/'.join(t.__name__ for t in types)
+
+def compile_validator(name: str, fields: Dict[str, Tuple[Any, Any]], required: Tuple[str, ...],
+                      actions: Optional[Dict[str, SubAction]]) -> Validator:
+    """Turn an action type's declarative schema into a single check function
+
+    Everything that can be decided from the schema (type tuples, messages,
+    the sub-action table) is worked out here once, so validating an
+    action is a handful of dict lookups and isinstance calls.
+    """
+    typed = tuple((key, types, f"{name} {key} must be {_type_names(types)}")
+                  for key, (types, _) in fields.items() if types is not None)
+    missing = tuple((key, f"{name} without {key}") for key in required)
+    table = None
+    if actions is not None:
+        table = {action: (tuple((key, f"{name} {action} without {key}") for key in sub.requires), sub.check)
+                 for action, sub in actions.items()}
+
+    def validate(action: Dict[str, Any]) -> Optional[str]:
+        for key, message in missing:
+            if action.get(key) in (None, '', []):
+                return message
+        for key, types, message in typed:
+            value = action.get(key)
+            if value is not None and not isinstance(value, types):
+                return message
+        if table is not None:
+            entry = table.get(action.get('action'))
+            if entry is None:
+                return f"unknown {name} action {action.get('action')!r}"
+            needs, check = entry
+            for key, message in needs:
+                if action.get(key) in (None, '', []):
+                    return message
+            if check is not None:
+                return check(action)
+        return None
+
+    return validate
+
+@dataclass(frozen=True)
+class ActionType:
+    """One kind of planned action: its fields, how to validate it and how to run it
+
+    ``fields`` maps each field kept on the Command to (accepted types,
+    default). ``run(action, automation)`` returns (success, output, error).
+    """
+    name: str
+    fields: Dict[str, Tuple[Any, Any]]
+    run: Callable[[Dict[str, Any], Any], Tuple[bool, str, str]]
+    required: Tuple[str, ...] = ()
+    actions: Optional[Dict[str, SubAction]] = None
+    validate: Validator = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'validate', compile_validator(self.name, self.fields, self.required, self.actions))
+
+    def build(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the Command payload: the schema's fields, defaulted where missing"""
+        return {key: action.get(key, list(default) if isinstance(default, list) else default)
+                for key, (_, default) in self.fields.items()}
+
+class ActionRegistry:
+    """Action types by name, extended lazily from the 'mcp.actions' entry point group"""
+
+    def __init__(self, types: Iterable[ActionType] = (), plugins: bool = True):
+        """Register the given types; plugins are loaded on the first lookup"""
+        self._types: Dict[str, ActionType] = {}
+        for action_type in types:
+            self.register(action_type)
+        self._plugins_loaded = not plugins
+        self._lock = threading.Lock()
+
+    def register(self, action_type: ActionType):
+        self._types[action_type.name] = action_type
+
+    def _load_plugins(self):
+        with self._lock:
+            if self._plugins_loaded:
+                return
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                try:
+                    value = entry_point.load()
+                    action_type = value if isinstance(value, ActionType) else value()
+                    self.register(action_type)
+                    logger.info(f"Loaded action type {action_type.name} from {entry_point.value}")
+                except Exception as e:
+                    logger.warning(f"Could not load action type plugin {entry_point.name}: {e}")
+            self._plugins_loaded = True
+
+    def get(self, name: Optional[str]) -> Optional[ActionType]:
+        """Return the action type registered under a name, or None"""
+        if not self._plugins_loaded:
+            self._load_plugins()
+        return self._types.get(name)
+
+    @property
+    def names(self) -> List[str]:
+        if not self._plugins_loaded:
+            self._load_plugins()
+        return sorted(self._types)
+
+    def problem(self, action: Any) -> Optional[str]:
+        """Return why a single action cannot run, or None if it is valid"""
+        if not isinstance(action, dict):
+            return 'action is not an object'
+        action_type = self.get(action.get('type'))
+        if action_type is None:
+            return f"unknown action type {action.get('type')!r}"
+        return action_type.validate(action)
+
+    def validate_plan(self, actions: Any) -> List[str]:
+        """Check every action of a plan in one pass; returns 'action N: problem' strings"""
+        if not isinstance(actions, list):
+            return ['actions is not a list']
+        problems = []
+        for index, action in enumerate(actions, 1):
+            problem = self.problem(action)
+            if problem is not None:
+                problems.append(f"action {index}: {problem}")
+        return problems
+
+# Built-in action types
+
+def _run_command(action: Dict[str, Any], automation) -> Tuple[bool, str, str]:
+    stdout, stderr, return_code = automation.execute_command(action['command'])
+    return return_code == 0, stdout, stderr
+
+def _run_gui_action(action: Dict[str, Any], automation) -> Tuple[bool, str, str]:
+    success = automation.perform_gui_action(
+        action=action['action'],
+        target=action.get('target'),
+        coordinates=action.get('coordinates'),
+        text=action.get('text')
+    )
+    return success, '', '' if success else "Failed to perform GUI action"
+
+def _run_file_operation(action: Dict[str, Any], automation) -> Tuple[bool, str, str]:
+    success, message = automation.file_operation(
+        action=action['action'],
+        path=action['path'],
+        content=action.get('content')
+    )
+    return (True, message, '') if success else (False, '', message)
+
+def _check_point(action: Dict[str, Any]) -> Optional[str]:
+    point = action['coordinates']
+    if len(point) != 2 or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in point):
+        return f"gui_action {action['action']} coordinates must be [x, y]"
+    return None
+
+def _check_text(action: Dict[str, Any]) -> Optional[str]:
+    if not isinstance(action['text'], str):
+        return f"gui_action {action['action']} text must be str"
+    return None
+
+def _check_hotkey(action: Dict[str, Any]) -> Optional[str]:
+    text = action['text']
+    if not isinstance(text, str) or '+' not in text:
+        return "gui_action hotkey text must be keys joined with '+'"
+    return None
+
+def _check_scroll(action: Dict[str, Any]) -> Optional[str]:
+    text = action.get('text')
+    if text in (None, ''):
+        return None
+    try:
+        int(text)
+    except (TypeError, ValueError):
+        return "gui_action scroll text must be a whole number"
+    return None
+
+_POINT = SubAction(('coordinates',), _check_point)
+_TEXT = SubAction(('text',), _check_text)
+
+COMMAND_LINE = ActionType(
+    name='command_line',
+    fields={'command': (str, '')},
+    required=('command',),
+    run=_run_command
+)
+
+GUI_ACTION = ActionType(
+    name='gui_action',
+    fields={
+        'action': (str, ''),
+        'target': (str, ''),
+        'coordinates': ((list, tuple), [0, 0]),
+        'text': ((str, int, float), '')
+    },
+    required=('action',),
+    actions={
+        'click': _POINT,
+        'right_click': _POINT,
+        'double_click': _POINT,
+        'type': _TEXT,
+        'press': _TEXT,
+        'hotkey': SubAction(('text',), _check_hotkey),
+        'scroll': SubAction((), _check_scroll)
+    },
+    run=_run_gui_action
+)
+
+FILE_OPERATION = ActionType(
+    name='file_operation',
+    fields={
+        'action': (str, ''),
+        'path': (str, ''),
+        'content': (str, '')
+    },
+    required=('action', 'path'),
+    actions={
+        'read': SubAction(),
+        'write': SubAction(),
+        'append': SubAction(),
+        'delete': SubAction()
+    },
+    run=_run_file_operation
+)
+
+BUILTIN_TYPES = (COMMAND_LINE, GUI_ACTION, FILE_OPERATION)
+
+# Shared by the parser, the controller and plan checks unless one is passed in
+registry = ActionRegistry(BUILTIN_TYPES)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional
+import httpx
+
+from . import codec
+from .interface import LLMInterface
+from .metrics import CallMetrics
+
+logger = logging.getLogger(__name__)
+
+class AsyncLLMInterface(LLMInterface):
+    """asyncio-native LLM client sharing one non-blocking connection pool
+
+    ``aprocess_prompt`` can be awaited from any number of tasks at once.
+    ``process_prompt`` remains a blocking facade that runs the coroutine on
+    a private event loop thread, so the interactive loop works unchanged.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize the async interface with configuration"""
+        super().__init__(config)
+        # httpx clients are bound to the loop they were created on
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the AsyncClient shared by every task on the running loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            pool_size = self.config.get('pool_size', 10)
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                timeout=httpx.Timeout(self.policy.read_timeout, connect=self.policy.connect_timeout)
+            )
+            self._clients[loop] = client
+        return client
+
+    async def aprocess_prompt(self, user_prompt: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Process a user prompt without blocking the event loop
+
+        ``timeout`` bounds the whole call; cancelling the awaiting task
+        aborts the in-flight request and releases its connection.
+        """
+        cached = self._lookup(user_prompt)
+        if cached is not None:
+            self._add_turn(user_prompt, cached)
+            return cached
+
+        key = self._flight_key(user_prompt)
+        try:
+            if key is None:
+                response = await asyncio.wait_for(self._afetch(user_prompt), timeout)
+            else:
+                response = await asyncio.wait_for(
+                    self.singleflight.ado(key, lambda: self._afetch(user_prompt)), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"LLM request timed out after {timeout}s")
+            return {"actions": [], "reasoning": f"Error: LLM request timed out after {timeout}s"}
+        self._add_turn(user_prompt, response)
+        return response
+
+    async def _afetch(self, user_prompt: str) -> Dict[str, Any]:
+        """Call the provider and remember a successful response"""
+        try:
+            response = await self._acall_provider(user_prompt)
+        except Exception as e:
+            logger.error(f"Error processing prompt: {e}")
+            return {"actions": [], "reasoning": f"Error: {str(e)}"}
+
+        self._account(user_prompt)
+        self._remember(user_prompt, response)
+        return response
+
+    async def _acall_provider(self, user_prompt: str) -> Dict[str, Any]:
+        """Send the prompt to the configured provider"""
+        if self.provider in ('openai', 'local') and not self.stateful:
+            return await self._acall_openai_api(user_prompt)
+        # Providers without a native async path run on a worker thread
+        response, metrics = await asyncio.to_thread(self._call_provider_with_metrics, user_prompt)
+        if metrics is not None:
+            self._metrics.set(metrics)
+        return response
+
+    def _call_provider_with_metrics(self, user_prompt: str):
+        # to_thread runs in a copy of the context, so metrics are handed back explicitly
+        response = self._call_provider(user_prompt)
+        return response, self.last_metrics
+
+    async def _acall_openai_api(self, user_prompt: str) -> Dict[str, Any]:
+        """Call the OpenAI API with the user prompt"""
+        headers, body = self._openai_request(user_prompt)
+
+        start = time.perf_counter()
+        tokens = self._request_tokens(body)
+        queue_wait = 0.0
+        client = self._get_client()
+
+        async def send():
+            nonlocal queue_wait
+            if self.limiter is not None:
+                queue_wait += await self.limiter.aacquire(self.session, tokens)
+            response = await client.post(self.api_url, headers=headers, content=body)
+            if self.limiter is not None:
+                self.limiter.update(response.status_code, response.headers)
+            return response
+
+        response = await self.policy.aexecute(self.provider, send, retryable=(httpx.TransportError,))
+        # Time queued behind the rate limiter is reported apart from provider latency
+        start += queue_wait
+        response.raise_for_status()
+        result = codec.loads(response.content)
+
+        usage = result.get('usage') or {}
+        self._record_metrics(CallMetrics(
+            provider=self.provider,
+            model=self.model,
+            latency=time.perf_counter() - start,
+            prompt_tokens=usage.get('prompt_tokens', 0),
+            completion_tokens=usage.get('completion_tokens', 0),
+            cache_read_tokens=(usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0),
+            request_bytes=len(response.request.content),
+            queue_wait=queue_wait
+        ))
+
+        return self._parse_openai_result(result)
+
+    async def awarm_up(self) -> bool:
+        """Pre-open a pooled connection to the configured provider"""
+        if not self.api_url:
+            return False
+        try:
+            await self._get_client().head(self.api_url, timeout=5.0)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not warm up connection to {self.provider}: {e}")
+            return False
+
+    async def aclose(self):
+        """Close the AsyncClient of the running loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    # Blocking facade
+
+    def _run(self, coro):
+        """Run a coroutine on the private event loop thread and wait for it"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever,
+                                                     name='llm-event-loop', daemon=True)
+                self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _with_metrics(self, coro):
+        result = await coro
+        return result, self.last_metrics
+
+    def _run_prompt(self, coro) -> Dict[str, Any]:
+        """Run a prompt coroutine and expose its metrics to the calling thread"""
+        self._metrics.set(None)
+        result, metrics = self._run(self._with_metrics(coro))
+        if metrics is not None:
+            self._metrics.set(metrics)
+        return result
+
+    def process_prompt(self, user_prompt: str) -> Dict[str, Any]:
+        """Process a user prompt, blocking until the async call completes"""
+        return self._run_prompt(self.aprocess_prompt(user_prompt))
+
+    def _fetch(self, user_prompt: str) -> Dict[str, Any]:
+        """Fetch a response through the async client"""
+        return self._run_prompt(self._afetch(user_prompt))
+
+    def warm_up(self) -> bool:
+        """Pre-open a pooled connection to the configured provider"""
+        return self._run(self.awarm_up())
+
+    def close(self):
+        """Close the async client, stop the loop thread and release other resources"""
+        if self._loop is not None:
+            self._run(self.aclose())
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+            self._loop.close()
+            self._loop = None
+        super().close()
@@ -20,6 +20,23 @@ class SystemAutomation:
         
         # Capture screen dimensions
         self.screen_width, self.screen_height = pyautogui.size()
+        
+        # Dispatch tables: one lookup per action instead of an if/elif chain
+        self._gui_actions = {
+            'click': self._click,
+            'right_click': self._right_click,
+            'double_click': self._double_click,
+            'type': self._type,
+            'press': self._press,
+            'hotkey': self._hotkey,
+            'scroll': self._scroll
+        }
+        self._file_actions = {
+            'read': self._read_file,
+            'write': self._write_file,
+            'append': self._write_file,
+            'delete': self._delete_file
+        }
         logger.info(f"System Automation initialized (Screen: {self.screen_width}x{self.screen_height})")
     
     def execute_command(self, command: str) -> Tuple[str, str, int]:
@@ -53,71 +70,71 @@ class SystemAutomation:
         try:
             logger.info(f"Performing GUI action: {action} on {target or coordinates}")
             
+            handler = self._gui_actions.get(action)
+            if handler is None:
+                logger.warning(f"Unknown GUI action: {action}")
+                return False
+            
             # Default to current position if no coordinates provided
             if coordinates is None:
                 coordinates = pyautogui.position()
             
-            # Execute the requested action
-            if action == 'click':
-                x, y = coordinates
-                if 0 <= x < self.screen_width and 0 <= y < self.screen_height:
-                    pyautogui.click(x, y)
-                else:
-                    logger.warning(f"Coordinates {coordinates} out of screen bounds")
-                    return False
-            
-            elif action == 'right_click':
-                x, y = coordinates
-                if 0 <= x < self.screen_width and 0 <= y < self.screen_height:
-                    pyautogui.rightClick(x, y)
-                else:
-                    logger.warning(f"Coordinates {coordinates} out of screen bounds")
-                    return False
-            
-            elif action == 'double_click':
-                x, y = coordinates
-                if 0 <= x < self.screen_width and 0 <= y < self.screen_height:
-                    pyautogui.doubleClick(x, y)
-                else:
-                    logger.warning(f"Coordinates {coordinates} out of screen bounds")
-                    return False
-            
-            elif action == 'type':
-                if text:
-                    pyautogui.typewrite(text)
-                else:
-                    logger.warning("Type action called with no text")
-                    return False
-            
-            elif action == 'press':
-                if text:
-                    pyautogui.press(text)
-                else:
-                    logger.warning("Press action called with no key")
-                    return False
-            
-            elif action == 'hotkey':
-                if text and '+' in text:
-                    keys = text.split('+')
-                    pyautogui.hotkey(*keys)
-                else:
-                    logger.warning("Hotkey action called with invalid format")
-                    return False
-                    
-            elif action == 'scroll':
-                amount = int(text) if text else 10
-                pyautogui.scroll(amount)
-            
-            else:
-                logger.warning(f"Unknown GUI action: {action}")
-                return False
-            
-            return True
+            return handler(coordinates, text)
             
         except Exception as e:
             logger.error(f"Error performing GUI action '{action}': {e}")
             return False
     
+    def _on_screen(self, coordinates) -> bool:
+        x, y = coordinates
+        if 0 <= x < self.screen_width and 0 <= y < self.screen_height:
+            return True
+        logger.warning(f"Coordinates {coordinates} out of screen bounds")
+        return False
+    
+    def _click(self, coordinates, text) -> bool:
+        if not self._on_screen(coordinates):
+            return False
+        pyautogui.click(*coordinates)
+        return True
+    
+    def _right_click(self, coordinates, text) -> bool:
+        if not self._on_screen(coordinates):
+            return False
+        pyautogui.rightClick(*coordinates)
+        return True
+    
+    def _double_click(self, coordinates, text) -> bool:
+        if not self._on_screen(coordinates):
+            return False
+        pyautogui.doubleClick(*coordinates)
+        return True
+    
+    def _type(self, coordinates, text) -> bool:
+        if not text:
+            logger.warning("Type action called with no text")
+            return False
+        pyautogui.typewrite(text)
+        return True
+    
+    def _press(self, coordinates, text) -> bool:
+        if not text:
+            logger.warning("Press action called with no key")
+            return False
+        pyautogui.press(text)
+        return True
+    
+    def _hotkey(self, coordinates, text) -> bool:
+        if not text or '+' not in text:
+            logger.warning("Hotkey action called with invalid format")
+            return False
+        pyautogui.hotkey(*text.split('+'))
+        return True
+    
+    def _scroll(self, coordinates, text) -> bool:
+        pyautogui.scroll(int(text) if text else 10)
+        return True
+    
     def file_operation(self, action: str, path: str, content: str = None) -> Tuple[bool, str]:
         """Perform a file operation like reading, writing, or deleting"""
         try:
@@ -138,53 +155,55 @@ class SystemAutomation:
             if not self._is_path_safe(path):
                 return False, f"Path not allowed for safety reasons: {path}"
             
-            if action == 'read':
-                if os.path.exists(path):
-                    with open(path, 'r') as f:
-                        return True, f.read()
-                else:
-                    return False, f"File not found: {path}"
-            
-            elif action in ['write', 'append']:
-                # Ensure directory exists
-                directory = os.path.dirname(path)
-                try:
-                    if directory and not os.path.exists(directory):
-                        os.makedirs(directory, exist_ok=True)
-                        logger.info(f"Created directory: {directory}")
-                except PermissionError:
-                    return False, f"Permission denied when creating directory: {directory}"
-                
-                # Write to file
-                try:
-                    mode = 'a' if action == 'append' else 'w'
-                    with open(path, mode) as f:
-                        f.write(content or '')
-                    return True, f"Successfully wrote to {path}"
-                except PermissionError:
-                    return False, f"Permission denied when writing to file: {path}"
-            
-            elif action == 'delete':
-                if os.path.exists(path):
-                    try:
-                        if os.path.isfile(path):
-                            os.remove(path)
-                        else:
-                            import shutil
-                            shutil.rmtree(path)
-                        return True, f"Successfully deleted {path}"
-                    except PermissionError:
-                        return False, f"Permission denied when deleting: {path}"
-                else:
-                    return False, f"File not found: {path}"
-            
-            else:
+            handler = self._file_actions.get(action)
+            if handler is None:
                 return False, f"Unknown file operation: {action}"
+            return handler(path, action, content)
             
         except Exception as e:
             logger.error(f"Error performing file operation '{action}' on '{path}': {e}")
             return False, str(e)
     
+    def _read_file(self, path: str, action: str, content: str) -> Tuple[bool, str]:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return True, f.read()
+        else:
+            return False, f"File not found: {path}"
+    
+    def _write_file(self, path: str, action: str, content: str) -> Tuple[bool, str]:
+        # Ensure directory exists
+        directory = os.path.dirname(path)
+        try:
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+                logger.info(f"Created directory: {directory}")
+        except PermissionError:
+            return False, f"Permission denied when creating directory: {directory}"
+        
+        # Write to file
+        try:
+            mode = 'a' if action == 'append' else 'w'
+            with open(path, mode) as f:
+                f.write(content or '')
+            return True, f"Successfully wrote to {path}"
+        except PermissionError:
+            return False, f"Permission denied when writing to file: {path}"
+    
+    def _delete_file(self, path: str, action: str, content: str) -> Tuple[bool, str]:
+        if os.path.exists(path):
+            try:
+                if os.path.isfile(path):
+                    os.remove(path)
+                else:
+                    import shutil
+                    shutil.rmtree(path)
+                return True, f"Successfully deleted {path}"
+            except PermissionError:
+                return False, f"Permission denied when deleting: {path}"
+        else:
+            return False, f"File not found: {path}"
+    
     def _is_path_safe(self, path: str) -> bool:
         """Check if a path is safe to access"""
         # Get the restricted paths from config if available
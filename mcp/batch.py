@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, TextIO, Tuple
+
+from .interface import LLMInterface
+from .parser import CommandParser
+from .controller import ActionController
+from .automation import SystemAutomation
+from .intents import IntentMatcher
+from .metrics import summarize
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('llm', 'parse', 'execute', 'total')
+
+def read_prompts(path: str) -> List[Tuple[int, str]]:
+    """Read (index, prompt) pairs from a JSONL file
+
+    Each line is either a JSON string or an object with a "prompt" field
+    (falling back to "body"). Blank lines are skipped but keep their index.
+    """
+    prompts = []
+    with open(path, 'r') as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, dict):
+                item = item.get('prompt') or item.get('body') or ''
+            prompts.append((index, str(item)))
+    return prompts
+
+class BatchRunner:
+    """Run prompts from a JSONL file through the pipeline with bounded concurrency"""
+
+    def __init__(self, llm: LLMInterface, parser: CommandParser,
+                 controller: ActionController, automation: SystemAutomation,
+                 concurrency: int = 4, intents: Optional[IntentMatcher] = None):
+        """Initialize the batch runner with the tool's pipeline components"""
+        self.llm = llm
+        self.intents = intents
+        self.parser = parser
+        self.controller = controller
+        self.automation = automation
+        self.concurrency = max(1, concurrency)
+        # pyautogui drives one global mouse and keyboard; held for a whole plan
+        self._gui_lock = threading.Lock()
+
+    def _run_one(self, index: int, prompt: str) -> Dict[str, Any]:
+        timings = {}
+        start = time.perf_counter()
+
+        commands = self.intents.match(prompt) if self.intents else None
+        if commands is not None:
+            response, metrics = {'actions': [], 'reasoning': 'Matched a local intent'}, None
+            llm_done = parse_done = time.perf_counter()
+            timings['llm'] = 0.0
+            timings['parse'] = parse_done - start
+        else:
+            response = self.llm.process_prompt(prompt)
+            llm_done = time.perf_counter()
+            metrics = self.llm.last_metrics
+            timings['llm'] = llm_done - start
+
+            commands = self.parser.parse(response)
+            parse_done = time.perf_counter()
+            timings['parse'] = parse_done - llm_done
+
+        results = []
+        # A plan's clicks and typing assume the window its earlier actions focused, so
+        # a plan with GUI actions holds the mouse and keyboard until it has finished
+        uses_gui = any(cmd.type == 'gui_action' for cmd in commands)
+        with self._gui_lock if uses_gui else nullcontext():
+            for cmd in commands:
+                result = self.controller.execute(cmd, self.automation)
+                results.append(result)
+                if not result['success']:
+                    break
+        end = time.perf_counter()
+        timings['execute'] = end - parse_done
+        timings['total'] = end - start
+
+        succeeded = bool(commands) and all(r['success'] for r in results) and len(results) == len(commands)
+        if succeeded and response.get('actions'):
+            self.llm.remember_success(prompt, response)
+
+        reasoning = str(response.get('reasoning', ''))
+        llm_failed = not commands and reasoning.startswith('Error')
+        return {
+            'index': index,
+            'prompt': prompt,
+            'success': succeeded,
+            'llm_error': reasoning if llm_failed else None,
+            'reasoning': reasoning,
+            'results': results,
+            'timings': timings,
+            'metrics': metrics.as_dict() if metrics is not None else None
+        }
+
+    def run(self, prompts: List[Tuple[int, str]], output: Optional[TextIO] = None) -> Dict[str, Any]:
+        """Process prompts concurrently, streaming JSONL results in completion order"""
+        output = output or sys.stdout
+        latencies = {stage: [] for stage in STAGES}
+        tokens_per_second = []
+        failures = {'llm': 0, 'no_actions': 0, 'execution': 0}
+        completed = 0
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self._run_one, index, prompt): (index, prompt)
+                       for index, prompt in prompts}
+            for future in as_completed(futures):
+                index, prompt = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logger.error(f"Batch prompt {index} failed: {e}")
+                    record = {'index': index, 'prompt': prompt, 'success': False,
+                              'llm_error': str(e), 'results': [], 'timings': {}}
+
+                for stage, value in record['timings'].items():
+                    latencies[stage].append(value)
+                if record.get('metrics') and record['metrics']['tokens_per_second']:
+                    tokens_per_second.append(record['metrics']['tokens_per_second'])
+                if record['llm_error']:
+                    failures['llm'] += 1
+                elif not record['results']:
+                    failures['no_actions'] += 1
+                elif not record['success']:
+                    failures['execution'] += 1
+                completed += 1
+
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+        elapsed = time.perf_counter() - start
+
+        return {
+            'prompts': completed,
+            'concurrency': self.concurrency,
+            'elapsed': elapsed,
+            'throughput': completed / elapsed if elapsed > 0 else 0.0,
+            'latency': {stage: summarize(values) for stage, values in latencies.items()},
+            'tokens_per_second': summarize(tokens_per_second),
+            'failures': failures
+        }
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a batch summary as a short human readable report"""
+    lines = [
+        f"Processed {summary['prompts']} prompts in {summary['elapsed']:.2f}s "
+        f"({summary['throughput']:.2f} prompts/s, concurrency {summary['concurrency']})",
+        f"{'stage':<10}{'p50':>10}{'p95':>10}{'p99':>10}"
+    ]
+    for stage, stats in summary['latency'].items():
+        lines.append(f"{stage:<10}{stats['p50'] * 1000:>8.1f}ms{stats['p95'] * 1000:>8.1f}ms{stats['p99'] * 1000:>8.1f}ms")
+    if summary['tokens_per_second']['count']:
+        tps = summary['tokens_per_second']
+        lines.append(f"Generation: {tps['p50']:.1f} tokens/s p50 over {tps['count']} provider calls")
+    failures = summary['failures']
+    lines.append(f"Failures: {failures['llm']} LLM, {failures['no_actions']} empty plans, "
+                 f"{failures['execution']} execution")
+    return '\n'.join(lines)
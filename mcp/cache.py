@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from . import codec
+from .actions import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'mcp')
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so trivially different prompts share a key"""
+    return ' '.join(prompt.split())
+
+def cache_scope(provider: str, model: str, system_prompt: str) -> str:
+    """Identify everything besides the prompt that shapes a response"""
+    system_hash = hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]
+    return f"{provider}|{model}|{system_hash}"
+
+def is_cacheable(response: Dict[str, Any]) -> bool:
+    """Only complete, successful plans whose every action is valid are worth caching"""
+    if not response or not response.get('actions') or response.get('salvaged'):
+        return False
+    if str(response.get('reasoning', '')).startswith('Error'):
+        return False
+    return not registry.validate_plan(response['actions'])
+
+class ResponseCache:
+    """Content-addressed on-disk cache of parsed LLM responses
+
+    Entries live in SQLite and are mirrored in an in-memory LRU so a hit
+    never touches the disk. Access times are written back lazily on put()
+    and close().
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None,
+                 max_entries: int = 1000, max_bytes: int = 16 * 1024 * 1024):
+        """Open (or create) the cache database and load it into memory"""
+        self.path = os.path.expanduser(path or os.path.join(DEFAULT_CACHE_DIR, 'responses.db'))
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (response, created, accessed, size); order is LRU -> MRU
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.commit()
+        self._load()
+
+        logger.info(f"Response cache opened at {self.path} ({len(self._entries)} entries)")
+
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT key, response, created, accessed, size FROM responses ORDER BY accessed"
+        ).fetchall()
+        for key, response, created, accessed, size in rows:
+            try:
+                self._entries[key] = (codec.loads(response), created, accessed, size)
+                self._bytes += size
+            except codec.JSONDecodeError:
+                logger.warning(f"Dropping corrupt cache entry {key}")
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._db.commit()
+
+    @staticmethod
+    def make_key(prompt: str, provider: str, model: str, system_prompt: str) -> str:
+        """Build the cache key from the prompt and everything that shapes the answer"""
+        material = '\0'.join([cache_scope(provider, model, system_prompt), normalize_prompt(prompt)])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response for a key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            response, created, _, size = entry
+            now = time.time()
+            if self.ttl is not None and now - created > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries[key] = (response, created, now, size)
+            self._entries.move_to_end(key)
+            self._dirty.add(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store a response, evicting least recently used entries over the caps"""
+        payload = codec.dumps(response).decode('utf-8')
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            now = time.time()
+            if key in self._entries:
+                self._bytes -= self._entries[key][3]
+            self._entries[key] = (response, now, now, size)
+            self._entries.move_to_end(key)
+            self._bytes += size
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, now, now, size)
+            )
+            self._dirty.discard(key)
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+            self._flush_access_times()
+            self._db.commit()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+        self._dirty.discard(key)
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _flush_access_times(self):
+        if self._dirty:
+            self._db.executemany(
+                "UPDATE responses SET accessed = ? WHERE key = ?",
+                [(self._entries[key][2], key) for key in self._dirty if key in self._entries]
+            )
+            self._dirty.clear()
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._dirty.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+
+    def close(self):
+        """Persist access times and close the database"""
+        with self._lock:
+            self._flush_access_times()
+            self._db.commit()
+            self._db.close()
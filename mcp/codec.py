@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import json
+from typing import Dict, Any, List, Sequence
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson (or mcp-tool[fast])
+    orjson = None
+
+# Name of the JSON implementation in use, for logs and benchmarks
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+# orjson's decode error subclasses this one, so callers only ever catch it
+JSONDecodeError = json.JSONDecodeError
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+# dumps(value) -> compact UTF-8 bytes; loads(bytes or str) -> value
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+    dumps = _json_dumps
+    loads = json.loads
+
+_MARKER = '\x00slot:'
+
+class RequestTemplate:
+    """A request body whose static part is serialized once
+
+    ``body`` holds every field that does not change between calls. Each
+    name in ``slots`` is a list in the body (possibly missing or empty)
+    to which per-call items are appended by render(), which splices their
+    serialized form into the pre-serialized static bytes.
+    """
+
+    def __init__(self, body: Dict[str, Any], slots: Sequence[str]):
+        """Serialize the static fields with a marker at the end of each slot list"""
+        fixed = dict(body)
+        for slot in slots:
+            fixed[slot] = list(body.get(slot) or []) + [_MARKER + slot]
+        text = dumps(fixed)
+
+        positions = sorted((text.index(dumps(_MARKER + slot)), slot) for slot in slots)
+        self._segments: List[tuple] = []
+        previous = 0
+        for position, slot in positions:
+            segment = text[previous:position]
+            # A static head already in the list needs a comma before the dynamic items
+            lead = segment.endswith(b',')
+            self._segments.append((segment[:-1] if lead else segment, slot, lead))
+            previous = position + len(dumps(_MARKER + slot))
+        self._tail = text[previous:]
+        self.static_bytes = len(text)
+
+    def render(self, **items: List[Any]) -> bytes:
+        """Return the full body with the given items appended to each slot"""
+        out = []
+        for segment, slot, lead in self._segments:
+            out.append(segment)
+            values = items.get(slot)
+            if values:
+                if lead:
+                    out.append(b',')
+                out.append(dumps(values)[1:-1])
+        out.append(self._tail)
+        return b''.join(out)
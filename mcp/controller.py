@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from .actions import ActionRegistry, registry as default_registry
 from .parser import Command
-from .automation import SystemAutomation
 
 logger = logging.getLogger(__name__)
 
 class ActionController:
     """Control the execution of parsed commands"""
     
-    def __init__(self):
-        """Initialize the action controller"""
+    def __init__(self, registry: Optional[ActionRegistry] = None):
+        """Initialize the action controller with an action type registry"""
+        self.registry = registry or default_registry
         logger.info("Action Controller initialized")
     
-    def execute(self, command: Command, automation: SystemAutomation) -> Dict[str, Any]:
+    def execute(self, command: Command, automation) -> Dict[str, Any]:
         """Execute a parsed command using the automation module"""
         result = {
             'success': False,
@@ -24,38 +25,12 @@ class ActionController:
         }
         
         try:
-            if command.type == 'command_line':
-                stdout, stderr, return_code = automation.execute_command(command.action['command'])
-                result['success'] = (return_code == 0)
-                result['output'] = stdout
-                result['error'] = stderr
-                
-            elif command.type == 'gui_action':
-                action_success = automation.perform_gui_action(
-                    action=command.action['action'],
-                    target=command.action.get('target'),
-                    coordinates=command.action.get('coordinates'),
-                    text=command.action.get('text')
-                )
-                result['success'] = action_success
-                if not action_success:
-                    result['error'] = "Failed to perform GUI action"
-                
-            elif command.type == 'file_operation':
-                file_success, file_result = automation.file_operation(
-                    action=command.action['action'],
-                    path=command.action['path'],
-                    content=command.action.get('content')
-                )
-                result['success'] = file_success
-                if file_success:
-                    result['output'] = file_result
-                else:
-                    result['error'] = file_result
-            
-            else:
+            action_type = self.registry.get(command.type)
+            if action_type is None:
                 result['error'] = f"Unknown command type: {command.type}"
-                
+            else:
+                result['success'], result['output'], result['error'] = action_type.run(command.action, automation)
+            
         except Exception as e:
             logger.error(f"Error executing command: {e}")
             result['error'] = str(e)
@@ -71,6 +71,21 @@ class FeedbackDisplay:
         panel = Panel("\n".join(content), title=title, border_style="blue")
         self.console.print(panel)
     
+    def show_plan(self, graph):
+        """Show a plan's actions with what each one waits for"""
+        critical = set(graph.critical_path)
+        table = Table(title="Plan", caption=f"critical path {graph.critical_path_length:g} of {len(graph)} actions, "
+                                            f"up to {graph.width} at once")
+        table.add_column("#", justify="right")
+        table.add_column("Type")
+        table.add_column("Description")
+        table.add_column("Waits for")
+        for node in graph.nodes:
+            waits = ", ".join(str(dep + 1) for dep in node.deps) or "-"
+            number = f"[bold]{node.index + 1}[/bold]" if node.index in critical else str(node.index + 1)
+            table.add_row(number, node.command.type, node.command.description, waits)
+        self.console.print(table)
+    
     def show_exit_message(self):
         """Show the exit message"""
         self.console.print(Panel.fit(
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterator, Optional, Set, Tuple
+
+from .controller import ActionController
+from .plan import PlanGraph
+
+logger = logging.getLogger(__name__)
+
+# pyautogui drives one mouse and keyboard per process, so every executor
+# shares a single GUI worker; actions submitted to it run one at a time
+_gui_lane: Optional[ThreadPoolExecutor] = None
+_gui_lane_lock = threading.Lock()
+
+def gui_lane() -> ThreadPoolExecutor:
+    """The process-wide single-threaded executor for GUI actions"""
+    global _gui_lane
+    with _gui_lane_lock:
+        if _gui_lane is None:
+            _gui_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mcp-gui')
+        return _gui_lane
+
+def skipped_result(command, reason: str) -> Dict[str, Any]:
+    """Result for an action that was never started"""
+    return {
+        'success': False,
+        'description': command.description,
+        'type': command.type,
+        'output': '',
+        'error': reason,
+        'skipped': True
+    }
+
+class PlanExecutor:
+    """Run a plan's independent actions concurrently, following its dependency graph
+
+    Shell commands and file operations go to a bounded worker pool, GUI
+    actions to the shared GUI lane. An action is submitted once everything
+    it depends on has succeeded; if a dependency failed it is skipped.
+    With ``fail_fast`` the first failure also stops everything not yet
+    started. Actions already running are always allowed to finish.
+    """
+
+    def __init__(self, controller: ActionController, automation, workers: int = 4, fail_fast: bool = False):
+        """Initialize the executor with the controller and automation that run each action"""
+        self.controller = controller
+        self.automation = automation
+        self.workers = max(1, workers)
+        self.fail_fast = fail_fast
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._cancelled = threading.Event()
+        self._stats = {'plans': 0, 'actions': 0, 'failed': 0, 'skipped': 0, 'cancelled': 0,
+                       'busy_seconds': 0.0, 'wall_seconds': 0.0}
+        self._lock = threading.Lock()
+        logger.info(f"Plan executor initialized ({self.workers} workers, fail_fast={fail_fast})")
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mcp-action')
+        return self._pool
+
+    def _execute(self, command) -> Tuple[Dict[str, Any], float]:
+        start = time.perf_counter()
+        result = self.controller.execute(command, self.automation)
+        return result, time.perf_counter() - start
+
+    def cancel(self):
+        """Stop starting new actions of the plan being run (thread-safe)"""
+        self._cancelled.set()
+
+    def run(self, graph: PlanGraph,
+            on_start: Optional[Callable[[int], None]] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Execute a plan, yielding (index, result) in completion order
+
+        Every action of the plan is yielded exactly once; actions that never
+        ran come back with ``skipped`` set. ``on_start(index)`` is called
+        from the calling thread as each action is submitted.
+        """
+        self._cancelled.clear()
+        waiting = {node.index: len(node.deps) for node in graph.nodes}
+        running: Dict[Future, int] = {}
+        finished: Set[int] = set()
+        failed: Optional[int] = None
+        busy = 0.0
+        start = time.perf_counter()
+
+        def submit(index: int):
+            command = graph.nodes[index].command
+            lane = gui_lane() if command.type == 'gui_action' else self._executor()
+            if on_start is not None:
+                on_start(index)
+            running[lane.submit(self._execute, command)] = index
+
+        def skip(index: int, reason: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+            # A skipped action also skips everything that depends on it
+            pending = [index]
+            while pending:
+                current = pending.pop()
+                if current in finished:
+                    continue
+                finished.add(current)
+                self._count('skipped')
+                yield current, skipped_result(graph.nodes[current].command, reason)
+                pending.extend(graph.nodes[current].dependents)
+
+        try:
+            for index in graph.ready(set()):
+                submit(index)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                succeeded = []
+                for future in sorted(done, key=running.get):
+                    index = running.pop(future)
+                    result, elapsed = future.result()
+                    busy += elapsed
+                    finished.add(index)
+                    yield index, result
+
+                    if result['success']:
+                        succeeded.append(index)
+                        continue
+                    self._count('failed')
+                    if failed is None:
+                        failed = index
+                    for dependent in graph.nodes[index].dependents:
+                        yield from skip(dependent, f"Skipped: action {index + 1} failed")
+                    if self.fail_fast:
+                        self._cancelled.set()
+
+                # Only start new work once every result of this round has been seen
+                if self._cancelled.is_set():
+                    continue
+                for index in succeeded:
+                    for dependent in graph.nodes[index].dependents:
+                        waiting[dependent] -= 1
+                        if waiting[dependent] == 0 and dependent not in finished:
+                            submit(dependent)
+
+            reason = f"Cancelled: action {failed + 1} failed" if failed is not None else "Cancelled"
+            for node in graph.nodes:
+                if node.index not in finished:
+                    finished.add(node.index)
+                    self._count('cancelled')
+                    yield node.index, skipped_result(node.command, reason)
+        finally:
+            # Reached early only if the caller stopped iterating; queued actions are dropped
+            for future in running:
+                future.cancel()
+            wall = time.perf_counter() - start
+            with self._lock:
+                self._stats['plans'] += 1
+                self._stats['actions'] += len(graph)
+                self._stats['busy_seconds'] += busy
+                self._stats['wall_seconds'] += wall
+            logger.info(f"Executed plan of {len(graph)} actions in {wall:.2f}s "
+                        f"({busy:.2f}s of action time, critical path {graph.critical_path_length:g})")
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['speedup'] = stats['busy_seconds'] / stats['wall_seconds'] if stats['wall_seconds'] else 0.0
+        return stats
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from . import codec
+from .streaming import ActionStreamParser
+
+logger = logging.getLogger(__name__)
+
+OUTCOMES = ('clean', 'extracted', 'repaired', 'salvaged', 'failed')
+
+_FENCE = re.compile(r"```[A-Za-z]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+
+def strip_fences(text: str) -> str:
+    """Return the body of the first ``` fenced block, or the text unchanged"""
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+def outermost_object(text: str) -> str:
+    """Return the first top-level {...} in the text, or its unterminated tail"""
+    start = text.find('{')
+    if start == -1:
+        return text
+    depth = 0
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+def _drop_trailing_comma(out: List[str]):
+    i = len(out) - 1
+    while i >= 0 and out[i] in ' \t\r\n':
+        i -= 1
+    if i >= 0 and out[i] == ',':
+        del out[i]
+
+def repair_json(text: str) -> Tuple[str, bool]:
+    """Fix the usual defects of model-written JSON in one pass
+
+    Trailing commas are dropped, raw newlines inside strings escaped, and
+    a truncated document is closed: an open string is terminated, a key
+    left without a value gets null, and open arrays and objects are closed.
+    Returns the repaired text and whether the input was truncated.
+    """
+    out: List[str] = []
+    closers: List[str] = []
+    in_string = escape = False
+    expect_key = string_is_key = after_key = False
+
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+                after_key = string_is_key
+            elif ch == '\n':
+                ch = '\\n'
+            out.append(ch)
+            continue
+
+        if ch == '"':
+            in_string = True
+            string_is_key = expect_key
+            expect_key = False
+        elif ch in '{[':
+            closers.append('}' if ch == '{' else ']')
+            expect_key = ch == '{'
+        elif ch in '}]':
+            _drop_trailing_comma(out)
+            if closers:
+                closers.pop()
+            expect_key = False
+        elif ch == ',':
+            expect_key = bool(closers) and closers[-1] == '}'
+        elif ch == ':':
+            after_key = False
+        out.append(ch)
+
+    truncated = in_string or bool(closers)
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+        after_key = string_is_key
+    while out and out[-1] in ' \t\r\n':
+        out.pop()
+    if after_key:
+        out.append(':null')
+    elif out and out[-1] == ':':
+        out.append('null')
+    while closers:
+        _drop_trailing_comma(out)
+        out.append(closers.pop())
+    _drop_trailing_comma(out)
+    return ''.join(out), truncated
+
+def _load_plan(text: str):
+    try:
+        value = codec.loads(text)
+    except codec.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+def extract_plan(content: str) -> Tuple[str, Dict[str, Any]]:
+    """Parse a model's plan as leniently as needed; returns (outcome, plan)
+
+    Each step is only tried when the cheaper ones before it failed:
+    a plain parse, stripping fences and prose around the outermost
+    object, then repairing that object. A truncated response keeps only
+    the actions that were complete before the cut, so a half-written
+    command is never executed; if one of those cannot be decoded, only
+    the actions before it are kept. Anything else that fails to parse
+    fails as a whole.
+    """
+    plan = _load_plan(content)
+    if plan is not None:
+        return 'clean', plan
+
+    candidate = outermost_object(strip_fences(content))
+    plan = _load_plan(candidate)
+    if plan is not None:
+        return 'extracted', plan
+
+    repaired, truncated = repair_json(candidate)
+    plan = _load_plan(repaired)
+    if plan is not None and not truncated:
+        return 'repaired', plan
+
+    if not truncated:
+        return 'failed', {"actions": [], "reasoning": "Error: Could not parse LLM response"}
+
+    parser = ActionStreamParser()
+    parser.feed(candidate)
+    if parser.actions:
+        plan = plan or {}
+        plan['actions'] = parser.actions
+        if not plan.get('reasoning'):
+            plan['reasoning'] = f"Recovered {len(parser.actions)} complete actions from a truncated response"
+        plan['salvaged'] = True
+        return 'salvaged', plan
+
+    return 'failed', {"actions": [], "reasoning": "Error: Could not parse LLM response"}
+
+class PlanExtractor:
+    """Tolerant plan parsing with counters for how much help each response needed"""
+
+    def __init__(self):
+        """Initialize zeroed outcome counters"""
+        self.counts = Counter({outcome: 0 for outcome in OUTCOMES})
+        self._lock = threading.Lock()
+
+    def parse(self, content: str) -> Dict[str, Any]:
+        outcome, plan = extract_plan(content)
+        with self._lock:
+            self.counts[outcome] += 1
+        if outcome == 'failed':
+            logger.error(f"Failed to parse JSON from LLM response: {content}")
+        elif outcome in ('repaired', 'salvaged'):
+            logger.warning(f"LLM response JSON was {outcome} ({len(plan.get('actions') or [])} actions kept)")
+        return plan
+
+    def stats(self) -> Dict[str, Any]:
+        """Return outcome counts plus repair, salvage and failure rates"""
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        return {
+            **counts,
+            'repair_rate': (counts['extracted'] + counts['repaired']) / total if total else 0.0,
+            'salvage_rate': counts['salvaged'] / total if total else 0.0,
+            'failure_rate': counts['failed'] / total if total else 0.0
+        }
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import logging
+import re
+import shlex
+from collections import Counter
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from .parser import Command, CommandParser
+
+logger = logging.getLogger(__name__)
+
+# Spoken application names -> launch command
+APPLICATIONS = {
+    'chrome': 'google-chrome',
+    'google chrome': 'google-chrome',
+    'chrome browser': 'google-chrome',
+    'google chrome browser': 'google-chrome',
+    'firefox': 'firefox',
+    'vscode': 'code',
+    'vs code': 'code',
+    'visual studio code': 'code',
+    'code': 'code',
+    'terminal': 'gnome-terminal',
+    'files': 'nautilus',
+    'file manager': 'nautilus',
+}
+
+_APP_NAMES = '|'.join(sorted((re.escape(name) for name in APPLICATIONS), key=len, reverse=True))
+_PATH = r'(?P<path>\S+)'
+
+def shell_path(path: str) -> str:
+    """Quote a path for the shell while keeping a leading ~ expandable"""
+    path = path.rstrip('/') or '/'
+    if path == '~':
+        return path
+    if path.startswith('~/'):
+        return '~/' + shlex.quote(path[2:])
+    return shlex.quote(path)
+
+def _launch(match) -> List[Dict[str, Any]]:
+    app = APPLICATIONS[match.group('app').lower()]
+    path = match.group('path')
+    if path and app == 'gnome-terminal':
+        # Separate word: the shell only expands a ~ at the start of one
+        command = f"gnome-terminal --working-directory {shell_path(path)}"
+    elif path:
+        command = f"{app} {shell_path(path)}"
+    else:
+        command = app
+    # GUI applications keep running; detach so the executor does not wait on them
+    return [{
+        'type': 'command_line',
+        'command': f"setsid {command} >/dev/null 2>&1 &",
+        'description': f"Open {match.group('app')}" + (f" in {path}" if path else '')
+    }]
+
+def _list_files(match) -> List[Dict[str, Any]]:
+    path = match.group('path') or '.'
+    return [{'type': 'command_line', 'command': f"ls -la {shell_path(path)}",
+             'description': f"List files in {path}"}]
+
+def _create_folder(match) -> List[Dict[str, Any]]:
+    name = match.group('name')
+    parent = match.group('path')
+    target = f"{parent.rstrip('/')}/{name}" if parent else name
+    return [{'type': 'command_line', 'command': f"mkdir -p {shell_path(target)}",
+             'description': f"Create folder {target}"}]
+
+def _fixed(command: str, description: str) -> Callable:
+    return lambda match: [{'type': 'command_line', 'command': command, 'description': description}]
+
+BUILTIN_RULES: List[Tuple[str, str, Callable]] = [
+    ('launch', rf'(?:please )?(?:open|launch|start|run) (?:the )?(?P<app>{_APP_NAMES})(?: app)?(?: (?:in|at|on) {_PATH})?', _launch),
+    ('list_files', rf'(?:(?:list|show)(?: all)?(?: the)? files(?: in| inside| of)?|ls)(?: {_PATH})?', _list_files),
+    ('create_folder', rf'(?:create|make)(?: a)?(?: new)? (?:folder|directory)(?: (?:named|called))? (?P<name>[^\s/]+)(?: (?:in|inside|under) {_PATH})?', _create_folder),
+    ('disk_usage', r'(?:show|check)(?: the)? (?:disk (?:usage|space)|free disk space)', _fixed('df -h', 'Show disk usage')),
+    ('memory_usage', r'(?:show|check)(?: the)? (?:memory|ram)(?: usage)?', _fixed('free -h', 'Show memory usage')),
+]
+
+class IntentMatcher:
+    """Turn common prompts straight into commands without an LLM round trip
+
+    Rules are anchored regular expressions tried in order: user-defined
+    patterns from the config first, then the built-in ones. Only prompts
+    that match a rule completely take the fast path.
+    """
+
+    def __init__(self, parser: CommandParser, config: Optional[Dict[str, Any]] = None):
+        """Compile the built-in and user-defined intent rules"""
+        config = config or {}
+        self.parser = parser
+        self.rules: List[Tuple[str, re.Pattern, Callable]] = []
+
+        for index, entry in enumerate(config.get('patterns', [])):
+            name = entry.get('name', f"custom_{index}")
+            try:
+                pattern = re.compile(entry['pattern'], re.IGNORECASE)
+            except (KeyError, re.error) as e:
+                logger.error(f"Skipping invalid intent pattern {name}: {e}")
+                continue
+            self.rules.append((name, pattern, self._template_builder(entry.get('actions', []))))
+
+        if config.get('builtin', True):
+            for name, pattern, builder in BUILTIN_RULES:
+                self.rules.append((name, re.compile(pattern, re.IGNORECASE), builder))
+
+        self.hits = Counter()
+        self.misses = 0
+
+        logger.info(f"Intent matcher initialized with {len(self.rules)} rules")
+
+    @staticmethod
+    def _template_builder(templates: List[Dict[str, Any]]) -> Callable:
+        """Build actions from templates, filling {group} slots from the match
+
+        Values substituted into a command are shell-quoted.
+        """
+        def build(match) -> List[Dict[str, Any]]:
+            groups = {k: v or '' for k, v in match.groupdict().items()}
+            quoted = {k: shell_path(v) if v else "''" for k, v in groups.items()}
+            actions = []
+            for template in templates:
+                action = {}
+                for key, value in template.items():
+                    if isinstance(value, str):
+                        value = value.format(**(quoted if key == 'command' else groups))
+                    action[key] = value
+                actions.append(action)
+            return actions
+        return build
+
+    def match(self, user_prompt: str) -> Optional[List[Command]]:
+        """Return commands for a prompt matched by a rule, or None to use the LLM"""
+        prompt = ' '.join(user_prompt.split()).rstrip('.!')
+        for name, pattern, builder in self.rules:
+            match = pattern.fullmatch(prompt)
+            if match is None:
+                continue
+            try:
+                actions = builder(match)
+            except (KeyError, IndexError, ValueError) as e:
+                logger.error(f"Intent '{name}' could not build its actions: {e}")
+                continue
+            commands = [cmd for cmd in (self.parser.parse_action(a) for a in actions) if cmd is not None]
+            if not commands:
+                continue
+            self.hits[name] += 1
+            logger.info(f"Prompt matched intent '{name}'; skipping the LLM")
+            return commands
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return fast-path hit counts and hit rate"""
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            'hits': hits,
+            'misses': self.misses,
+            'hit_rate': hits / total if total else 0.0,
+            'by_intent': dict(self.hits)
+        }
@@ -1,11 +1,39 @@
 #!/usr/bin/env python3
+import contextvars
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Iterator
 import requests
-import json
+from . import codec
+from .codec import RequestTemplate
+from .transport import ConnectionPool
+from .streaming import ActionStreamParser, iter_sse_data
+from .cache import ResponseCache, cache_scope, is_cacheable
+from .similarity import SimilarityIndex
+from .metrics import CallMetrics
+from .policy import RequestPolicy
+from .providers import ProviderGroup
+from .ledger import TokenLedger, new_session_id
+from .memory import ConversationMemory
+from .router import ModelRouter
+from .extract import PlanExtractor
+from .singleflight import SingleFlight
+from .ratelimit import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_LOCAL_URL = 'http://127.0.0.1:8080/v1/chat/completions'
+DEFAULT_ANTHROPIC_URL = 'https://api.anthropic.com/v1/messages'
+ANTHROPIC_VERSION = '2023-06-01'
+
+# Shorter instructions used once a session has crossed its token budget
+COMPACT_SYSTEM_PROMPT = """You control an Ubuntu 22.04 desktop. Reply ONLY with JSON:
+{"actions": [{"type": "command_line", "command": "...", "description": "..."},
+{"type": "gui_action", "action": "click|type|scroll", "target": "...", "coordinates": [x, y], "text": "...", "description": "..."},
+{"type": "file_operation", "action": "read|write|delete", "path": "...", "content": "...", "description": "..."}],
+"reasoning": "..."}
+Use real paths under ~ or ./, never placeholders. Split complex tasks into sequential actions."""
+
 class LLMInterface:
     """Interface for interacting with LLM APIs"""
     
@@ -16,6 +44,93 @@ class LLMInterface:
         self.model = config.get('model', 'gpt-4')
         self.api_url = config.get('api_url')
         self.provider = config.get('provider', 'openai')
+        if self.provider == 'local' and not self.api_url:
+            self.api_url = DEFAULT_LOCAL_URL
+        elif self.provider == 'anthropic' and not self.api_url:
+            self.api_url = DEFAULT_ANTHROPIC_URL
+        self.max_tokens = config.get('max_tokens', 4096)
+        self.stream = config.get('stream', False)
+        # Ask providers for JSON-only output where they support it
+        self.json_mode = config.get('json_mode', True)
+        self.extractor = PlanExtractor()
+        # Static request fields, serialized once per model / system prompt
+        self._templates: Dict[tuple, RequestTemplate] = {}
+        
+        # Server-held conversation state (Responses API): later turns send only the new message
+        self.stateful = config.get('stateful', False) and self.provider in ('openai', 'local')
+        self.responses_url = config.get('responses_url') or (
+            self.api_url.replace('/chat/completions', '/responses') if self.api_url else None)
+        self._previous_response_id: Optional[str] = None
+        self.state_fallbacks = 0
+        self.last_response: Optional[Dict[str, Any]] = None
+        
+        # Context-local so concurrent threads and asyncio tasks each see their own call
+        self._metrics: contextvars.ContextVar = contextvars.ContextVar('llm_call_metrics', default=None)
+        
+        # Keep-alive connections so each prompt skips DNS/TCP/TLS setup
+        self.pool = ConnectionPool(pool_size=config.get('pool_size', 10))
+        
+        # Timeouts, retries with backoff and optional hedging for every provider call
+        self.policy = RequestPolicy(config)
+        
+        # Requests and tokens per minute are budgeted client-side, per endpoint, across all interfaces
+        rate_config = config.get('rate_limit', {})
+        self.limiter = None
+        if rate_config.get('enabled', True) and self.api_url:
+            self.limiter = RateLimiter.shared(f"{self.provider} {self.api_url}", rate_config)
+        # Waiting calls are served round-robin across sessions
+        self.session = new_session_id()
+        
+        # Recent turns plus a rolling summary give follow-up prompts their context
+        memory_config = config.get('memory', {})
+        self.memory = None
+        if memory_config.get('enabled', False):
+            self.memory = ConversationMemory(
+                max_tokens=memory_config.get('max_tokens', 1500),
+                recent_turns=memory_config.get('recent_turns', 4)
+            )
+        
+        # A router picks a fast or strong model per prompt; each tier may itself be a group
+        self.router = None
+        self.providers = None
+        if config.get('router', {}).get('enabled', False):
+            self.router = ModelRouter(config, factory=LLMInterface)
+            self.router.on_discarded = self._account_metrics
+            self.provider = f"router[{self.router.tiers['fast'].provider},{self.router.tiers['strong'].provider}]"
+            self.model = self.router.models
+        # An ordered provider list is served by a group in failover/race/weighted mode
+        elif config.get('providers'):
+            self.providers = ProviderGroup(config, factory=LLMInterface)
+            self.provider = f"{self.providers.mode}[{','.join(self.providers.names)}]"
+            self.model = '+'.join(b.llm.model for b in self.providers.backends)
+        for child in self._children():
+            child.memory = self.memory
+            child.extractor = self.extractor
+            child.session = self.session
+        
+        # Identical prompts asked concurrently share one provider call
+        self.singleflight = SingleFlight()
+        
+        # Parsed responses are cached on disk, keyed by prompt, model and system prompt
+        cache_config = config.get('cache', {})
+        self.cache = None
+        if cache_config.get('enabled', True):
+            self.cache = ResponseCache(
+                path=cache_config.get('path'),
+                ttl=cache_config.get('ttl'),
+                max_entries=cache_config.get('max_entries', 1000),
+                max_bytes=cache_config.get('max_bytes', 16 * 1024 * 1024)
+            )
+        
+        # Near-duplicate prompts ("launch chrome" / "start chrome") reuse earlier plans
+        similarity_config = config.get('similarity', {})
+        self.similarity = None
+        if similarity_config.get('enabled', False):
+            self.similarity = SimilarityIndex(
+                path=similarity_config.get('path'),
+                threshold=similarity_config.get('threshold', 0.7),
+                max_entries=similarity_config.get('max_entries', 100000)
+            )
         
         # System prompt to instruct the LLM how to respond
         self.system_prompt = """
@@ -54,59 +169,566 @@ class LLMInterface:
         For complex operations, break them down into multiple sequential actions.
         """
         
+        # Every provider call is written to the token ledger; budgets act on its session totals
+        ledger_config = config.get('ledger', {})
+        self.ledger = None
+        if ledger_config.get('enabled', True):
+            self.ledger = TokenLedger(path=ledger_config.get('path'), session=self.session)
+        self.budget = config.get('budget', {})
+        self.over_budget = False
+        
         logger.info(f"LLM Interface initialized with provider: {self.provider}")
     
+    def _children(self):
+        """Interfaces this one delegates provider calls to"""
+        if self.router is not None:
+            return list(self.router.tiers.values())
+        if self.providers is not None:
+            return [b.llm for b in self.providers.backends]
+        return []
+    
+    def detach_conversation(self):
+        """Send every prompt on its own: no local memory or server-held state, here or in any delegate"""
+        self.memory = None
+        self.stateful = False
+        self._previous_response_id = None
+        for child in self._children():
+            child.detach_conversation()
+    
+    def warm_up(self) -> bool:
+        """Pre-open a pooled connection to the configured provider"""
+        if self.router is not None:
+            return self.router.warm_up()
+        if self.providers is not None:
+            return self.providers.warm_up()
+        return self.pool.warm_up(self.provider, self.api_url)
+    
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return connection reuse statistics per provider"""
+        if self.router is not None:
+            return self.router.connection_stats()
+        if self.providers is not None:
+            return self.providers.connection_stats()
+        return self.pool.stats()
+    
+    def request_stats(self) -> Dict[str, Any]:
+        """Return retry, hedging, provider group, routing and coalescing statistics"""
+        if self.router is not None:
+            stats = self.router.stats()
+        elif self.providers is not None:
+            stats = self.providers.stats()
+        else:
+            stats = self.policy.stats()
+            if self.limiter is not None:
+                stats['rate_limit'] = self.limiter.stats()
+        stats['coalesced'] = self.singleflight.stats()
+        return stats
+    
+    def close(self):
+        """Release pooled connections and flush the response cache"""
+        self.pool.close()
+        self.policy.close()
+        if self.router is not None:
+            self.router.close()
+        if self.providers is not None:
+            self.providers.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.similarity is not None:
+            self.similarity.close()
+        if self.ledger is not None:
+            self.ledger.close()
+    
+    @property
+    def last_metrics(self) -> Optional[CallMetrics]:
+        """Metrics of the most recent provider call in the current thread or task"""
+        return self._metrics.get()
+    
+    def _record_metrics(self, metrics: CallMetrics):
+        self._metrics.set(metrics)
+        if self.limiter is not None:
+            self.limiter.debit(metrics.completion_tokens)
+        cache_info = ''
+        if metrics.cache_read_tokens or metrics.cache_write_tokens:
+            cache_info = f" (cache read {metrics.cache_read_tokens}, write {metrics.cache_write_tokens})"
+        queue_info = f" after {metrics.queue_wait * 1000:.0f} ms queued" if metrics.queue_wait >= 0.001 else ''
+        logger.info(
+            f"{metrics.provider} call: {metrics.latency * 1000:.0f} ms{queue_info}, {metrics.request_bytes} request bytes, "
+            f"{metrics.prompt_tokens} prompt + {metrics.completion_tokens} completion tokens{cache_info}, "
+            f"{metrics.tokens_per_second:.1f} tokens/s"
+        )
+    
+    def _account(self, user_prompt: str):
+        """Write the last call to the ledger and enforce the session budget"""
+        self._account_metrics(user_prompt, self.last_metrics)
+    
+    def _account_metrics(self, user_prompt: str, metrics: Optional[CallMetrics]):
+        """Write one call to the ledger and enforce the session budget"""
+        if self.ledger is None or metrics is None:
+            return
+        self.ledger.record(user_prompt, metrics)
+        
+        limit = self.budget.get('session_tokens')
+        if limit and not self.over_budget and self.ledger.session_tokens >= limit:
+            self.over_budget = True
+            logger.warning(f"Session used {self.ledger.session_tokens} tokens (budget {limit}); "
+                           f"switching to lower-cost mode")
+            self._reduce_cost()
+            if self.memory is not None:
+                self.memory.shrink(self.budget.get('memory_factor', 0.5))
+    
+    def _reduce_cost(self):
+        """Switch to the budget model and the compact system prompt"""
+        if self.router is not None:
+            for child in self._children():
+                child._reduce_cost()
+            self.model = self.router.models
+            return
+        if self.providers is not None:
+            for child in self._children():
+                child._reduce_cost()
+            self.model = '+'.join(b.llm.model for b in self.providers.backends)
+            return
+        
+        budget = self.config.get('budget', {})
+        if budget.get('model'):
+            self.model = budget['model']
+        if budget.get('max_tokens'):
+            self.max_tokens = min(self.max_tokens, budget['max_tokens'])
+        if budget.get('compact_prompt', True):
+            self.system_prompt = COMPACT_SYSTEM_PROMPT
+        logger.info(f"{self.provider} now uses model {self.model}")
+    
+    def _request_tokens(self, body: bytes) -> int:
+        """Rough prompt size of a request body (about 4 bytes per token), for the tokens-per-minute bucket"""
+        if self.limiter is None or not self.limiter.counts_tokens:
+            return 0
+        return len(body) // 4
+    
+    def _post(self, headers: Dict[str, str], body: bytes, stream: bool = False,
+              url: Optional[str] = None) -> requests.Response:
+        """POST to the provider through the rate limiter, the pooled session and the request policy
+        
+        Every attempt, retries included, waits for the rate limiter; the
+        total seconds spent waiting are set on the response as ``queue_wait``.
+        """
+        url = url or self.api_url
+        tokens = self._request_tokens(body)
+        queue_wait = 0.0
+        
+        def send(timeout):
+            nonlocal queue_wait
+            if self.limiter is not None:
+                queue_wait += self.limiter.acquire(self.session, tokens)
+            response = self.pool.post(self.provider, url, headers=headers, data=body,
+                                      timeout=timeout, stream=stream)
+            if self.limiter is not None:
+                self.limiter.update(response.status_code, response.headers)
+            return response
+        
+        response = self.policy.execute(self.provider, send, hedge=not stream)
+        response.queue_wait = queue_wait
+        return response
+    
     def process_prompt(self, user_prompt: str) -> Dict[str, Any]:
         """Process a user prompt through the LLM and return structured commands"""
+        self._metrics.set(None)
+        cached = self._lookup(user_prompt)
+        response = cached if cached is not None else self._fetch_shared(user_prompt)
+        self._add_turn(user_prompt, response)
+        return response
+    
+    def _flight_key(self, user_prompt: str) -> Optional[str]:
+        """Key under which identical concurrent prompts are coalesced, None to never share"""
+        if self._has_context():
+            return None
+        return ResponseCache.make_key(user_prompt, self.provider, self.model, self.system_prompt)
+    
+    def _fetch_shared(self, user_prompt: str) -> Dict[str, Any]:
+        """Fetch a response, joining an identical call that is already in flight
+        
+        Waiters receive the leader's parsed response (or its error reply),
+        but only the leader's call is metered and written to the ledger.
+        """
+        key = self._flight_key(user_prompt)
+        if key is None:
+            return self._fetch(user_prompt)
+        return self.singleflight.do(key, lambda: self._fetch(user_prompt))
+    
+    def _add_turn(self, user_prompt: str, response: Dict[str, Any]):
+        """Add a successful exchange to the conversation memory"""
+        if self.memory is not None and not str(response.get('reasoning', '')).startswith('Error'):
+            self.memory.add(user_prompt, response)
+    
+    def _fetch(self, user_prompt: str) -> Dict[str, Any]:
+        """Call the provider and remember a successful response"""
         try:
-            if self.provider == 'openai':
-                return self._call_openai_api(user_prompt)
-            elif self.provider == 'anthropic':
-                return self._call_anthropic_api(user_prompt)
-            elif self.provider == 'local':
-                return self._call_local_model(user_prompt)
-            else:
-                raise ValueError(f"Unsupported LLM provider: {self.provider}")
+            response = self._call_provider(user_prompt)
         except Exception as e:
             logger.error(f"Error processing prompt: {e}")
             return {"actions": [], "reasoning": f"Error: {str(e)}"}
+        
+        self._account(user_prompt)
+        self._remember(user_prompt, response)
+        return response
     
-    def _call_openai_api(self, user_prompt: str) -> Dict[str, Any]:
-        """Call the OpenAI API with the user prompt"""
+    def _lookup(self, user_prompt: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response for the prompt or a near-duplicate of it
+        
+        Prompts asked with conversation context are never served from or
+        written to the caches, since their answer depends on that context.
+        """
+        if self._has_context():
+            return None
+        if self.cache is not None:
+            cached = self.cache.get(self.cache.make_key(user_prompt, self.provider, self.model, self.system_prompt))
+            # Entries written before plans were validated may not run
+            if cached is not None and is_cacheable(cached):
+                logger.info("Using cached LLM response")
+                return cached
+        
+        if self.similarity is not None:
+            similar = self.similarity.lookup(user_prompt, scope=cache_scope(self.provider, self.model, self.system_prompt))
+            if similar is not None and is_cacheable(similar):
+                return similar
+        
+        return None
+    
+    def _has_context(self) -> bool:
+        """True when requests carry earlier turns, locally or on the server"""
+        return bool(self.memory) or any(llm._previous_response_id is not None
+                                         for llm in [self] + self._children())
+    
+    def _remember(self, user_prompt: str, response: Dict[str, Any]):
+        """Store a successful response in the exact cache"""
+        if self._has_context() or not is_cacheable(response):
+            return
+        if self.cache is not None:
+            self.cache.put(self.cache.make_key(user_prompt, self.provider, self.model, self.system_prompt), response)
+    
+    def remember_success(self, user_prompt: str, response: Dict[str, Any]):
+        """Index a plan that ran successfully so near-duplicate prompts can reuse it"""
+        if self.similarity is None or self._has_context() or not is_cacheable(response):
+            return
+        self.similarity.add(user_prompt, response, scope=cache_scope(self.provider, self.model, self.system_prompt))
+    
+    def _call_provider(self, user_prompt: str) -> Dict[str, Any]:
+        """Send the prompt to the configured provider"""
+        if self.router is not None or self.providers is not None:
+            response, metrics = (self.router or self.providers).call(user_prompt)
+            if metrics is not None:
+                self._metrics.set(metrics)
+            return response
+        elif self.stateful:
+            return self._call_responses_api(user_prompt)
+        elif self.provider == 'openai':
+            return self._call_openai_api(user_prompt)
+        elif self.provider == 'anthropic':
+            return self._call_anthropic_api(user_prompt)
+        elif self.provider == 'local':
+            return self._call_local_model(user_prompt)
+        else:
+            raise ValueError(f"Unsupported LLM provider: {self.provider}")
+    
+    def stream_prompt(self, user_prompt: str) -> Iterator[Dict[str, Any]]:
+        """Stream a prompt and yield each action as soon as the LLM has closed it
+        
+        The complete response is available in ``last_response`` once the
+        generator is exhausted. Providers without streaming support fall back
+        to a regular call.
+        """
+        self.last_response = None
+        self._metrics.set(None)
+        cached = self._lookup(user_prompt)
+        
+        try:
+            if cached is not None or self.provider not in ('openai', 'local') or self.stateful:
+                response = cached if cached is not None else self._fetch(user_prompt)
+                yield from response.get('actions', [])
+                self.last_response = response
+                self._add_turn(user_prompt, response)
+                return
+            
+            parser = ActionStreamParser()
+            for chunk in self._stream_openai_api(user_prompt):
+                yield from parser.feed(chunk)
+            self.last_response = self._parse_plan(''.join(parser.text))
+            self._account(user_prompt)
+            self._remember(user_prompt, self.last_response)
+            self._add_turn(user_prompt, self.last_response)
+        except Exception as e:
+            logger.error(f"Error streaming prompt: {e}")
+            self.last_response = {"actions": [], "reasoning": f"Error: {str(e)}"}
+    
+    def _openai_headers(self) -> Dict[str, str]:
         headers = {
-            'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        return headers
+    
+    def _openai_template(self, stream: bool) -> RequestTemplate:
+        """Pre-serialized static part of a chat completion request, built on first use
+        
+        The key covers every static field, so switching model or system
+        prompt (as the budget does) builds a new template.
+        """
+        key = ('chat', self.model, self.system_prompt, self.json_mode, stream)
+        template = self._templates.get(key)
+        if template is None:
+            # The static system prompt stays first so provider-side prefix caching still applies
+            data = {
+                'model': self.model,
+                'messages': [{'role': 'system', 'content': self.system_prompt}],
+                'temperature': 0.2
+            }
+            if self.json_mode:
+                data['response_format'] = {'type': 'json_object'}
+            if stream:
+                data['stream'] = True
+                data['stream_options'] = {'include_usage': True}
+            template = self._templates[key] = RequestTemplate(data, ('messages',))
+        return template
+    
+    def _openai_request(self, user_prompt: str, stream: bool = False):
+        """Build the headers and serialized body of an OpenAI chat completion request"""
+        messages = []
+        if self.memory is not None:
+            context = self.memory.context()
+            if context:
+                messages.append({'role': 'system', 'content': context})
+            messages.extend(self.memory.messages())
+        messages.append({'role': 'user', 'content': user_prompt})
+        
+        return self._openai_headers(), self._openai_template(stream).render(messages=messages)
+    
+    def _call_openai_api(self, user_prompt: str) -> Dict[str, Any]:
+        """Call the OpenAI API with the user prompt"""
+        headers, body = self._openai_request(user_prompt)
+        
+        start = time.perf_counter()
+        response = self._post(headers, body)
+        # Time queued behind the rate limiter is reported apart from provider latency
+        start += response.queue_wait
+        response.raise_for_status()
+        result = codec.loads(response.content)
+        
+        usage = result.get('usage') or {}
+        self._record_metrics(CallMetrics(
+            provider=self.provider,
+            model=self.model,
+            latency=time.perf_counter() - start,
+            prompt_tokens=usage.get('prompt_tokens', 0),
+            completion_tokens=usage.get('completion_tokens', 0),
+            cache_read_tokens=(usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0),
+            request_bytes=len(response.request.body or b''),
+            queue_wait=response.queue_wait
+        ))
+        
+        return self._parse_openai_result(result)
+    
+    def _parse_openai_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the action plan from an OpenAI chat completion body"""
+        return self._parse_plan(result['choices'][0]['message']['content'])
+    
+    def _parse_plan(self, content: str) -> Dict[str, Any]:
+        """Parse the JSON action plan produced by the model, repairing it if needed"""
+        return self.extractor.parse(content)
+    
+    def _stream_openai_api(self, user_prompt: str) -> Iterator[str]:
+        """Call the OpenAI API in streaming mode and yield content deltas"""
+        headers, body = self._openai_request(user_prompt, stream=True)
+        metrics = CallMetrics(provider=self.provider, model=self.model, streamed=True)
+        deltas = 0
+        usage = None
+        
+        start = time.perf_counter()
+        with self._post(headers, body, stream=True) as response:
+            start += response.queue_wait
+            metrics.queue_wait = response.queue_wait
+            response.raise_for_status()
+            metrics.request_bytes = len(response.request.body or b'')
+            for event in iter_sse_data(response.iter_lines(decode_unicode=True)):
+                chunk = codec.loads(event)
+                usage = chunk.get('usage') or usage
+                choices = chunk.get('choices') or [{}]
+                content = choices[0].get('delta', {}).get('content')
+                if content:
+                    if metrics.first_token is None:
+                        metrics.first_token = time.perf_counter() - start
+                    deltas += 1
+                    yield content
         
+        metrics.latency = time.perf_counter() - start
+        # Servers that do not report usage send roughly one token per delta
+        metrics.prompt_tokens = (usage or {}).get('prompt_tokens', 0)
+        metrics.completion_tokens = (usage or {}).get('completion_tokens', deltas)
+        metrics.cache_read_tokens = ((usage or {}).get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+        self._record_metrics(metrics)
+    
+    def _responses_request(self, user_prompt: str, previous_id: Optional[str]):
+        """Build a Responses API request, chained on the previous turn when possible
+        
+        A chained request carries only the new user message (plus the
+        output of the last actions, which the server has not seen). A fresh
+        one starts the server-side conversation with the system prompt and
+        whatever context the local memory holds.
+        """
+        items = []
+        if previous_id is None:
+            if self.memory is not None:
+                context = self.memory.context()
+                if context:
+                    items.append({'role': 'developer', 'content': context})
+                items.extend(self.memory.messages())
+        elif self.memory is not None:
+            outputs = self.memory.last_outputs()
+            if outputs:
+                items.append({'role': 'developer', 'content': outputs})
+        items.append({'role': 'user', 'content': user_prompt})
+        
+        key = ('responses', self.model, self.system_prompt, self.json_mode)
+        template = self._templates.get(key)
+        if template is None:
+            data = {
+                'model': self.model,
+                'input': [{'role': 'developer', 'content': self.system_prompt}],
+                'store': True,
+                'temperature': 0.2
+            }
+            if self.json_mode:
+                data['text'] = {'format': {'type': 'json_object'}}
+            template = self._templates[key] = RequestTemplate(data, ('input',))
+        
+        if previous_id is None:
+            return self._openai_headers(), template.render(input=items)
+        
+        # Chained bodies are small and carry the response id, so they are serialized directly
         data = {
             'model': self.model,
-            'messages': [
-                {'role': 'system', 'content': self.system_prompt},
-                {'role': 'user', 'content': user_prompt}
-            ],
-            'temperature': 0.2
+            'input': items,
+            'store': True,
+            'temperature': 0.2,
+            'previous_response_id': previous_id
         }
+        if self.json_mode:
+            data['text'] = {'format': {'type': 'json_object'}}
+        return self._openai_headers(), codec.dumps(data)
+    
+    def _call_responses_api(self, user_prompt: str) -> Dict[str, Any]:
+        """Call the Responses API, falling back to full context if the server lost the state"""
+        previous_id = self._previous_response_id
+        headers, body = self._responses_request(user_prompt, previous_id)
         
-        response = requests.post(self.api_url, headers=headers, json=data)
+        start = time.perf_counter()
+        response = self._post(headers, body, url=self.responses_url)
+        queue_wait = response.queue_wait
+        if previous_id is not None and response.status_code in (400, 404) and \
+                'previous_response' in response.text:
+            logger.info(f"Conversation state {previous_id} expired; resending full context")
+            self.state_fallbacks += 1
+            response.close()
+            headers, body = self._responses_request(user_prompt, None)
+            response = self._post(headers, body, url=self.responses_url)
+            queue_wait += response.queue_wait
+        start += queue_wait
         response.raise_for_status()
+        result = codec.loads(response.content)
+        self._previous_response_id = result.get('id')
         
-        result = response.json()
-        content = result['choices'][0]['message']['content']
+        usage = result.get('usage') or {}
+        self._record_metrics(CallMetrics(
+            provider=self.provider,
+            model=self.model,
+            latency=time.perf_counter() - start,
+            prompt_tokens=usage.get('input_tokens', 0),
+            completion_tokens=usage.get('output_tokens', 0),
+            cache_read_tokens=(usage.get('input_tokens_details') or {}).get('cached_tokens', 0),
+            request_bytes=len(response.request.body or b''),
+            queue_wait=queue_wait
+        ))
         
-        # Parse the JSON response
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON from LLM response: {content}")
-            return {"actions": [], "reasoning": "Error: Could not parse LLM response"}
+        content = ''.join(part.get('text', '') for item in result.get('output', [])
+                          if item.get('type') == 'message'
+                          for part in item.get('content', []) if part.get('type') == 'output_text')
+        return self._parse_plan(content)
+    
+    def _anthropic_request(self, user_prompt: str):
+        """Build the headers and serialized body of an Anthropic Messages request
+        
+        The static system prompt carries a cache_control breakpoint so the
+        provider can reuse its prefill across turns. Prompts shorter than
+        the model's minimum cacheable length are simply not cached.
+        """
+        headers = {
+            'x-api-key': self.api_key or '',
+            'anthropic-version': ANTHROPIC_VERSION,
+            'Content-Type': 'application/json'
+        }
+        
+        system = []
+        messages = []
+        if self.memory is not None:
+            # Context follows the breakpoint so it never invalidates the cached prefix
+            context = self.memory.context()
+            if context:
+                system.append({'type': 'text', 'text': context})
+            messages.extend(self.memory.messages())
+        messages.append({'role': 'user', 'content': user_prompt})
+        if self.json_mode:
+            # No JSON mode in the Messages API; prefilling the opening brace has the same effect
+            messages.append({'role': 'assistant', 'content': '{'})
+        
+        key = ('messages', self.model, self.system_prompt, self.max_tokens)
+        template = self._templates.get(key)
+        if template is None:
+            data = {
+                'model': self.model,
+                'max_tokens': self.max_tokens,
+                'system': [{'type': 'text', 'text': self.system_prompt, 'cache_control': {'type': 'ephemeral'}}],
+                'messages': [],
+                'temperature': 0.2
+            }
+            template = self._templates[key] = RequestTemplate(data, ('system', 'messages'))
+        
+        return headers, template.render(system=system, messages=messages)
     
-    # Similar methods for other providers...
     def _call_anthropic_api(self, user_prompt: str) -> Dict[str, Any]:
         """Call the Anthropic API with the user prompt"""
-        # Implementation for Anthropic Claude
-        pass
+        headers, body = self._anthropic_request(user_prompt)
+        
+        start = time.perf_counter()
+        response = self._post(headers, body)
+        # Time queued behind the rate limiter is reported apart from provider latency
+        start += response.queue_wait
+        response.raise_for_status()
+        result = codec.loads(response.content)
+        
+        usage = result.get('usage') or {}
+        self._record_metrics(CallMetrics(
+            provider=self.provider,
+            model=self.model,
+            latency=time.perf_counter() - start,
+            prompt_tokens=usage.get('input_tokens', 0),
+            completion_tokens=usage.get('output_tokens', 0),
+            cache_read_tokens=usage.get('cache_read_input_tokens') or 0,
+            cache_write_tokens=usage.get('cache_creation_input_tokens') or 0,
+            request_bytes=len(response.request.body or b''),
+            queue_wait=response.queue_wait
+        ))
+        
+        content = ''.join(block.get('text', '') for block in result.get('content', [])
+                          if block.get('type') == 'text')
+        if self.json_mode and not content.lstrip().startswith('{'):
+            content = '{' + content
+        return self._parse_plan(content)
     
     def _call_local_model(self, user_prompt: str) -> Dict[str, Any]:
-        """Call a locally hosted model with the user prompt"""
-        # Implementation for local models
-        pass 
\ No newline at end of file
+        """Call a locally hosted model with the user prompt
+        
+        Local servers (llama.cpp server, vLLM, Ollama) expose the OpenAI
+        chat completions API, so the OpenAI request path is reused with the
+        local URL and its own pooled session.
+        """
+        return self._call_openai_api(user_prompt) 
\ No newline at end of file
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+from .cache import normalize_prompt
+from .metrics import CallMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join('~', '.local', 'share', 'mcp', 'ledger.db')
+
+TOKEN_COLUMNS = ('prompt_tokens', 'completion_tokens', 'cache_read_tokens', 'cache_write_tokens')
+
+def new_session_id() -> str:
+    return time.strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+
+class TokenLedger:
+    """Persistent record of the tokens and wall time of every provider call
+
+    One row is written per call, tagged with the session and the prompt
+    that caused it. Running totals for the current session are kept in
+    memory so budget checks never query the database.
+    """
+
+    def __init__(self, path: Optional[str] = None, session: Optional[str] = None):
+        """Open (or create) the ledger database and start a session"""
+        self.path = os.path.expanduser(path or DEFAULT_LEDGER_PATH)
+        self.session = session or new_session_id()
+        self.totals: Dict[str, float] = {column: 0 for column in TOKEN_COLUMNS}
+        self.totals.update({'tokens': 0, 'calls': 0, 'latency': 0.0})
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            "id INTEGER PRIMARY KEY, session TEXT NOT NULL, ts REAL NOT NULL, prompt TEXT NOT NULL, "
+            "provider TEXT NOT NULL, model TEXT NOT NULL, "
+            "prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL, "
+            "cache_read_tokens INTEGER NOT NULL, cache_write_tokens INTEGER NOT NULL, "
+            "latency REAL NOT NULL, streamed INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS calls_session ON calls (session)")
+        self._db.commit()
+
+    @property
+    def session_tokens(self) -> int:
+        """Input plus output tokens spent in the current session, cached input included"""
+        return self.totals['tokens']
+
+    def record(self, user_prompt: str, metrics: CallMetrics):
+        """Add one provider call to the ledger"""
+        with self._lock:
+            for column in TOKEN_COLUMNS:
+                self.totals[column] += getattr(metrics, column)
+            self.totals['tokens'] += metrics.total_tokens
+            self.totals['calls'] += 1
+            self.totals['latency'] += metrics.latency
+            self._db.execute(
+                "INSERT INTO calls (session, ts, prompt, provider, model, prompt_tokens, completion_tokens, "
+                "cache_read_tokens, cache_write_tokens, latency, streamed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.session, time.time(), normalize_prompt(user_prompt), metrics.provider, metrics.model,
+                 metrics.prompt_tokens, metrics.completion_tokens, metrics.cache_read_tokens,
+                 metrics.cache_write_tokens, metrics.latency, int(metrics.streamed))
+            )
+            self._db.commit()
+
+    def _rows(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._db.execute(query, params)
+            names = [d[0] for d in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def report(self, session: Optional[str] = None, limit: int = 10) -> Dict[str, Any]:
+        """Summarize usage per session, per model and per prompt
+
+        The per-model and per-prompt breakdowns cover ``session`` (the most
+        recent recorded session when omitted); pass ``'all'`` for every session.
+        """
+        sums = ', '.join(f"SUM({column}) AS {column}" for column in TOKEN_COLUMNS)
+        sessions = self._rows(
+            f"SELECT session, MIN(ts) AS started, COUNT(*) AS calls, {sums}, SUM(latency) AS latency "
+            f"FROM calls GROUP BY session ORDER BY started DESC LIMIT ?", (limit,)
+        )
+        if session is None and sessions:
+            session = sessions[0]['session']
+
+        where, params = ('', ()) if session in (None, 'all') else ('WHERE session = ?', (session,))
+        models = self._rows(
+            f"SELECT provider, model, COUNT(*) AS calls, {sums}, SUM(latency) AS latency "
+            f"FROM calls {where} GROUP BY provider, model ORDER BY calls DESC", params
+        )
+        prompts = self._rows(
+            f"SELECT prompt, COUNT(*) AS calls, {sums}, SUM(latency) AS latency FROM calls {where} "
+            f"GROUP BY prompt ORDER BY prompt_tokens + completion_tokens DESC LIMIT ?", params + (limit,)
+        )
+        return {'session': session, 'sessions': sessions, 'models': models, 'prompts': prompts}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a ledger report as plain text tables"""
+    def tokens(row):
+        cached = f" ({row['cache_read_tokens']} cached)" if row['cache_read_tokens'] else ''
+        return f"{row['prompt_tokens']:>9} in{cached} {row['completion_tokens']:>8} out {row['latency']:>8.1f}s"
+
+    lines = ["Recent sessions:"]
+    for row in report['sessions']:
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(row['started']))
+        lines.append(f"  {row['session']:<24}{started:<18}{row['calls']:>5} calls {tokens(row)}")
+    if not report['sessions']:
+        lines.append("  (no calls recorded)")
+        return '\n'.join(lines)
+
+    lines.append(f"By model ({report['session']}):")
+    for row in report['models']:
+        lines.append(f"  {row['provider'] + ':' + row['model']:<40}{row['calls']:>5} calls {tokens(row)}")
+    lines.append(f"Top prompts ({report['session']}):")
+    for row in report['prompts']:
+        prompt = row['prompt'] if len(row['prompt']) <= 40 else row['prompt'][:37] + '...'
+        lines.append(f"  {prompt:<40}{row['calls']:>5} calls {tokens(row)}")
+    return '\n'.join(lines)
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import re
+import sqlite3
+import string
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from .actions import registry
+from .cache import normalize_prompt
+from .intents import shell_path
+from .parser import Command
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MACRO_PATH = os.path.join('~', '.local', 'share', 'mcp', 'macros.db')
+
+def command_to_action(cmd: Command) -> Dict[str, Any]:
+    """Turn a parsed command back into an element of the actions array"""
+    return {'type': cmd.type, **cmd.action, 'description': cmd.description}
+
+def parse_slots(items: List[str]) -> Dict[str, str]:
+    """Parse ``slot=value`` arguments into a dict"""
+    slots = {}
+    for item in items:
+        key, sep, value = item.partition('=')
+        if not sep or not key:
+            raise ValueError(f"Expected slot=value, got '{item}'")
+        slots[key] = value
+    return slots
+
+def _escape(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
+
+def _fields(template: str) -> List[str]:
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+@dataclass
+class Macro:
+    """A stored plan that can be replayed without the LLM
+
+    ``prompt`` and the string fields of ``actions`` are format templates;
+    ``params`` maps every slot to its default value.
+    """
+    name: str
+    prompt: str
+    actions: List[Dict[str, Any]]
+    params: Dict[str, str] = field(default_factory=dict)
+    created: float = 0.0
+    updated: float = 0.0
+    uses: int = 0
+
+    def slots(self) -> List[str]:
+        names = set(_fields(self.prompt))
+        for action in self.actions:
+            for value in action.values():
+                if isinstance(value, str):
+                    names.update(_fields(value))
+        return sorted(names)
+
+    def render(self, values: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Fill the slots, falling back to the recorded defaults
+
+        Values substituted into a command are shell-quoted.
+        """
+        filled = dict(self.params)
+        filled.update(values or {})
+        quoted = {k: shell_path(v) if v else "''" for k, v in filled.items()}
+        actions = []
+        for template in self.actions:
+            action = {}
+            for key, value in template.items():
+                if isinstance(value, str):
+                    value = value.format(**(quoted if key == 'command' else filled))
+                action[key] = value
+            actions.append(action)
+        return actions
+
+class MacroStore:
+    """Named plans kept in SQLite and indexed in memory
+
+    Lookups by name and by exact prompt are dict hits. Prompts recorded
+    with slots become patterns, bucketed by their first word so a prompt
+    is only tried against macros that could match it.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Open (or create) the macro database and index its contents"""
+        self.path = os.path.expanduser(path or DEFAULT_MACRO_PATH)
+        self._macros: Dict[str, Macro] = {}
+        self._by_prompt: Dict[str, str] = {}
+        self._patterns: Dict[str, List[Tuple[re.Pattern, str]]] = {}
+        self._lock = threading.Lock()
+        self.replays = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS macros ("
+            "name TEXT PRIMARY KEY, prompt TEXT NOT NULL, actions TEXT NOT NULL, "
+            "params TEXT NOT NULL, created REAL NOT NULL, updated REAL NOT NULL, "
+            "uses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS macros_prompt ON macros (prompt)")
+        self._db.commit()
+        self._load()
+
+        logger.info(f"Macro store opened at {self.path} ({len(self._macros)} macros)")
+
+    def _load(self):
+        rows = self._db.execute(
+            "SELECT name, prompt, actions, params, created, updated, uses FROM macros"
+        ).fetchall()
+        for name, prompt, actions, params, created, updated, uses in rows:
+            try:
+                macro = Macro(name, prompt, json.loads(actions), json.loads(params), created, updated, uses)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping corrupt macro {name}")
+                continue
+            self._index(macro)
+
+    def _index(self, macro: Macro):
+        self._macros[macro.name] = macro
+        parts = list(string.Formatter().parse(macro.prompt))
+        if not any(name for _, name, _, _ in parts):
+            literal = ''.join(text for text, _, _, _ in parts)
+            self._by_prompt[normalize_prompt(literal).lower()] = macro.name
+            return
+
+        pattern, seen = [], set()
+        for text, name, _, _ in parts:
+            pattern.append(re.escape(text))
+            if name in seen:
+                pattern.append(f"(?P={name})")
+            elif name:
+                pattern.append(f"(?P<{name}>\\S+)")
+                seen.add(name)
+        compiled = re.compile(''.join(pattern), re.IGNORECASE)
+        self._patterns.setdefault(self._bucket(macro.prompt), []).append((compiled, macro.name))
+
+    @staticmethod
+    def _bucket(prompt: str) -> str:
+        first = prompt.split(' ', 1)[0].lower()
+        return '' if _fields(first) else first
+
+    def _unindex(self, name: str):
+        macro = self._macros.pop(name, None)
+        if macro is None:
+            return
+        self._by_prompt = {p: n for p, n in self._by_prompt.items() if n != name}
+        for first, entries in list(self._patterns.items()):
+            entries = [(p, n) for p, n in entries if n != name]
+            if entries:
+                self._patterns[first] = entries
+            else:
+                del self._patterns[first]
+
+    def record(self, name: Optional[str], prompt: str, actions: List[Dict[str, Any]],
+               slots: Optional[Dict[str, str]] = None) -> Macro:
+        """Store a plan that just ran, turning slot values into placeholders
+
+        Without a name the macro is stored under its prompt. Each value in
+        ``slots`` is replaced by ``{slot}`` in the prompt and in every
+        string field of the actions, but only where it stands as a whole
+        word or path segment. A value that also occurs inside a longer word
+        (``app`` in ``~/apps``) is rejected, since replaying with another
+        value would leave that occurrence behind or corrupt it.
+        """
+        prompt = normalize_prompt(prompt)
+        slots = slots or {}
+        placeholders = {}
+        for slot, value in slots.items():
+            if value:
+                placeholders.setdefault(_escape(value), f"{{{slot}}}")
+        pattern = None
+        if placeholders:
+            alternatives = '|'.join(re.escape(v) for v in sorted(placeholders, key=len, reverse=True))
+            pattern = re.compile(rf'(?<![\w-])(?:{alternatives})(?![\w-])')
+
+        def templatize(text: str) -> str:
+            text = _escape(text)
+            if pattern is None:
+                return text
+            template = pattern.sub(lambda m: placeholders[m.group(0)], text)
+            rest = template
+            for placeholder in placeholders.values():
+                rest = rest.replace(placeholder, ' ')
+            for value, placeholder in placeholders.items():
+                if value in rest:
+                    raise ValueError(f"Slot {placeholder[1:-1]}={value!r} also appears inside other words "
+                                     f"in '{text}'; choose a value that only occurs on its own")
+            return template
+
+        templates = [{k: templatize(v) if isinstance(v, str) else v for k, v in action.items()}
+                     for action in actions]
+        macro = Macro(name=name or prompt, prompt=templatize(prompt), actions=templates, params=dict(slots))
+        return self.save(macro)
+
+    def save(self, macro: Macro) -> Macro:
+        """Insert or replace a macro after checking its slots all have defaults and its actions are valid"""
+        missing = [slot for slot in macro.slots() if slot not in macro.params]
+        if missing:
+            raise ValueError(f"Macro '{macro.name}' uses slots without a default: {', '.join(missing)}")
+        if not macro.actions:
+            raise ValueError(f"Macro '{macro.name}' has no actions")
+        problems = registry.validate_plan(macro.render())
+        if problems:
+            raise ValueError(f"Macro '{macro.name}' has invalid actions: {'; '.join(problems)}")
+
+        with self._lock:
+            now = time.time()
+            previous = self._macros.get(macro.name)
+            macro.created = previous.created if previous else (macro.created or now)
+            macro.updated = now
+            if previous is not None:
+                macro.uses = max(macro.uses, previous.uses)
+            self._unindex(macro.name)
+            self._index(macro)
+            self._db.execute(
+                "INSERT OR REPLACE INTO macros (name, prompt, actions, params, created, updated, uses) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (macro.name, macro.prompt, json.dumps(macro.actions), json.dumps(macro.params),
+                 macro.created, macro.updated, macro.uses)
+            )
+            self._db.commit()
+        logger.info(f"Saved macro '{macro.name}' with {len(macro.actions)} actions")
+        return macro
+
+    def get(self, name: str) -> Optional[Macro]:
+        return self._macros.get(name)
+
+    def find(self, user_prompt: str) -> Optional[Tuple[Macro, Dict[str, str]]]:
+        """Return the macro recorded for a prompt and the slot values it implies"""
+        prompt = normalize_prompt(user_prompt)
+        name = self._by_prompt.get(prompt.lower())
+        if name is not None:
+            return self._macros[name], {}
+        first = prompt.split(' ', 1)[0].lower()
+        for bucket in (first, ''):
+            for pattern, name in self._patterns.get(bucket, ()):
+                match = pattern.fullmatch(prompt)
+                if match is not None:
+                    return self._macros[name], match.groupdict()
+        return None
+
+    def replay(self, macro: Macro, values: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Render a macro's actions and count the use"""
+        actions = macro.render(values)
+        with self._lock:
+            macro.uses += 1
+            self.replays += 1
+            self._db.execute("UPDATE macros SET uses = ? WHERE name = ?", (macro.uses, macro.name))
+            self._db.commit()
+        return actions
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            if name not in self._macros:
+                return False
+            self._unindex(name)
+            self._db.execute("DELETE FROM macros WHERE name = ?", (name,))
+            self._db.commit()
+        return True
+
+    def list(self) -> List[Macro]:
+        return sorted(self._macros.values(), key=lambda m: m.name)
+
+    @staticmethod
+    def export_one(macro: Macro) -> Dict[str, Any]:
+        """Return the editable fields of a macro"""
+        return {'name': macro.name, 'prompt': macro.prompt, 'params': macro.params, 'actions': macro.actions}
+
+    def export(self) -> List[Dict[str, Any]]:
+        """Return every macro as plain JSON-serializable dicts"""
+        return [dict(self.export_one(macro), uses=macro.uses) for macro in self.list()]
+
+    def load(self, items: List[Dict[str, Any]]) -> int:
+        """Import macros produced by export(); returns how many were saved"""
+        count = 0
+        for item in items:
+            try:
+                self.save(Macro(name=item['name'], prompt=item['prompt'], actions=item['actions'],
+                                params=item.get('params', {}), uses=item.get('uses', 0)))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.error(f"Skipping macro {item.get('name', '?') if isinstance(item, dict) else item}: {e}")
+                continue
+            count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {'macros': len(self._macros), 'replays': self.replays}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: about four characters per token for English and JSON
+
+    BPE tokenizers average 3.5-4.5 characters per token on this kind of
+    text; the estimate only has to keep the context near its budget.
+    """
+    return (len(text) + 3) // 4
+
+def _first_line(text: str, limit: int) -> str:
+    line = text.strip().split('\n', 1)[0]
+    return line if len(line) <= limit else line[:limit - 3] + '...'
+
+@dataclass
+class Turn:
+    """One prompt, the plan the LLM returned for it and what running it produced"""
+    prompt: str
+    plan: str
+    actions: List[str]
+    outputs: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+    def summary_line(self) -> str:
+        line = f"- {self.prompt} -> {'; '.join(self.actions) or 'no actions'}"
+        if self.outputs:
+            line += f" [{' | '.join(self.outputs)}]"
+        return line
+
+class ConversationMemory:
+    """Recent turns verbatim plus a rolling summary of older ones
+
+    The most recent ``recent_turns`` turns are replayed as user/assistant
+    messages. Older turns, and recent ones once the context exceeds
+    ``max_tokens``, are compacted into one summary line each (prompt,
+    actions taken, first line of their outputs). The oldest summary lines
+    are dropped when the summary itself outgrows its share of the budget.
+    """
+
+    def __init__(self, max_tokens: int = 1500, recent_turns: int = 4, summary_share: float = 0.4,
+                 output_chars: int = 120):
+        """Initialize an empty memory bounded to ``max_tokens`` estimated tokens"""
+        self.max_tokens = max_tokens
+        self.recent_turns = recent_turns
+        self.summary_share = summary_share
+        self.output_chars = output_chars
+        self.turns: "deque[Turn]" = deque()
+        self.summary: "deque[str]" = deque()
+        self._turn_tokens = 0
+        self._summary_tokens = 0
+        self.compacted = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.turns or self.summary)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens the context adds to a request"""
+        return self._turn_tokens + self._summary_tokens
+
+    def add(self, user_prompt: str, response: Dict[str, Any]):
+        """Remember a prompt and the plan returned for it"""
+        actions = response.get('actions', [])
+        plan = json.dumps({'actions': actions}, separators=(',', ':'))
+        turn = Turn(prompt=user_prompt, plan=plan,
+                    actions=[str(a.get('description', a.get('type', ''))) for a in actions if isinstance(a, dict)])
+        turn.tokens = estimate_tokens(user_prompt) + estimate_tokens(plan)
+        with self._lock:
+            self.turns.append(turn)
+            self._turn_tokens += turn.tokens
+            self._compact()
+
+    def add_results(self, results: List[Dict[str, Any]]):
+        """Attach the key output of each executed action to the latest turn"""
+        outputs = []
+        for result in results:
+            text = result.get('output') if result.get('success') else result.get('error')
+            if text:
+                outputs.append(_first_line(str(text), self.output_chars))
+        with self._lock:
+            if not self.turns or not outputs:
+                return
+            turn = self.turns[-1]
+            turn.outputs = outputs
+            extra = estimate_tokens(' | '.join(outputs))
+            turn.tokens += extra
+            self._turn_tokens += extra
+            self._compact()
+
+    def _compact(self):
+        while self.turns and (len(self.turns) > self.recent_turns or
+                              (len(self.turns) > 1 and self.tokens > self.max_tokens)):
+            turn = self.turns.popleft()
+            self._turn_tokens -= turn.tokens
+            line = turn.summary_line()
+            self.summary.append(line)
+            self._summary_tokens += estimate_tokens(line) + 1
+            self.compacted += 1
+
+        summary_budget = int(self.max_tokens * self.summary_share)
+        while self.summary and (self._summary_tokens > summary_budget or self.tokens > self.max_tokens):
+            self._summary_tokens -= estimate_tokens(self.summary.popleft()) + 1
+
+    def context(self) -> Optional[str]:
+        """Text describing the session so far, for the system side of a request"""
+        with self._lock:
+            if not self:
+                return None
+            lines = []
+            if self.summary:
+                lines.append("Earlier in this session:")
+                lines.extend(self.summary)
+            outputs = [f"- {turn.prompt}: {' | '.join(turn.outputs)}" for turn in self.turns if turn.outputs]
+            if outputs:
+                lines.append("Output of recent actions:")
+                lines.extend(outputs)
+            return '\n'.join(lines) or None
+
+    def last_outputs(self) -> Optional[str]:
+        """Outputs of the latest turn, which a server-held conversation has not seen"""
+        with self._lock:
+            if not self.turns or not self.turns[-1].outputs:
+                return None
+            return f"Output of the previous actions: {' | '.join(self.turns[-1].outputs)}"
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Recent turns as alternating user/assistant messages"""
+        with self._lock:
+            messages = []
+            for turn in self.turns:
+                messages.append({'role': 'user', 'content': turn.prompt})
+                messages.append({'role': 'assistant', 'content': turn.plan})
+            return messages
+
+    def shrink(self, factor: float = 0.5):
+        """Tighten the budget, compacting immediately"""
+        with self._lock:
+            self.max_tokens = int(self.max_tokens * factor)
+            self._compact()
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.summary.clear()
+            self._turn_tokens = 0
+            self._summary_tokens = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'turns': len(self.turns),
+            'summary_lines': len(self.summary),
+            'compacted': self.compacted,
+            'tokens': self.tokens,
+            'max_tokens': self.max_tokens
+        }
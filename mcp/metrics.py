@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Sequence
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile (nearest-rank) of a sequence of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(math.ceil(pct / 100.0 * len(ordered))), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Return count, mean and p50/p95/p99 of a sequence of latencies"""
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    ordered: List[float] = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99)
+    }
+
+# Providers whose prompt token count leaves out cache reads and writes
+# (OpenAI's includes its cached tokens)
+CACHE_OUTSIDE_PROMPT = {'anthropic'}
+
+@dataclass
+class CallMetrics:
+    """Timing and token counts of a single provider call"""
+    provider: str
+    model: str
+    latency: float = 0.0
+    first_token: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    request_bytes: int = 0
+    queue_wait: float = 0.0
+    streamed: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        """Input plus output tokens, with cached input counted the same way for every provider"""
+        total = self.prompt_tokens + self.completion_tokens
+        if self.provider in CACHE_OUTSIDE_PROMPT:
+            total += self.cache_read_tokens + self.cache_write_tokens
+        return total
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Completion tokens per second of generation time"""
+        generation = self.latency - (self.first_token or 0.0)
+        if self.completion_tokens <= 0 or generation <= 0:
+            return 0.0
+        return self.completion_tokens / generation
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['tokens_per_second'] = self.tokens_per_second
+        return data
+
+class LatencyHistogram:
+    """Rolling window of recent latencies for one provider"""
+
+    def __init__(self, window: int = 200):
+        """Initialize an empty window holding at most ``window`` samples"""
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float:
+        with self._lock:
+            samples = list(self._samples)
+        return percentile(samples, pct)
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            samples = list(self._samples)
+        return summarize(samples)
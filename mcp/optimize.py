@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+import logging
+import os
+import re
+import shlex
+import threading
+from typing import Dict, Any, List, Callable, FrozenSet, Optional, Tuple
+
+from .parser import Command
+from .plan import GUI, SYSTEM, command_resources, conflicts, related, resolve, split_commands
+
+logger = logging.getLogger(__name__)
+
+REWRITES = ('existing_mkdir', 'dead_writes', 'coalesced_typing', 'fused_shell')
+
+_CD_PREFIX = re.compile(r'^\s*cd\s+([^\s;&|<>()`$"\']+)\s*&&\s*(.+)$', re.S)
+# Characters whose meaning the optimizer does not try to follow when rewriting shell lines
+_UNSAFE_SHELL = re.compile(r'[\n#`$*?\[\]{}"\'\\]')
+
+Resources = Tuple[FrozenSet[str], FrozenSet[str]]
+
+class PlanOptimizer:
+    """Rewrite a parsed plan into fewer actions without changing what it does
+
+    Four rewrites run in order, each only where it cannot change what
+    the plan does:
+
+    - ``mkdir -p`` of directories that already exist (and nothing earlier
+      in the plan touches, or may touch through shell expansion) is dropped;
+    - a file write overwritten by a later write to the same path is
+      dropped when only file operations on other paths sit in between
+      (shell commands and GUI actions may read any file);
+    - consecutive ``type`` GUI actions are joined into one;
+    - a shell command that depends on the one right before it, with the
+      same ``cd`` prefix, is fused into it with ``&&``. Its dependents
+      would never have run after a failure, but fusing also ties the
+      first command's other dependents to the second one, so this is only
+      done when any failure stops the plan (``fail_fast``).
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, is_dir: Callable[[str], bool] = os.path.isdir):
+        """Initialize the optimizer; config can turn off individual rewrites"""
+        config = config or {}
+        self.enabled = {name: config.get(name, True) for name in REWRITES}
+        self.is_dir = is_dir
+        self._stats = {'plans': 0, 'actions_in': 0, 'actions_out': 0, **{name: 0 for name in REWRITES}}
+        self._lock = threading.Lock()
+
+    def optimize(self, commands: List[Command], cwd: Optional[str] = None,
+                 fail_fast: bool = True) -> Tuple[List[Command], Dict[str, Any]]:
+        """Return the rewritten plan and a report of what was saved"""
+        cwd = cwd or os.getcwd()
+        counts = {name: 0 for name in REWRITES}
+        optimized = list(commands)
+        if self.enabled['existing_mkdir']:
+            optimized = self._drop_existing_mkdir(optimized, cwd, counts)
+        if self.enabled['dead_writes']:
+            optimized = self._drop_dead_writes(optimized, cwd, counts)
+        if self.enabled['coalesced_typing']:
+            optimized = self._coalesce_typing(optimized, counts)
+        if self.enabled['fused_shell'] and fail_fast:
+            optimized = self._fuse_shell(optimized, cwd, counts)
+
+        report = {'before': len(commands), 'after': len(optimized),
+                  'saved': len(commands) - len(optimized), **counts}
+        with self._lock:
+            self._stats['plans'] += 1
+            self._stats['actions_in'] += report['before']
+            self._stats['actions_out'] += report['after']
+            for name in REWRITES:
+                self._stats[name] += counts[name]
+        if report['saved']:
+            logger.info(f"Optimized plan from {report['before']} to {report['after']} actions: "
+                        f"{', '.join(f'{name} {counts[name]}' for name in REWRITES if counts[name])}")
+        return optimized, report
+
+    def _drop_existing_mkdir(self, commands: List[Command], cwd: str, counts: Dict[str, int]) -> List[Command]:
+        result: List[Command] = []
+        touched: List[str] = []
+        # After a shell line the optimizer cannot read literally, any directory may be gone
+        opaque = False
+        for cmd in commands:
+            reads, writes = command_resources(cmd, cwd)
+            directories = self._mkdir_p_operands(cmd)
+            if directories is not None and not opaque and SYSTEM not in touched and GUI not in touched:
+                missing = [d for d in directories
+                           if any(related(resolve(d, cwd), path) for path in touched)
+                           or not self.is_dir(resolve(d, cwd))]
+                if not missing:
+                    counts['existing_mkdir'] += 1
+                    continue
+                if len(missing) < len(directories):
+                    cmd = Command(cmd.type, {**cmd.action, 'command': 'mkdir -p ' + ' '.join(missing)},
+                                  cmd.description)
+            touched.extend(writes)
+            opaque = opaque or (cmd.type == 'command_line' and bool(_UNSAFE_SHELL.search(cmd.action.get('command', ''))))
+            result.append(cmd)
+        return result
+
+    @staticmethod
+    def _mkdir_p_operands(cmd: Command) -> Optional[List[str]]:
+        """The directories of a plain ``mkdir -p DIR...`` command, None for anything else"""
+        if cmd.type != 'command_line':
+            return None
+        command = cmd.action.get('command', '')
+        if _UNSAFE_SHELL.search(command):
+            return None
+        parts = split_commands(command)
+        if len(parts or []) != 1 or any(c in command for c in ';&|<>'):
+            return None
+        words = parts[0]
+        flags = [w for w in words[1:] if w.startswith('-')]
+        if words[0] != 'mkdir' or not flags or any(f not in ('-p', '--parents') for f in flags):
+            return None
+        return [w for w in words[1:] if not w.startswith('-')] or None
+
+    def _drop_dead_writes(self, commands: List[Command], cwd: str, counts: Dict[str, int]) -> List[Command]:
+        resources = [command_resources(cmd, cwd) for cmd in commands]
+        dead = set()
+        for i, cmd in enumerate(commands):
+            if cmd.type != 'file_operation' or cmd.action.get('action') != 'write':
+                continue
+            path = resolve(cmd.action.get('path', ''), cwd)
+            for j in range(i + 1, len(commands)):
+                later = commands[j]
+                if (later.type == 'file_operation' and later.action.get('action') == 'write'
+                        and resolve(later.action.get('path', ''), cwd) == path):
+                    dead.add(i)
+                    break
+                # Shell commands and GUI actions can open files their resources do not name
+                if later.type != 'file_operation':
+                    break
+                reads, writes = resources[j]
+                if any(related(path, r) for r in reads | writes):
+                    break
+        counts['dead_writes'] += len(dead)
+        return [cmd for i, cmd in enumerate(commands) if i not in dead]
+
+    def _coalesce_typing(self, commands: List[Command], counts: Dict[str, int]) -> List[Command]:
+        result: List[Command] = []
+        for cmd in commands:
+            previous = result[-1] if result else None
+            if previous is not None and self._is_typing(cmd) and self._is_typing(previous):
+                result[-1] = Command(previous.type, {**previous.action, 'text': previous.action['text'] + cmd.action['text']},
+                                     f"{previous.description}; {cmd.description}")
+                counts['coalesced_typing'] += 1
+                continue
+            result.append(cmd)
+        return result
+
+    @staticmethod
+    def _is_typing(cmd: Command) -> bool:
+        return (cmd.type == 'gui_action' and cmd.action.get('action') == 'type'
+                and isinstance(cmd.action.get('text'), str) and cmd.action['text'] != '')
+
+    def _fuse_shell(self, commands: List[Command], cwd: str, counts: Dict[str, int]) -> List[Command]:
+        result: List[Command] = []
+        merged: List[Resources] = []
+        for cmd in commands:
+            resources = command_resources(cmd, cwd)
+            previous = result[-1] if result else None
+            if previous is not None and conflicts(merged[-1], resources):
+                fused = self._fuse(previous.action.get('command', ''), cmd.action.get('command', ''),
+                                   previous.type, cmd.type)
+                if fused is not None:
+                    result[-1] = Command('command_line', {**previous.action, 'command': fused},
+                                         f"{previous.description}; {cmd.description}")
+                    merged[-1] = (merged[-1][0] | resources[0], merged[-1][1] | resources[1])
+                    counts['fused_shell'] += 1
+                    continue
+            result.append(cmd)
+            merged.append(resources)
+        return result
+
+    @staticmethod
+    def _fuse(first: str, second: str, first_type: str, second_type: str) -> Optional[str]:
+        """``first && second`` under their shared cd prefix, None if they cannot be fused safely"""
+        if first_type != 'command_line' or second_type != 'command_line':
+            return None
+        if '\n' in first + second or '#' in first + second:
+            return None
+        prefixes, bodies = [], []
+        for line in (first, second):
+            match = _CD_PREFIX.match(line)
+            prefix, body = (match.group(1), match.group(2)) if match else (None, line)
+            parts = split_commands(body)
+            # A cd anywhere else would change the directory the other half runs in
+            if not parts or any(part[0] == 'cd' for part in parts):
+                return None
+            prefixes.append(prefix)
+            bodies.append(body.strip().rstrip(';').strip())
+        if prefixes[0] != prefixes[1] or not bodies[0] or bodies[0].endswith('&'):
+            return None
+        # 'a && b; c' would run c even when a fails, 'a && b &' would background a too
+        if not _only_and_lists(bodies[1]):
+            return None
+        fused = f"{bodies[0]} && {bodies[1]}"
+        return f"cd {prefixes[0]} && {fused}" if prefixes[0] else fused
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['saved'] = stats['actions_in'] - stats['actions_out']
+        return stats
+
+def _only_and_lists(command: str) -> bool:
+    """Whether a shell line joins its commands with nothing but && and pipes"""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        return all(token in ('&&', '|') for token in lexer if token and set(token) <= set('&|;()'))
+    except ValueError:
+        return False
+
+def format_report(report: Dict[str, Any]) -> str:
+    """One-line summary of an optimization report"""
+    details = ', '.join(f"{report[name]} {name.replace('_', ' ')}" for name in REWRITES if report.get(name))
+    return f"Optimized plan: {report['before']} -> {report['after']} actions ({details})"
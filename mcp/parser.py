@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterable, Iterator
 from dataclasses import dataclass
 
+from .actions import ActionRegistry, ActionType, registry as default_registry
+from .streaming import ActionStreamParser
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -15,60 +18,73 @@ class Command:
 class CommandParser:
     """Parse structured LLM responses into executable commands"""
     
-    def __init__(self):
-        """Initialize the command parser"""
+    def __init__(self, registry: Optional[ActionRegistry] = None):
+        """Initialize the command parser with an action type registry"""
+        self.registry = registry or default_registry
         logger.info("Command Parser initialized")
     
+    def validate(self, llm_response: Dict[str, Any]) -> List[str]:
+        """Return the problems of every invalid action in a response, empty if it can run"""
+        return self.registry.validate_plan(llm_response.get('actions', []))
+    
     def parse(self, llm_response: Dict[str, Any]) -> List[Command]:
-        """Parse an LLM response into a list of executable commands"""
+        """Parse an LLM response into a list of executable commands
+        
+        The whole plan is validated first: if any action is malformed no
+        command is returned, so nothing runs before the bad step is reached.
+        """
         commands = []
         
         try:
             actions = llm_response.get('actions', [])
+            problems = self.registry.validate_plan(actions)
+            if problems:
+                logger.error(f"Rejected plan with {len(problems)} invalid actions: {'; '.join(problems)}")
+                return []
             
             for action in actions:
-                cmd_type = action.get('type')
-                description = action.get('description', 'No description provided')
-                
-                if cmd_type == 'command_line':
-                    cmd = Command(
-                        type='command_line',
-                        action={'command': action.get('command', '')},
-                        description=description
-                    )
-                    commands.append(cmd)
-                
-                elif cmd_type == 'gui_action':
-                    cmd = Command(
-                        type='gui_action',
-                        action={
-                            'action': action.get('action', ''),
-                            'target': action.get('target', ''),
-                            'coordinates': action.get('coordinates', [0, 0]),
-                            'text': action.get('text', '')
-                        },
-                        description=description
-                    )
-                    commands.append(cmd)
-                
-                elif cmd_type == 'file_operation':
-                    cmd = Command(
-                        type='file_operation',
-                        action={
-                            'action': action.get('action', ''),
-                            'path': action.get('path', ''),
-                            'content': action.get('content', '')
-                        },
-                        description=description
-                    )
-                    commands.append(cmd)
-                
-                else:
-                    logger.warning(f"Unknown command type: {cmd_type}")
+                commands.append(self._build(self.registry.get(action['type']), action))
             
             logger.info(f"Parsed {len(commands)} commands from LLM response")
             
         except Exception as e:
             logger.error(f"Error parsing LLM response: {e}")
         
-        return commands 
\ No newline at end of file
+        return commands
+    
+    def parse_stream(self, chunks: Iterable[str]) -> Iterator[Command]:
+        """Yield commands from raw LLM response text as each actions[i] object closes
+        
+        ``chunks`` may split the text anywhere (tokens, SSE deltas, lines).
+        The scanner resumes where the previous chunk ended, so the total
+        cost is linear in the response size however it is split. Actions
+        are validated one at a time, as they arrive; the stream stops at the
+        first invalid one, since the steps after it may depend on it.
+        """
+        stream = ActionStreamParser()
+        count = 0
+        for chunk in chunks:
+            for action in stream.feed(chunk):
+                cmd = self.parse_action(action)
+                if cmd is None:
+                    logger.info(f"Stopped streamed LLM response after {count} commands")
+                    return
+                count += 1
+                yield cmd
+        logger.info(f"Parsed {count} commands from streamed LLM response")
+    
+    def parse_action(self, action: Dict[str, Any]) -> Optional[Command]:
+        """Validate a single element of the actions array and turn it into a command"""
+        problem = self.registry.problem(action)
+        if problem is not None:
+            logger.warning(f"Invalid action: {problem}")
+            return None
+        return self._build(self.registry.get(action['type']), action)
+    
+    @staticmethod
+    def _build(action_type: ActionType, action: Dict[str, Any]) -> Command:
+        return Command(
+            type=action_type.name,
+            action=action_type.build(action),
+            description=action.get('description', 'No description provided')
+        )
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+import logging
+import os
+import shlex
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Callable, FrozenSet, Iterable, Optional, Set, Tuple
+
+from .parser import Command
+
+logger = logging.getLogger(__name__)
+
+# Pseudo-resources: every GUI action writes GUI and every other action
+# reads it, so GUI actions stay in order with everything (a click or
+# Ctrl+S can open or save any file). Every action reads SYSTEM and shell
+# commands we cannot analyse write it, which makes them barriers that
+# nothing is reordered across.
+GUI = 'gui:'
+SYSTEM = 'system:'
+
+_SEPARATORS = {'&&', '||', ';', '|', '&', '|&', ';;'}
+_REDIRECT_WRITE = {'>', '>>', '&>', '>|', '2>', '2>>'}
+_REDIRECT_READ = {'<'}
+
+# Programs whose effects are fully described by their arguments
+_NO_PATHS = {'echo', 'printf', 'pwd', 'true', 'false', 'date', 'whoami', 'uname', 'hostname', 'id'}
+_READERS = {'cat', 'ls', 'head', 'tail', 'wc', 'grep', 'egrep', 'fgrep', 'less', 'more', 'stat', 'file',
+            'du', 'diff', 'uniq', 'md5sum', 'sha256sum', 'tree', 'realpath', 'readlink'}
+# Plans wait for an app started in the background with these, so they order everything after them
+_WAITS = {'sleep', 'wait'}
+# find expressions that run programs or write files other than the ones found
+_FIND_UNKNOWN = {'-exec', '-execdir', '-ok', '-okdir', '-fprint', '-fprint0', '-fprintf', '-fls'}
+_WRITERS = {'mkdir', 'touch', 'rm', 'rmdir', 'tee', 'truncate', 'unlink'}
+_COPIERS = {'cp', 'ln', 'rsync'}
+_LAST_WRITTEN = {'chmod', 'chown', 'chgrp'}
+
+def resolve(path: str, cwd: str) -> str:
+    """Absolute, normalized form of a path as the command would see it"""
+    return os.path.normpath(os.path.join(cwd, os.path.expanduser(path)))
+
+def _ancestors(path: str) -> Iterable[str]:
+    """The path itself, then each parent up to the root"""
+    if not path.startswith('/'):
+        yield path
+        return
+    while True:
+        yield path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return
+        path = parent
+
+def has_expansion(command: str) -> bool:
+    """Whether the shell would expand part of a line: variables, command substitution, globs or braces"""
+    quote = None
+    escaped = False
+    for char in command:
+        if escaped:
+            escaped = False
+        elif quote == "'":
+            if char == "'":
+                quote = None
+        elif char == '\\':
+            escaped = True
+        elif char in '$`':
+            return True
+        elif quote == '"':
+            if char == '"':
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char in '*?[{':
+            return True
+    return False
+
+def split_commands(command: str) -> Optional[List[List[str]]]:
+    """Tokenize a shell line into simple commands; None if it cannot be tokenized"""
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        tokens = list(lexer)
+    except ValueError:
+        return None
+    commands, current = [], []
+    for token in tokens:
+        if token in _SEPARATORS:
+            if current:
+                commands.append(current)
+            current = []
+        else:
+            current.append(token)
+    if current:
+        commands.append(current)
+    return commands
+
+def _sort_resources(args: List[str], cwd: str) -> Tuple[List[str], List[str]]:
+    """Files sort reads and the one it writes with -o/--output"""
+    inputs, outputs = [], []
+    words = iter(args)
+    for word in words:
+        if word in ('-o', '--output'):
+            output = next(words, None)
+            if output is not None:
+                outputs.append(resolve(output, cwd))
+        elif word.startswith('--output='):
+            outputs.append(resolve(word.split('=', 1)[1], cwd))
+        elif word.startswith('-o') and not word.startswith('--'):
+            outputs.append(resolve(word[2:], cwd))
+        elif not word.startswith('-'):
+            inputs.append(resolve(word, cwd))
+    return inputs, outputs
+
+def shell_resources(command: str, cwd: str) -> Tuple[Set[str], Set[str]]:
+    """Paths a shell line reads and writes
+
+    ``cd X`` changes the directory later parts of the same line resolve
+    against (each action runs in a fresh shell, so it does not carry over).
+    Programs outside the known set write SYSTEM and their directory: they
+    may touch any path, whatever directory they were started in. So does
+    any line the shell would expand, since its words are not the paths
+    it ends up touching.
+    """
+    reads: Set[str] = set()
+    writes: Set[str] = set()
+    commands = split_commands(command)
+    if commands is None or has_expansion(command):
+        return reads, {SYSTEM, cwd}
+
+    for words in commands:
+        args = []
+        redirect = None
+        for word in words:
+            if redirect is not None:
+                (writes if redirect == 'write' else reads).add(resolve(word, cwd))
+                redirect = None
+            elif word in _REDIRECT_WRITE:
+                redirect = 'write'
+            elif word in _REDIRECT_READ:
+                redirect = 'read'
+            elif not args and '=' in word and not word.startswith('='):
+                continue  # VAR=value prefix
+            else:
+                args.append(word)
+        if not args:
+            continue
+
+        program, operands = os.path.basename(args[0]), [a for a in args[1:] if not a.startswith('-')]
+        if program == 'cd':
+            cwd = resolve(operands[0] if operands else '~', cwd)
+            reads.add(cwd)
+        elif program in _NO_PATHS:
+            continue
+        elif program in _WAITS:
+            writes.update((GUI, SYSTEM))
+        elif program == 'find' and not _FIND_UNKNOWN.intersection(args):
+            roots = []
+            for arg in args[1:]:
+                if arg.startswith(('-', '(', '!')):
+                    break
+                roots.append(resolve(arg, cwd))
+            (writes if '-delete' in args else reads).update(roots or [cwd])
+        elif program == 'sort':
+            inputs, outputs = _sort_resources(args[1:], cwd)
+            reads.update(inputs)
+            writes.update(outputs)
+        elif program in _READERS:
+            reads.update(resolve(a, cwd) for a in operands)
+            if not operands:
+                reads.add(cwd)
+        elif program in _WRITERS:
+            writes.update(resolve(a, cwd) for a in operands)
+        elif program in _COPIERS and operands:
+            reads.update(resolve(a, cwd) for a in operands[:-1])
+            writes.add(resolve(operands[-1], cwd))
+        elif program == 'mv':
+            writes.update(resolve(a, cwd) for a in operands)
+        elif program in _LAST_WRITTEN and operands:
+            writes.update(resolve(a, cwd) for a in operands[1:])
+        else:
+            writes.update((SYSTEM, cwd))
+    return reads, writes
+
+def command_resources(cmd: Command, cwd: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Resources one command reads and writes"""
+    reads, writes = {SYSTEM, GUI}, set()
+    if cmd.type == 'command_line':
+        shell_reads, shell_writes = shell_resources(cmd.action.get('command', ''), cwd)
+        reads |= shell_reads
+        writes |= shell_writes
+    elif cmd.type == 'file_operation':
+        path = resolve(cmd.action.get('path', ''), cwd)
+        if cmd.action.get('action') == 'read':
+            reads.add(path)
+        else:
+            writes.add(path)
+    elif cmd.type == 'gui_action':
+        writes.add(GUI)
+    else:
+        writes.add(SYSTEM)
+    return frozenset(reads - writes), frozenset(writes)
+
+def related(first: str, second: str) -> bool:
+    """Whether two resources overlap: the same path or one inside the other"""
+    if first == second:
+        return True
+    shorter, longer = sorted((first, second), key=len)
+    return longer.startswith(shorter.rstrip('/') + '/')
+
+def conflicts(earlier: Tuple[FrozenSet[str], FrozenSet[str]], later: Tuple[FrozenSet[str], FrozenSet[str]]) -> bool:
+    """Whether a (reads, writes) pair must stay ordered after an earlier one"""
+    earlier_reads, earlier_writes = earlier
+    later_reads, later_writes = later
+    return (any(related(w, r) for w in earlier_writes for r in later_reads | later_writes)
+            or any(related(r, w) for r in earlier_reads for w in later_writes))
+
+@dataclass
+class PlanNode:
+    """One action of a plan with the resources it touches and its place in the graph"""
+    index: int
+    command: Command
+    reads: FrozenSet[str]
+    writes: FrozenSet[str]
+    weight: float = 1.0
+    deps: List[int] = field(default_factory=list)
+    dependents: List[int] = field(default_factory=list)
+
+class PlanGraph:
+    """Dependency DAG of a parsed plan
+
+    An action depends on an earlier one when both touch the same path (or
+    one touches a path inside the other) and at least one of them writes
+    it. Edges always point forward in plan order, so running actions in
+    that order is one valid schedule; ``levels`` groups actions that can
+    run together.
+    """
+
+    def __init__(self, nodes: List[PlanNode]):
+        """Compute levels and the critical path of already linked nodes"""
+        self.nodes = nodes
+        self.level_of: List[int] = []
+        self.levels: List[List[int]] = []
+        finish: List[float] = []
+        previous: List[Optional[int]] = []
+        for node in nodes:
+            level = 1 + max((self.level_of[dep] for dep in node.deps), default=-1)
+            self.level_of.append(level)
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].append(node.index)
+            start, before = 0.0, None
+            for dep in node.deps:
+                if finish[dep] > start:
+                    start, before = finish[dep], dep
+            finish.append(start + node.weight)
+            previous.append(before)
+
+        self.critical_path: List[int] = []
+        self.critical_path_length = 0.0
+        if nodes:
+            last = max(range(len(nodes)), key=lambda i: finish[i])
+            self.critical_path_length = finish[last]
+            while last is not None:
+                self.critical_path.append(last)
+                last = previous[last]
+            self.critical_path.reverse()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edges(self) -> List[Tuple[int, int]]:
+        return [(dep, node.index) for node in self.nodes for dep in node.deps]
+
+    @property
+    def width(self) -> int:
+        """Most actions that can run at the same time"""
+        return max((len(level) for level in self.levels), default=0)
+
+    def ready(self, done: Set[int], started: Set[int] = frozenset()) -> List[int]:
+        """Actions not yet started whose dependencies have all finished"""
+        return [node.index for node in self.nodes
+                if node.index not in done and node.index not in started
+                and all(dep in done for dep in node.deps)]
+
+    def blockers(self, index: int, done: Set[int]) -> List[int]:
+        """Unfinished actions that the given one is waiting for"""
+        return [dep for dep in self.nodes[index].deps if dep not in done]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'actions': len(self.nodes),
+            'edges': sum(len(node.deps) for node in self.nodes),
+            'levels': len(self.levels),
+            'width': self.width,
+            'critical_path': [i + 1 for i in self.critical_path],
+            'critical_path_length': self.critical_path_length
+        }
+
+def build_plan_graph(commands: List[Command], cwd: Optional[str] = None,
+                     weight: Optional[Callable[[Command], float]] = None) -> PlanGraph:
+    """Analyse a parsed plan into a PlanGraph
+
+    Dependencies are found with a scoreboard: for every resource the last
+    writer and the readers since then. ``weight`` estimates an action's
+    duration for the critical path (1 per action by default).
+    """
+    cwd = cwd or os.getcwd()
+    nodes: List[PlanNode] = []
+    writer: Dict[str, int] = {}
+    readers: Dict[str, List[int]] = {}
+
+    for index, cmd in enumerate(commands):
+        reads, writes = command_resources(cmd, cwd)
+        deps: Set[int] = set()
+        for resource in reads | writes:
+            # Anything written at or above this path (e.g. the directory being created)
+            for path in _ancestors(resource):
+                if path in writer:
+                    deps.add(writer[path])
+            # Anything written below it (reading a directory after files were added to it)
+            prefix = resource.rstrip('/') + '/'
+            deps.update(i for path, i in writer.items() if path.startswith(prefix))
+        for resource in writes:
+            for path in _ancestors(resource):
+                deps.update(readers.get(path, ()))
+            prefix = resource.rstrip('/') + '/'
+            for path, indices in readers.items():
+                if path.startswith(prefix):
+                    deps.update(indices)
+
+        node = PlanNode(index, cmd, reads, writes, weight(cmd) if weight else 1.0, sorted(deps))
+        for dep in node.deps:
+            nodes[dep].dependents.append(index)
+        nodes.append(node)
+
+        for resource in writes:
+            writer[resource] = index
+            readers.pop(resource, None)
+        for resource in reads:
+            readers.setdefault(resource, []).append(index)
+
+    graph = PlanGraph(nodes)
+    logger.info(f"Plan graph: {len(graph)} actions, {len(graph.edges)} dependencies, "
+                f"critical path {graph.critical_path_length:g} over {len(graph.levels)} levels, width {graph.width}")
+    return graph
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, TimeoutError as FuturesTimeout
+from typing import Dict, Any, Callable, Optional, Awaitable
+
+import requests
+
+from .metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+class RequestPolicy:
+    """Timeouts, retries with jittered backoff and optional hedging for provider calls
+
+    A rolling latency histogram is kept per provider. When hedging is on
+    and enough samples exist, a duplicate request is fired once the first
+    has been outstanding for longer than the observed p95, and whichever
+    finishes first wins.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """Initialize the policy from the llm configuration"""
+        config = config or {}
+        retry = config.get('retry', {})
+        hedge = config.get('hedge', {})
+
+        self.connect_timeout = config.get('connect_timeout', 10.0)
+        self.read_timeout = config.get('timeout', 60.0)
+        self.max_retries = retry.get('max_retries', 3)
+        self.backoff_base = retry.get('backoff_base', 0.5)
+        self.backoff_max = retry.get('backoff_max', 30.0)
+        self.max_retry_after = retry.get('max_retry_after', 60.0)
+
+        self.hedge_enabled = hedge.get('enabled', False)
+        self.hedge_percentile = hedge.get('percentile', 95)
+        self.hedge_min_samples = hedge.get('min_samples', 20)
+        self.hedge_min_delay = hedge.get('min_delay', 0.05)
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple for requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def histogram(self, provider: str) -> LatencyHistogram:
+        with self._lock:
+            histogram = self.histograms.get(provider)
+            if histogram is None:
+                histogram = self.histograms[provider] = LatencyHistogram()
+            return histogram
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_delay(self, attempt: int, headers) -> float:
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return self.backoff(attempt)
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging does not apply"""
+        if not self.hedge_enabled:
+            return None
+        histogram = self.histogram(provider)
+        if len(histogram) < self.hedge_min_samples:
+            return None
+        return max(histogram.percentile(self.hedge_percentile), self.hedge_min_delay)
+
+    def _note_retry(self, provider: str, attempt: int, reason: str, delay: float):
+        with self._lock:
+            self.retries += 1
+        logger.warning(f"{provider} request failed ({reason}); retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+
+    # Blocking requests
+
+    def execute(self, provider: str, send: Callable[[Any], requests.Response],
+                hedge: bool = True) -> requests.Response:
+        """Send a request through the policy
+
+        ``send`` receives the timeout to use and returns a response.
+        Responses with non-retryable statuses are returned as-is so the
+        caller decides how to surface them.
+        """
+        attempt = 0
+        while True:
+            try:
+                if hedge:
+                    response = self._hedged(provider, send)
+                else:
+                    response = self._timed(provider, send)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                self._note_retry(provider, attempt, type(e).__name__, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_delay(attempt, response.headers)
+                self._note_retry(provider, attempt, f"HTTP {response.status_code}", delay)
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _timed(self, provider: str, send: Callable[[Any], requests.Response]) -> requests.Response:
+        start = time.perf_counter()
+        response = send(self.timeout)
+        if response.status_code < 500 and response.status_code != 429:
+            self.histogram(provider).record(time.perf_counter() - start)
+        return response
+
+    def _hedged(self, provider: str, send: Callable[[Any], requests.Response]) -> requests.Response:
+        delay = self.hedge_delay(provider)
+        if delay is None:
+            return self._timed(provider, send)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm-hedge')
+        primary = self._executor.submit(self._timed, provider, send)
+        try:
+            return primary.result(timeout=delay)
+        except FuturesTimeout:
+            pass
+
+        with self._lock:
+            self.hedges += 1
+        logger.info(f"{provider} request exceeded p{self.hedge_percentile} ({delay:.2f}s); sending hedge")
+        backup = self._executor.submit(self._timed, provider, send)
+
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    winner = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is backup:
+                    with self._lock:
+                        self.hedge_wins += 1
+                # The loser's response is discarded once it arrives
+                for loser in pending:
+                    loser.add_done_callback(_close_response)
+                return winner
+        raise error
+
+    # asyncio requests
+
+    async def aexecute(self, provider: str, send: Callable[[], Awaitable[Any]],
+                       retryable: tuple = (), hedge: bool = True):
+        """Async counterpart of execute(); losing hedges are cancelled
+
+        ``send`` returns an awaitable response with ``status_code`` and
+        ``headers``. ``retryable`` lists transport exceptions worth retrying.
+        """
+        attempt = 0
+        while True:
+            try:
+                if hedge:
+                    response = await self._ahedged(provider, send)
+                else:
+                    response = await self._atimed(provider, send)
+            except retryable as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                self._note_retry(provider, attempt, type(e).__name__, delay)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._retry_delay(attempt, response.headers)
+                self._note_retry(provider, attempt, f"HTTP {response.status_code}", delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _atimed(self, provider: str, send: Callable[[], Awaitable[Any]]):
+        start = time.perf_counter()
+        response = await send()
+        if response.status_code < 500 and response.status_code != 429:
+            self.histogram(provider).record(time.perf_counter() - start)
+        return response
+
+    async def _ahedged(self, provider: str, send: Callable[[], Awaitable[Any]]):
+        delay = self.hedge_delay(provider)
+        if delay is None:
+            return await self._atimed(provider, send)
+
+        primary = asyncio.ensure_future(self._atimed(provider, send))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedges += 1
+        logger.info(f"{provider} request exceeded p{self.hedge_percentile} ({delay:.2f}s); sending hedge")
+        backup = asyncio.ensure_future(self._atimed(provider, send))
+
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is backup:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return retry/hedge counters and per-provider latency summaries"""
+        with self._lock:
+            histograms = dict(self.histograms)
+        return {
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'latency': {provider: h.summary() for provider, h in histograms.items()}
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+class CircuitBreaker:
+    """Stop sending to a provider after repeated failures
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused for ``reset_timeout`` seconds. Then a single trial
+    call is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """Initialize a closed circuit"""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may be sent now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
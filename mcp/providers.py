@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import logging
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from .metrics import CallMetrics
+from .policy import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+MODES = ('failover', 'race', 'weighted')
+
+# Keys that describe the group itself rather than any single provider
+GROUP_KEYS = ('providers', 'mode', 'race_count', 'circuit_breaker', 'cache', 'similarity', 'ledger', 'memory')
+
+def is_valid_plan(response: Any) -> bool:
+    """A provider answer counts as valid if it parsed into an actions list"""
+    if not isinstance(response, dict) or not isinstance(response.get('actions'), list):
+        return False
+    return not str(response.get('reasoning', '')).startswith('Error')
+
+class ProviderError(Exception):
+    """Raised when no provider in the group produced a valid plan"""
+
+@dataclass
+class Backend:
+    """One configured provider of a group"""
+    name: str
+    llm: Any
+    weight: float
+    breaker: CircuitBreaker
+
+class ProviderGroup:
+    """An ordered list of providers used in failover, race or weighted mode"""
+
+    def __init__(self, config: Dict[str, Any], factory: Callable[[Dict[str, Any]], Any]):
+        """Build one single-provider LLM interface per entry of config['providers']"""
+        self.mode = config.get('mode', 'failover')
+        if self.mode not in MODES:
+            raise ValueError(f"Unsupported provider mode: {self.mode}")
+        self.race_count = config.get('race_count', 2)
+        breaker_config = config.get('circuit_breaker', {})
+
+        self.backends: List[Backend] = []
+        for entry in config['providers']:
+            child_config = {k: v for k, v in config.items() if k not in GROUP_KEYS}
+            child_config.update(entry)
+            # Caching and token accounting happen once, in front of the whole group
+            child_config['cache'] = {'enabled': False}
+            child_config['similarity'] = {'enabled': False}
+            child_config['ledger'] = {'enabled': False}
+            llm = factory(child_config)
+            self.backends.append(Backend(
+                name=entry.get('name') or f"{llm.provider}:{llm.model}",
+                llm=llm,
+                weight=entry.get('weight', 1.0),
+                breaker=CircuitBreaker(
+                    failure_threshold=breaker_config.get('failure_threshold', 3),
+                    reset_timeout=breaker_config.get('reset_timeout', 30.0)
+                )
+            ))
+        if not self.backends:
+            raise ValueError("llm.providers must list at least one provider")
+
+        self.wins = Counter()
+        self.failures = Counter()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        logger.info(f"Provider group initialized in {self.mode} mode: {', '.join(self.names)}")
+
+    @property
+    def names(self) -> List[str]:
+        return [b.name for b in self.backends]
+
+    def call(self, user_prompt: str) -> Tuple[Dict[str, Any], Optional[CallMetrics]]:
+        """Get a plan from the group; returns the response and its call metrics"""
+        if self.mode == 'race':
+            return self._race(user_prompt)
+        if self.mode == 'weighted':
+            return self._failover(user_prompt, self._weighted_order())
+        return self._failover(user_prompt, self.backends)
+
+    def _attempt(self, backend: Backend, user_prompt: str) -> Tuple[Dict[str, Any], Optional[CallMetrics]]:
+        try:
+            response = backend.llm._call_provider(user_prompt)
+        except Exception:
+            backend.breaker.record_failure()
+            self.failures[backend.name] += 1
+            raise
+        if not is_valid_plan(response):
+            backend.breaker.record_failure()
+            self.failures[backend.name] += 1
+            raise ProviderError(f"{backend.name} returned no valid plan: {response.get('reasoning', '')}")
+        backend.breaker.record_success()
+        return response, backend.llm.last_metrics
+
+    def _failover(self, user_prompt: str, order: List[Backend]):
+        errors = []
+        for backend in order:
+            if not backend.breaker.allow():
+                errors.append(f"{backend.name}: circuit open")
+                continue
+            try:
+                result = self._attempt(backend, user_prompt)
+            except Exception as e:
+                logger.warning(f"Provider {backend.name} failed, trying next: {e}")
+                errors.append(f"{backend.name}: {e}")
+                continue
+            self.wins[backend.name] += 1
+            return result
+        raise ProviderError(f"All providers failed ({'; '.join(errors)})")
+
+    def _weighted_order(self) -> List[Backend]:
+        """Pick one provider by weight, keeping the rest as ordered fallbacks"""
+        candidates = [b for b in self.backends if b.weight > 0]
+        if not candidates:
+            return list(self.backends)
+        chosen = random.choices(candidates, weights=[b.weight for b in candidates])[0]
+        return [chosen] + [b for b in self.backends if b is not chosen]
+
+    def _race(self, user_prompt: str):
+        # allow() takes a half-open circuit's one trial call, so only ask until the race is full
+        contenders = []
+        for backend in self.backends:
+            if len(contenders) == self.race_count:
+                break
+            if backend.breaker.allow():
+                contenders.append(backend)
+        if not contenders:
+            raise ProviderError("All providers failed (every circuit is open)")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=len(self.backends) * 2,
+                                                thread_name_prefix='llm-race')
+
+        futures = {self._executor.submit(self._attempt, b, user_prompt): b for b in contenders}
+        errors = []
+        for future in as_completed(futures):
+            backend = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(f"{backend.name}: {e}")
+                continue
+            # Requests already on the wire cannot be aborted; their answers are dropped
+            for other in futures:
+                if other is not future:
+                    other.cancel()
+            self.wins[backend.name] += 1
+            return result
+        raise ProviderError(f"All providers failed ({'; '.join(errors)})")
+
+    def warm_up(self) -> bool:
+        return all([b.llm.warm_up() for b in self.backends])
+
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for backend in self.backends:
+            for provider, values in backend.llm.connection_stats().items():
+                stats[backend.name] = values
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'mode': self.mode,
+            'wins': dict(self.wins),
+            'failures': dict(self.failures),
+            'circuits': {b.name: b.breaker.state for b in self.backends},
+            'requests': {b.name: b.llm.request_stats() for b in self.backends}
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        for backend in self.backends:
+            backend.llm.close()
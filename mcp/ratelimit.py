@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, Optional, Mapping
+
+from .metrics import LatencyHistogram
+from .policy import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds until a rate limit window resets
+
+    Accepts OpenAI durations ("1s", "6m0s", "20ms") and Anthropic
+    RFC 3339 timestamps.
+    """
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if parts and ''.join(n + u for n, u in parts) == value.strip():
+        return sum(float(n) * _UNITS[u] for n, u in parts)
+    try:
+        when = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return parse_retry_after(value)
+    return max(when.timestamp() - time.time(), 0.0)
+
+def _header_int(headers: Mapping[str, str], *names: str) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                continue
+    return None
+
+class TokenBucket:
+    """A bucket refilled continuously at ``capacity`` per minute; unlimited until a capacity is known"""
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.capacity = float(per_minute) if per_minute else math.inf
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # Set once the provider has reported how much of this bucket is left
+        self.observed = False
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def _refill(self, now: float):
+        if self.capacity != math.inf:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (0 if it can be taken now)"""
+        self._refill(now)
+        wait = max(self.blocked_until - now, 0.0)
+        amount = min(amount, self.capacity)
+        if self.level < amount:
+            wait = max(wait, (amount - self.level) / self.rate)
+        return wait
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def set_capacity(self, per_minute: float, now: float):
+        self._refill(now)
+        if per_minute > 0 and per_minute != self.capacity:
+            self.capacity = float(per_minute)
+            self.level = min(self.level, self.capacity)
+
+    def observe_remaining(self, remaining: int, reset: Optional[float], now: float):
+        """Trust the provider's count, which includes other clients sharing the key"""
+        self._refill(now)
+        self.observed = True
+        self.level = min(self.level, float(remaining))
+        if remaining <= 0 and reset and self.capacity == math.inf:
+            # Without a known limit the refill rate is unknown; wait for the window to reset
+            self.blocked_until = max(self.blocked_until, now + reset)
+
+class _Ticket:
+    __slots__ = ('session', 'tokens')
+
+    def __init__(self, session: str, tokens: int):
+        self.session = session
+        self.tokens = tokens
+
+class RateLimiter:
+    """Request and token buckets shared by every call to one provider endpoint
+
+    Waiting calls are queued per session and served round-robin, so one
+    busy session cannot starve the others. Limits start from the config
+    (or unlimited) and follow the provider's x-ratelimit-* /
+    anthropic-ratelimit-* headers; a 429 with Retry-After pauses all
+    callers. Time spent queued is reported separately from latency.
+    """
+
+    _shared: Dict[str, 'RateLimiter'] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        """Initialize buckets with optional starting limits"""
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._cond = threading.Condition()
+        self.waits = LatencyHistogram(window=1000)
+        self.granted = 0
+        self.queued = 0
+        self.throttled = 0
+
+    @classmethod
+    def shared(cls, key: str, config: Optional[Dict[str, Any]] = None) -> 'RateLimiter':
+        """Return the limiter for an endpoint, creating it on first use"""
+        config = config or {}
+        with cls._shared_lock:
+            limiter = cls._shared.get(key)
+            if limiter is None:
+                limiter = cls._shared[key] = cls(config.get('requests_per_minute'),
+                                                 config.get('tokens_per_minute'))
+            return limiter
+
+    @property
+    def counts_tokens(self) -> bool:
+        """Whether callers need to estimate request tokens"""
+        return self.tokens.capacity != math.inf
+
+    def debit(self, tokens: int):
+        """Charge completion tokens, unless the provider's headers already account for them"""
+        if tokens > 0 and self.counts_tokens and not self.tokens.observed:
+            with self._cond:
+                self.tokens._refill(time.monotonic())
+                self.tokens.take(tokens)
+
+    def _wait_time(self, ticket: _Ticket, now: float) -> Optional[float]:
+        """0 if the ticket was granted, seconds to wait, or None if it is not its turn"""
+        session, queue = next(iter(self._queues.items()))
+        if session != ticket.session or queue[0] is not ticket:
+            return None
+        wait = max(self.requests.time_until(1, now), self.tokens.time_until(ticket.tokens, now))
+        if wait > 0:
+            return wait
+        self.requests.take(1)
+        self.tokens.take(ticket.tokens)
+        queue.popleft()
+        if queue:
+            self._queues.move_to_end(session)
+        else:
+            del self._queues[session]
+        self.granted += 1
+        return 0.0
+
+    def _enqueue(self, session: str, tokens: int) -> _Ticket:
+        ticket = _Ticket(session, tokens)
+        if session not in self._queues:
+            self._queues[session] = deque()
+        self._queues[session].append(ticket)
+        return ticket
+
+    def _abandon(self, ticket: _Ticket):
+        queue = self._queues.get(ticket.session)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.session]
+        self._cond.notify_all()
+
+    def _granted(self, waited: float) -> float:
+        self.waits.record(waited)
+        if waited > 0.001:
+            self.queued += 1
+        self._cond.notify_all()
+        return waited
+
+    def acquire(self, session: str, tokens: int = 0) -> float:
+        """Block until the call may be sent; returns the seconds spent waiting"""
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(session, tokens)
+            try:
+                while True:
+                    wait = self._wait_time(ticket, time.monotonic())
+                    if wait == 0:
+                        return self._granted(time.monotonic() - start)
+                    self._cond.wait(wait if wait is not None else 0.1)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+
+    async def aacquire(self, session: str, tokens: int = 0) -> float:
+        """Async counterpart of acquire(); polls instead of blocking the event loop"""
+        start = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(session, tokens)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._wait_time(ticket, time.monotonic())
+                    if wait == 0:
+                        return self._granted(time.monotonic() - start)
+                await asyncio.sleep(min(wait, 0.05) if wait is not None else 0.01)
+        except BaseException:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+
+    def update(self, status_code: int, headers: Mapping[str, str]):
+        """Adapt the buckets to the rate limit headers of a response"""
+        now = time.monotonic()
+        with self._cond:
+            for bucket, kind in ((self.requests, 'requests'), (self.tokens, 'tokens')):
+                limit = _header_int(headers, f'x-ratelimit-limit-{kind}', f'anthropic-ratelimit-{kind}-limit')
+                if limit:
+                    bucket.set_capacity(limit, now)
+                remaining = _header_int(headers, f'x-ratelimit-remaining-{kind}',
+                                        f'anthropic-ratelimit-{kind}-remaining')
+                if remaining is not None:
+                    reset = parse_reset(headers.get(f'x-ratelimit-reset-{kind}') or
+                                        headers.get(f'anthropic-ratelimit-{kind}-reset'))
+                    bucket.observe_remaining(remaining, reset, now)
+
+            if status_code == 429:
+                self.throttled += 1
+                retry_after = parse_retry_after(headers.get('Retry-After')) or 1.0
+                self.requests.blocked_until = max(self.requests.blocked_until, now + retry_after)
+                logger.warning(f"Provider throttled us; holding all requests for {retry_after:.1f}s")
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return grant counts, queue depth and queue wait percentiles"""
+        with self._cond:
+            depth = sum(len(queue) for queue in self._queues.values())
+            limits = {
+                'requests_per_minute': None if self.requests.capacity == math.inf else self.requests.capacity,
+                'tokens_per_minute': None if self.tokens.capacity == math.inf else self.tokens.capacity
+            }
+        return {
+            'granted': self.granted,
+            'queued': self.queued,
+            'throttled': self.throttled,
+            'queue_depth': depth,
+            'queue_wait': self.waits.summary(),
+            **limits
+        }
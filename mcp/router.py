@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from .actions import registry
+from .cache import normalize_prompt
+from .metrics import CallMetrics, summarize
+from .providers import is_valid_plan
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTER_PATH = os.path.join('~', '.local', 'share', 'mcp', 'router.db')
+
+TIERS = ('fast', 'strong')
+
+# Keys that configure the router itself rather than the tier models
+ROUTER_KEYS = ('router', 'providers', 'cache', 'similarity', 'ledger', 'memory')
+
+_WORD = re.compile(r"[a-z0-9_~./-]+")
+_STEP_MARKERS = ('and then', 'then', 'after that', 'afterwards', 'next', 'finally', 'also')
+
+def prompt_features(prompt: str) -> List[str]:
+    """Words of the prompt plus coarse length and multi-step markers"""
+    text = prompt.lower()
+    words = _WORD.findall(text)
+    features = list(words)
+    features.append(f"__len{min(len(words) // 6, 5)}")
+    steps = sum(text.count(f" {marker} ") for marker in _STEP_MARKERS) + text.count(',') + text.count(';')
+    features.append(f"__steps{min(steps, 3)}")
+    return features
+
+def plan_problem(response: Dict[str, Any]) -> Optional[str]:
+    """Return why a plan cannot be used, or None if it looks executable"""
+    if not is_valid_plan(response):
+        return str(response.get('reasoning') or 'no actions list')
+    if not response['actions']:
+        return 'empty plan'
+    problems = registry.validate_plan(response['actions'])
+    return problems[0] if problems else None
+
+class NaiveBayes:
+    """Multinomial naive Bayes with Laplace smoothing over prompt features"""
+
+    def __init__(self, labels: Tuple[str, ...] = ('simple', 'complex')):
+        self.labels = labels
+        self.documents = Counter()
+        self.words = {label: Counter() for label in labels}
+        self.totals = Counter()
+        self.vocabulary = set()
+
+    def __len__(self) -> int:
+        return sum(self.documents.values())
+
+    def learn(self, features: List[str], label: str):
+        self.documents[label] += 1
+        self.words[label].update(features)
+        self.totals[label] += len(features)
+        self.vocabulary.update(features)
+
+    def predict(self, features: List[str]) -> Dict[str, float]:
+        """Return the posterior probability of each label"""
+        total_documents = len(self)
+        vocabulary = len(self.vocabulary) + 1
+        scores = {}
+        for label in self.labels:
+            score = math.log((self.documents[label] + 1) / (total_documents + len(self.labels)))
+            denominator = self.totals[label] + vocabulary
+            counts = self.words[label]
+            for feature in features:
+                score += math.log((counts[feature] + 1) / denominator)
+            scores[label] = score
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        norm = sum(exp.values())
+        return {label: value / norm for label, value in exp.items()}
+
+class ModelRouter:
+    """Send simple prompts to a fast model and complex ones to a strong model
+
+    A naive Bayes classifier trained on past routing outcomes estimates
+    how likely a prompt is to be simple. Below ``threshold`` (or when the
+    classifier has seen fewer than ``min_samples`` prompts and a length /
+    step heuristic says so) the prompt goes straight to the strong tier.
+    A fast-tier plan that fails parsing or validation is escalated to the
+    strong tier, and the discarded call's metrics are passed to
+    ``on_discarded`` so they can still be accounted. Every decision is logged and stored to retrain from.
+    """
+
+    def __init__(self, config: Dict[str, Any], factory: Callable[[Dict[str, Any]], Any]):
+        """Build one LLM interface per tier from config['router']"""
+        router_config = config.get('router', {})
+        self.threshold = router_config.get('threshold', 0.6)
+        self.min_samples = router_config.get('min_samples', 20)
+        self.max_simple_actions = router_config.get('max_simple_actions', 2)
+
+        self.tiers: Dict[str, Any] = {}
+        for tier in TIERS:
+            child_config = {k: v for k, v in config.items() if k not in ROUTER_KEYS}
+            child_config.update(router_config.get(tier, {}))
+            # Caching and token accounting happen once, in front of the router
+            child_config['cache'] = {'enabled': False}
+            child_config['similarity'] = {'enabled': False}
+            child_config['ledger'] = {'enabled': False}
+            self.tiers[tier] = factory(child_config)
+
+        # Called with (prompt, metrics) for a fast-tier call whose plan was escalated
+        self.on_discarded: Optional[Callable[[str, CallMetrics], None]] = None
+        self.classifier = NaiveBayes()
+        self.routed = Counter()
+        self.escalations = 0
+        self.latencies: Dict[str, List[float]] = {tier: [] for tier in TIERS}
+        self._lock = threading.Lock()
+
+        self.path = os.path.expanduser(router_config.get('path') or DEFAULT_ROUTER_PATH)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "id INTEGER PRIMARY KEY, ts REAL NOT NULL, prompt TEXT NOT NULL, tier TEXT NOT NULL, "
+            "p_simple REAL NOT NULL, escalated INTEGER NOT NULL, label TEXT NOT NULL, "
+            "latency REAL NOT NULL, actions INTEGER NOT NULL)"
+        )
+        self._db.commit()
+        for prompt, label in self._db.execute("SELECT prompt, label FROM routes ORDER BY id"):
+            self.classifier.learn(prompt_features(prompt), label)
+
+        logger.info(f"Model router initialized: fast={self.tiers['fast'].model}, "
+                    f"strong={self.tiers['strong'].model}, trained on {len(self.classifier)} prompts")
+
+    @property
+    def models(self) -> str:
+        return f"{self.tiers['fast'].model}>{self.tiers['strong'].model}"
+
+    def p_simple(self, user_prompt: str) -> float:
+        """Probability that the fast model can handle the prompt"""
+        features = prompt_features(user_prompt)
+        if len(self.classifier) < self.min_samples:
+            # Too little history: short single-step prompts are assumed simple
+            length, steps = features[-2], features[-1]
+            return 0.8 if length in ('__len0', '__len1') and steps == '__steps0' else 0.3
+        return self.classifier.predict(features)['simple']
+
+    def route(self, user_prompt: str) -> Tuple[str, float]:
+        p_simple = self.p_simple(user_prompt)
+        return ('fast' if p_simple >= self.threshold else 'strong'), p_simple
+
+    def call(self, user_prompt: str) -> Tuple[Dict[str, Any], Optional[CallMetrics]]:
+        """Get a plan from the routed tier, escalating a bad fast-tier plan"""
+        tier, p_simple = self.route(user_prompt)
+        start = time.perf_counter()
+        escalated = False
+
+        if tier == 'fast':
+            fast = self.tiers['fast']
+            before = fast.last_metrics
+            try:
+                response = fast._call_provider(user_prompt)
+                problem = plan_problem(response)
+            except Exception as e:
+                problem = str(e)
+            if problem is None:
+                metrics = fast.last_metrics
+            else:
+                logger.info(f"Escalating to {self.tiers['strong'].model}: fast plan unusable ({problem})")
+                escalated = True
+                # The unusable plan still cost tokens; only the strong tier's metrics are returned
+                discarded = fast.last_metrics
+                if self.on_discarded is not None and discarded is not None and discarded is not before:
+                    self.on_discarded(user_prompt, discarded)
+
+        if tier == 'strong' or escalated:
+            strong = self.tiers['strong']
+            response = strong._call_provider(user_prompt)
+            metrics = strong.last_metrics
+
+        latency = time.perf_counter() - start
+        self._record(user_prompt, tier, p_simple, escalated, latency, response)
+        return response, metrics
+
+    def _record(self, user_prompt: str, tier: str, p_simple: float, escalated: bool,
+                latency: float, response: Dict[str, Any]):
+        """Log a decision under the tier it was routed to and learn from its outcome"""
+        actions = len(response.get('actions') or []) if isinstance(response, dict) else 0
+        if escalated or actions > self.max_simple_actions:
+            label = 'complex'
+        elif plan_problem(response) is None:
+            label = 'simple'
+        else:
+            label = None
+        logger.info(f"Routed to {tier} ({self.tiers[tier].model}) with p_simple={p_simple:.2f}"
+                    f"{', escalated' if escalated else ''}: {latency * 1000:.0f} ms, {actions} actions")
+
+        with self._lock:
+            self.routed[tier] += 1
+            self.escalations += escalated
+            self.latencies[tier].append(latency)
+            if label is None:
+                return
+            self.classifier.learn(prompt_features(user_prompt), label)
+            self._db.execute(
+                "INSERT INTO routes (ts, prompt, tier, p_simple, escalated, label, latency, actions) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), normalize_prompt(user_prompt), tier, p_simple, int(escalated), label, latency, actions)
+            )
+            self._db.commit()
+
+    def report(self) -> Dict[str, Any]:
+        return route_report(self.path)
+
+    def warm_up(self) -> bool:
+        return all([llm.warm_up() for llm in self.tiers.values()])
+
+    def connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for tier, llm in self.tiers.items():
+            for provider, values in llm.connection_stats().items():
+                stats[f"{tier}:{provider}"] = values
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'routed': dict(self.routed),
+            'escalations': self.escalations,
+            'latency': {tier: summarize(values) for tier, values in self.latencies.items()},
+            'requests': {tier: llm.request_stats() for tier, llm in self.tiers.items()}
+        }
+
+    def close(self):
+        for llm in self.tiers.values():
+            llm.close()
+        with self._lock:
+            self._db.close()
+
+def route_report(path: Optional[str] = None) -> Dict[str, Any]:
+    """Summarize every stored routing decision per tier, for tuning the threshold"""
+    db = sqlite3.connect(os.path.expanduser(path or DEFAULT_ROUTER_PATH))
+    try:
+        rows = db.execute("SELECT tier, escalated, label, latency FROM routes").fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        db.close()
+
+    report = {}
+    for tier in TIERS:
+        tier_rows = [r for r in rows if r[0] == tier]
+        report[tier] = {
+            'prompts': len(tier_rows),
+            'escalated': sum(r[1] for r in tier_rows),
+            'labels': dict(Counter(r[2] for r in tier_rows)),
+            'latency': summarize([r[3] for r in tier_rows])
+        }
+    return report
+
+def format_route_report(report: Dict[str, Any]) -> str:
+    """Render a routing report as a short table"""
+    lines = [f"{'tier':<8}{'prompts':>9}{'escalated':>11}{'p50':>10}{'p95':>10}  labels"]
+    for tier, row in report.items():
+        latency = row['latency']
+        labels = ', '.join(f"{label} {count}" for label, count in sorted(row['labels'].items()))
+        lines.append(f"{tier:<8}{row['prompts']:>9}{row['escalated']:>11}"
+                     f"{latency['p50'] * 1000:>8.0f}ms{latency['p95'] * 1000:>8.0f}ms  {labels}")
+    return '\n'.join(lines)
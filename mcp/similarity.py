@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+import logging
+import os
+import re
+import sqlite3
+import threading
+import hashlib
+from functools import lru_cache
+from array import array
+from collections import Counter, deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from . import codec
+from .cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Paths, file names and numbers must match exactly: "open ~/apps/a" and
+# "open ~/apps/b" are near-duplicates as text but need different plans.
+_SPECIFIC_TOKEN = re.compile(r'\S*[/~.\d]\S*')
+
+# The leading verb decides what a prompt does, so it must match too; only
+# these synonyms are treated as the same verb. Anything else, including
+# opposites such as "uninstall" for "install", only matches itself.
+_VERB_CLASSES = {
+    'open': 'open', 'launch': 'open', 'start': 'open', 'run': 'open',
+    'close': 'close', 'quit': 'close', 'exit': 'close', 'kill': 'close',
+    'create': 'create', 'make': 'create',
+    'delete': 'remove', 'remove': 'remove', 'erase': 'remove'
+}
+_NEGATIONS = {'not', "don't", 'dont', 'never', 'no', 'without'}
+# Words that do not change which plan a prompt needs: politeness, articles,
+# and vendor or kind words around an app name ("google chrome", "chrome browser")
+_FILLER = {'please', 'the', 'a', 'an', 'my', 'google', 'mozilla', 'browser', 'app', 'application', 'program'}
+
+def prompt_parts(text: str) -> Tuple[str, str]:
+    """Split a prompt into an intent key that must match exactly and the text compared for similarity"""
+    words = text.lower().split()
+    while words and words[0] in _FILLER:
+        words = words[1:]
+    if not words:
+        return '', ''
+    verb = _VERB_CLASSES.get(words[0], words[0])
+    negated = '!' if _NEGATIONS.intersection(words) else ''
+    rest = [w for w in words[1:] if w not in _FILLER] or words[1:]
+    return f"{negated}{verb}", ' '.join(rest)
+
+def shingles(text: str, n: int = 3) -> set:
+    """Return the set of character n-grams of a normalized prompt"""
+    text = f" {' '.join(text.lower().split())} "
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(shingle: str, num_perm: int) -> array:
+    """Hash one shingle into num_perm independent 32-bit values"""
+    return array('I', hashlib.shake_128(shingle.encode('utf-8')).digest(4 * num_perm))
+
+def specific_tokens(text: str) -> str:
+    """Return the tokens of a prompt that must match exactly, as a sorted key"""
+    return ' '.join(sorted(set(_SPECIFIC_TOKEN.findall(text))))
+
+class SimilarityIndex:
+    """MinHash LSH index of previously successful prompts and their plans
+
+    Signatures and LSH buckets are kept in memory for lookups. Plans stay
+    in SQLite and are only read back on a hit.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.7,
+                 num_perm: int = 64, bands: int = 16, max_entries: int = 100000,
+                 bucket_size: int = 32, max_candidates: int = 8):
+        """Open (or create) the index and rebuild its buckets from disk"""
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = os.path.expanduser(path or os.path.join(DEFAULT_CACHE_DIR, 'similar.db'))
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.bucket_size = bucket_size
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.misses = 0
+
+        self._signatures: Dict[int, Tuple[int, ...]] = {}
+        self._guards: Dict[int, str] = {}
+        # Buckets keep only their most recent ids so a crowded band cannot
+        # make lookups scan thousands of candidates
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], deque] = {}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS prompts ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, prompt TEXT NOT NULL, "
+            "guard TEXT NOT NULL, signature BLOB NOT NULL, response TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self._load()
+
+        logger.info(f"Similarity index opened at {self.path} ({len(self._signatures)} prompts)")
+
+    def _load(self):
+        for entry_id, guard, blob in self._db.execute("SELECT id, guard, signature FROM prompts ORDER BY id"):
+            signature = array('I')
+            signature.frombytes(blob)
+            if len(signature) != self.num_perm:
+                continue
+            self._insert(entry_id, guard, tuple(signature))
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """Compute the MinHash signature of a prompt, leaving out its verb and filler words"""
+        # Each shingle carries num_perm hash values; the signature is the
+        # position-wise minimum across shingles
+        rows = [_shingle_hashes(s, self.num_perm) for s in shingles(prompt_parts(text)[1])]
+        return tuple(map(min, zip(*rows)))
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def _insert(self, entry_id: int, guard: str, signature: Tuple[int, ...]):
+        self._signatures[entry_id] = signature
+        self._guards[entry_id] = guard
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = deque(maxlen=self.bucket_size)
+            bucket.append(entry_id)
+
+    def _remove(self, entry_id: int):
+        signature = self._signatures.pop(entry_id)
+        del self._guards[entry_id]
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket and entry_id in bucket:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def _best_match(self, signature: Tuple[int, ...], guard: str) -> Tuple[Optional[int], float]:
+        # Entries colliding in the most bands are the likeliest matches, so
+        # only those get a full signature comparison
+        collisions = Counter()
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                collisions.update(bucket)
+
+        best_id, best_score = None, 0.0
+        for entry_id, _ in collisions.most_common(self.max_candidates):
+            if self._guards.get(entry_id) != guard:
+                continue
+            other = self._signatures[entry_id]
+            score = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return best_id, best_score
+
+    @staticmethod
+    def guard(prompt: str, scope: str = '') -> str:
+        """Everything that must be equal for two prompts to share a plan"""
+        return f"{scope}|{prompt_parts(prompt)[0]}|{specific_tokens(prompt)}"
+
+    def lookup(self, prompt: str, scope: str = '') -> Optional[Dict[str, Any]]:
+        """Return the plan of the most similar stored prompt above the threshold
+
+        ``scope`` separates entries produced under different providers,
+        models or system prompts.
+        """
+        signature = self.signature(prompt)
+        guard = self.guard(prompt, scope)
+        with self._lock:
+            entry_id, score = self._best_match(signature, guard)
+            if entry_id is None or score < self.threshold:
+                self.misses += 1
+                return None
+            row = self._db.execute("SELECT prompt, response FROM prompts WHERE id = ?", (entry_id,)).fetchone()
+            self.hits += 1
+
+        logger.info(f"Similar prompt found (score {score:.2f}): {row[0]!r}")
+        return codec.loads(row[1])
+
+    def add(self, prompt: str, response: Dict[str, Any], scope: str = ''):
+        """Remember a successful prompt and its plan"""
+        signature = self.signature(prompt)
+        guard = self.guard(prompt, scope)
+        with self._lock:
+            # A prompt that is already indexed as a near-exact match adds nothing
+            entry_id, score = self._best_match(signature, guard)
+            if entry_id is not None and score == 1.0:
+                return
+
+            cursor = self._db.execute(
+                "INSERT INTO prompts (prompt, guard, signature, response) VALUES (?, ?, ?, ?)",
+                (prompt, guard, array('I', signature).tobytes(), codec.dumps(response).decode('utf-8'))
+            )
+            self._insert(cursor.lastrowid, guard, signature)
+
+            while len(self._signatures) > self.max_entries:
+                oldest = next(iter(self._signatures))
+                self._remove(oldest)
+                self._db.execute("DELETE FROM prompts WHERE id = ?", (oldest,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and index size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._signatures)
+        }
+
+    def close(self):
+        """Close the backing database"""
+        with self._lock:
+            self._db.close()
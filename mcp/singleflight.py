@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Awaitable, Callable, Tuple
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call
+
+    The first caller for a key runs the call; callers arriving while it is
+    in flight wait for it and get the same result, or the same exception.
+    Nothing is remembered once the call completes, so later callers start
+    a fresh one. Threads and asyncio tasks are tracked separately.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._calls: Dict[str, Future] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Run fn() unless an identical call is already in flight, then share its outcome"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async counterpart of do()
+
+        The shared call runs as its own task, so cancelling one waiter
+        (including the one that started it) does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        slot = (loop, key)
+        with self._lock:
+            task = self._tasks.get(slot)
+            if task is None:
+                task = self._tasks[slot] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._tasks.pop(slot, None))
+                self.calls += 1
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return upstream calls made and calls saved by sharing"""
+        total = self.calls + self.shared
+        return {
+            'upstream_calls': self.calls,
+            'saved_calls': self.shared,
+            'saved_ratio': self.shared / total if total else 0.0
+        }
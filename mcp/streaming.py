@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import logging
+import re
+from typing import Dict, Any, List, Iterable, Iterator, Optional
+
+from . import codec
+
+logger = logging.getLogger(__name__)
+
+_STRING_STOP = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_ELEMENT_TEXT = re.compile(r'(?:[^"{}\[\]]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+
+def iter_sse_data(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the data payloads of a server-sent event stream until [DONE]"""
+    for line in lines:
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return
+        yield data
+
+class ActionStreamParser:
+    """Incrementally scan streamed LLM JSON and emit each closed actions[i] object
+
+    The scanner keeps its state between feed() calls and never goes back
+    to earlier chunks, so the total cost is linear in the response size.
+    Text between structural characters, and whole strings inside an
+    action, are skipped with a single regex match instead of being walked
+    one character at a time.
+    Text before the first '{' (e.g. a ```json fence) is ignored. Once an
+    action fails to decode, no later action is emitted: they may depend
+    on the one that was lost.
+    """
+
+    def __init__(self):
+        """Initialize an empty scanner"""
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.collecting_key = False
+        self.key_chars: List[str] = []
+        self.current_key: Optional[str] = None
+        self.actions_depth: Optional[int] = None
+        self.actions_closed = False
+        self.element: Optional[List[str]] = None
+        self.text: List[str] = []
+        self.actions: List[Dict[str, Any]] = []
+        self.broken = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of text and return the actions completed by it"""
+        self.text.append(chunk)
+        completed = []
+        # Start of the open element's text not yet copied into self.element
+        mark = 0
+        i, n = 0, len(chunk)
+
+        while i < n:
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    i += 1
+                    continue
+                match = _STRING_STOP.search(chunk, i)
+                end = match.start() if match else n
+                if self.collecting_key:
+                    self.key_chars.append(chunk[i:end])
+                if match is None:
+                    break
+                i = end + 1
+                if chunk[end] == '\\':
+                    self.escape = True
+                else:
+                    self.in_string = False
+                    if self.collecting_key:
+                        self.collecting_key = False
+                        self.current_key = ''.join(self.key_chars)
+                continue
+
+            if self.element is not None:
+                # Inside an action only nesting matters: complete strings and plain text are skipped in one match
+                j = _ELEMENT_TEXT.match(chunk, i).end()
+                if j >= n:
+                    break
+            else:
+                # Outside strings only structural characters matter; jump straight to the next one
+                match = _STRUCTURAL.search(chunk, i)
+                if match is None:
+                    break
+                j = match.start()
+            ch = chunk[j]
+            i = j + 1
+
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.expect_key = False
+                    self.collecting_key = True
+                    self.key_chars = []
+            elif ch == '{':
+                if self.depth == self.actions_depth and self.element is None and not self.actions_closed:
+                    self.element = []
+                    mark = j
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+            elif ch == '[':
+                self.depth += 1
+                if self.depth == 2 and self.current_key == 'actions' and self.actions_depth is None:
+                    self.actions_depth = self.depth
+            elif ch in '}]':
+                self.depth -= 1
+                if ch == ']' and self.actions_depth is not None and self.depth == self.actions_depth - 1:
+                    self.actions_closed = True
+                if self.element is not None and self.depth == self.actions_depth:
+                    self.element.append(chunk[mark:i])
+                    action = self._finish_element()
+                    if action is not None:
+                        completed.append(action)
+            elif ch == ',' and self.depth == 1:
+                self.expect_key = True
+
+        if self.element is not None:
+            self.element.append(chunk[mark:])
+        return completed
+
+    def _finish_element(self) -> Optional[Dict[str, Any]]:
+        text = ''.join(self.element)
+        self.element = None
+        if self.broken:
+            return None
+        try:
+            action = codec.loads(text)
+        except codec.JSONDecodeError:
+            logger.error(f"Failed to parse streamed action, dropping it and every later one: {text}")
+            self.broken = True
+            return None
+        self.actions.append(action)
+        return action
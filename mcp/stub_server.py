@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Minimal OpenAI/Anthropic-compatible LLM server for local benchmarks and manual testing
+
+Run with ``python -m mcp.stub_server --port 8808`` and point ``llm.api_url``
+at ``http://127.0.0.1:8808/v1/chat/completions``. It also stands in for a
+local model server when testing the ``local`` provider, answers
+Anthropic Messages requests on ``/v1/messages`` and keeps server-side
+conversation state for Responses API requests on ``/v1/responses``.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN = {
+    "actions": [
+        {"type": "command_line", "command": "echo hello", "description": "Say hello"}
+    ],
+    "reasoning": "Stub response"
+}
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer chat completion requests with a canned plan"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real providers
+    disable_nagle_algorithm = True
+    rate_headers: Dict[str, str] = {}
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _prefill(self, tokens: int):
+        """Simulate prompt processing time for input tokens the server has not seen"""
+        if self.server.prefill_delay and tokens > 0:
+            time.sleep(tokens * self.server.prefill_delay)
+
+    def end_headers(self):
+        for name, value in self.rate_headers.items():
+            self.send_header(name, value)
+        super().end_headers()
+
+    def _rate_limit(self) -> Optional[float]:
+        """Charge one request to the server's limit; seconds to retry after if it is exhausted"""
+        server = self.server
+        self.rate_headers = {}
+        if not server.requests_per_minute:
+            return None
+        with server.lock:
+            now = time.monotonic()
+            capacity = server.requests_per_minute
+            rate = capacity / 60.0
+            if server.rate_level is None:
+                server.rate_level = capacity
+            server.rate_level = min(capacity, server.rate_level + (now - server.rate_updated) * rate)
+            server.rate_updated = now
+            allowed = server.rate_level >= 1
+            if allowed:
+                server.rate_level -= 1
+            else:
+                server.throttled += 1
+            self.rate_headers = {
+                'x-ratelimit-limit-requests': str(capacity),
+                'x-ratelimit-remaining-requests': str(int(server.rate_level)),
+                'x-ratelimit-reset-requests': f"{(capacity - server.rate_level) / rate:.3f}s"
+            }
+            return None if allowed else (1 - server.rate_level) / rate
+
+    def _send_error(self, status: int, retry_after: Optional[float] = None):
+        payload = json.dumps({'error': {'message': f'stub failure {status}'}}).encode('utf-8')
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', f"{retry_after if retry_after is not None else self.server.retry_after}")
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_HEAD(self):
+        self.rate_headers = {}
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+
+        retry_after = self._rate_limit()
+        if retry_after is not None:
+            self._send_error(429, retry_after)
+            return
+
+        with self.server.lock:
+            failure = self.server.failures.pop(0) if self.server.failures else None
+        if failure is not None:
+            self._send_error(failure)
+            return
+
+        latency = self.server.latency
+        if self.server.slow_fraction and random.random() < self.server.slow_fraction:
+            latency += self.server.slow_latency
+        if latency:
+            time.sleep(latency)
+
+        content = json.dumps(self.server.plan)
+        if self.path.endswith('/messages'):
+            self._send_json(200, self._anthropic_message(request, content))
+            return
+        if self.path.endswith('/responses'):
+            self._respond(request, content)
+            return
+        if request.get('stream'):
+            self._stream_content(content, request)
+            return
+
+        self._prefill(self._usage(request, content)['prompt_tokens'])
+        self._send_json(200, {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'model': request.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': self._usage(request, content)
+        })
+
+    @staticmethod
+    def _usage(request: Dict[str, Any], content: str) -> Dict[str, int]:
+        """Rough token counts (4 characters per token) so clients can report tokens/s"""
+        prompt_chars = sum(len(str(m.get('content', ''))) for m in request.get('messages', []))
+        prompt_tokens = prompt_chars // 4
+        completion_tokens = max(len(content) // 4, 1)
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+
+    def _anthropic_message(self, request: Dict[str, Any], content: str) -> Dict[str, Any]:
+        """Answer an Anthropic Messages request, simulating prompt caching
+
+        System blocks marked with cache_control are "written" the first time
+        their text is seen and "read" afterwards, and the usage fields say so.
+        """
+        system = request.get('system') or []
+        if isinstance(system, str):
+            system = [{'type': 'text', 'text': system}]
+        cacheable = sum(len(b.get('text', '')) for b in system if b.get('cache_control')) // 4
+        uncached = sum(len(b.get('text', '')) for b in system if not b.get('cache_control')) // 4
+        uncached += sum(len(str(m.get('content', ''))) for m in request.get('messages', [])) // 4
+
+        cache_read = cache_write = 0
+        if cacheable:
+            prefix = json.dumps([b for b in system if b.get('cache_control')], sort_keys=True)
+            with self.server.lock:
+                if prefix in self.server.cached_prefixes:
+                    cache_read = cacheable
+                else:
+                    self.server.cached_prefixes.add(prefix)
+                    cache_write = cacheable
+
+        return {
+            'id': 'msg_stub',
+            'type': 'message',
+            'role': 'assistant',
+            'model': request.get('model', 'stub'),
+            'content': [{'type': 'text', 'text': content}],
+            'stop_reason': 'end_turn',
+            'usage': {
+                'input_tokens': uncached,
+                'output_tokens': max(len(content) // 4, 1),
+                'cache_creation_input_tokens': cache_write,
+                'cache_read_input_tokens': cache_read
+            }
+        }
+
+    def _respond(self, request: Dict[str, Any], content: str):
+        """Answer a Responses API request, chaining on previous_response_id
+
+        The server remembers how many tokens each stored conversation holds.
+        Those count as cached input on the next turn; only the new input is
+        prefilled. Unknown or expired ids get the provider's 400 error.
+        """
+        items = request.get('input') or []
+        if isinstance(items, str):
+            items = [{'role': 'user', 'content': items}]
+        new_tokens = (sum(len(str(i.get('content', ''))) for i in items)
+                      + len(request.get('instructions') or '')) // 4
+
+        history = 0
+        previous = request.get('previous_response_id')
+        if previous:
+            with self.server.lock:
+                state = self.server.responses.get(previous)
+                if state is not None and state[0] < time.monotonic():
+                    del self.server.responses[previous]
+                    state = None
+            if state is None:
+                self._send_json(400, {'error': {
+                    'message': f"Previous response with id '{previous}' not found.",
+                    'type': 'invalid_request_error',
+                    'param': 'previous_response_id',
+                    'code': 'previous_response_not_found'
+                }})
+                return
+            history = state[1]
+
+        self._prefill(new_tokens)
+        output_tokens = max(len(content) // 4, 1)
+        response_id = f"resp_{uuid.uuid4().hex}"
+        if request.get('store', True):
+            ttl = self.server.state_ttl
+            with self.server.lock:
+                self.server.responses[response_id] = (
+                    time.monotonic() + ttl if ttl is not None else float('inf'),
+                    history + new_tokens + output_tokens
+                )
+
+        self._send_json(200, {
+            'id': response_id,
+            'object': 'response',
+            'status': 'completed',
+            'model': request.get('model', 'stub'),
+            'previous_response_id': previous,
+            'output': [{
+                'type': 'message',
+                'id': f"msg_{response_id[5:]}",
+                'role': 'assistant',
+                'status': 'completed',
+                'content': [{'type': 'output_text', 'text': content, 'annotations': []}]
+            }],
+            'usage': {
+                'input_tokens': history + new_tokens,
+                'input_tokens_details': {'cached_tokens': history},
+                'output_tokens': output_tokens,
+                'total_tokens': history + new_tokens + output_tokens
+            }
+        })
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_content(self, content: str, request: Dict[str, Any]):
+        """Send the content as server-sent events, a few characters per event"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        model = request.get('model', 'stub')
+        size = self.server.chunk_size
+        for i in range(0, len(content), size):
+            event = {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion.chunk',
+                'model': model,
+                'choices': [{'index': 0, 'delta': {'content': content[i:i + size]}, 'finish_reason': None}]
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+        if (request.get('stream_options') or {}).get('include_usage'):
+            event = {'id': 'chatcmpl-stub', 'object': 'chat.completion.chunk', 'model': model,
+                     'choices': [], 'usage': self._usage(request, content)}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server carrying its canned plan and injected latency"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, plan: Optional[Dict[str, Any]] = None, latency: float = 0.0,
+                 token_delay: float = 0.0, chunk_size: int = 4, prefill_delay: float = 0.0,
+                 state_ttl: Optional[float] = None):
+        super().__init__(address, StubHandler)
+        self.plan = plan or DEFAULT_PLAN
+        self.latency = latency
+        self.token_delay = token_delay
+        self.chunk_size = chunk_size
+        self.cached_prefixes = set()
+        # Seconds of prompt processing per uncached input token
+        self.prefill_delay = prefill_delay
+        # Responses API state: id -> (expiry, tokens held); None keeps state forever
+        self.responses: Dict[str, Any] = {}
+        self.state_ttl = state_ttl
+        # Statuses returned, in order, before any real answer (e.g. [429, 503])
+        self.failures = []
+        self.retry_after = 0
+        # Fraction of requests that take slow_latency extra seconds (tail latency)
+        self.slow_fraction = 0.0
+        self.slow_latency = 0.0
+        # Requests per minute before answering 429; None serves everything
+        self.requests_per_minute = None
+        self.rate_level = None
+        self.rate_updated = time.monotonic()
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def serve(port: int = 0, plan: Optional[Dict[str, Any]] = None, latency: float = 0.0,
+          token_delay: float = 0.0) -> StubServer:
+    """Start a stub server on a background thread and return it"""
+    server = StubServer(('127.0.0.1', port), plan=plan, latency=latency, token_delay=token_delay)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible LLM server")
+    parser.add_argument('--port', type=int, default=8808)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before answering')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='Seconds between streamed chunks')
+    parser.add_argument('--prefill-delay', type=float, default=0.0, help='Seconds per uncached input token')
+    parser.add_argument('--state-ttl', type=float, default=None, help='Seconds before stored responses expire')
+    parser.add_argument('--rpm', type=float, default=None, help='Requests per minute before answering 429')
+    args = parser.parse_args()
+
+    server = StubServer(('127.0.0.1', args.port), latency=args.latency, token_delay=args.token_delay,
+                        prefill_delay=args.prefill_delay, state_ttl=args.state_ttl)
+    server.requests_per_minute = args.rpm
+    print(f"Stub LLM server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
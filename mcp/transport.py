@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import logging
+import threading
+from typing import Dict, Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class ConnectionPool:
+    """Keep-alive HTTP sessions, one per LLM provider"""
+
+    def __init__(self, pool_size: int = 10, pool_block: bool = False):
+        """Initialize the pool; sessions are created lazily per provider"""
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(self, provider: str) -> requests.Session:
+        """Return the keep-alive session for a provider, creating it on first use"""
+        with self._lock:
+            session = self._sessions.get(provider)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size,
+                    pool_block=self.pool_block
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Connection'] = 'keep-alive'
+                self._sessions[provider] = session
+                logger.info(f"Created HTTP session for provider {provider} (pool size: {self.pool_size})")
+            return session
+
+    def post(self, provider: str, url: str, **kwargs) -> requests.Response:
+        """POST through the provider's pooled session"""
+        return self.session(provider).post(url, **kwargs)
+
+    def warm_up(self, provider: str, url: Optional[str], timeout: float = 5.0) -> bool:
+        """Open a connection to the provider ahead of the first prompt
+
+        The response status is irrelevant: the point is to pay for DNS, TCP
+        and TLS setup now and leave an idle connection in the pool.
+        """
+        if not url:
+            return False
+        try:
+            response = self.session(provider).head(url, timeout=timeout)
+            response.close()
+            logger.info(f"Warmed up connection to {provider} ({response.status_code})")
+            return True
+        except requests.RequestException as e:
+            logger.warning(f"Could not warm up connection to {provider}: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-provider counts of requests sent and connections opened"""
+        stats = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+        for provider, session in sessions:
+            requests_sent = 0
+            connections = 0
+            adapters = {id(a): a for a in session.adapters.values()}.values()
+            for adapter in adapters:
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    try:
+                        pool = pools[key]
+                    except KeyError:
+                        continue
+                    requests_sent += pool.num_requests
+                    connections += pool.num_connections
+            stats[provider] = {
+                'requests': requests_sent,
+                'connections': connections,
+                'reused': max(requests_sent - connections, 0),
+                'reuse_ratio': (requests_sent - connections) / requests_sent if requests_sent else 0.0
+            }
+        return stats
+
+    def close(self):
+        """Close every session and drop its idle connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
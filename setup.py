@@ -8,10 +8,14 @@ setup(
         "pyautogui",
         "rich",
         "requests",
+        "httpx",
         "pillow",
         "pynput",
         "python-xlib",
     ],
+    extras_require={
+        'fast': ['orjson'],
+    },
     entry_points={
         'console_scripts': [
             'mcp=main:main',
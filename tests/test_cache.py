@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""Which responses may be served again from the caches"""
+from mcp.cache import is_cacheable
+
+def test_only_valid_complete_plans_are_cached():
+    assert is_cacheable({'actions': [{'type': 'command_line', 'command': 'ls'}], 'reasoning': 'list'})
+    assert not is_cacheable({'actions': [], 'reasoning': 'nothing'})
+    assert not is_cacheable({'actions': [{'type': 'command_line', 'command': 'ls'}], 'salvaged': True})
+    assert not is_cacheable({'actions': [{'type': 'command_line', 'command': 'ls'}], 'reasoning': 'Error: timeout'})
+
+def test_plans_the_parser_rejects_are_not_cached():
+    assert not is_cacheable({'actions': [{'type': 'gui_action', 'action': 'press'}], 'reasoning': 'press'})
+    assert not is_cacheable({'actions': [{'type': 'teleport'}], 'reasoning': 'r'})
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Concurrent plan execution following the dependency graph"""
+import threading
+import time
+
+from mcp.controller import ActionController
+from mcp.executor import PlanExecutor
+from mcp.plan import build_plan_graph
+
+from test_plan import CWD, click, read, shell, write
+
+class FakeAutomation:
+    """Sleeps instead of acting and records what ran; commands running false fail"""
+
+    def __init__(self, delay: float = 0.02):
+        self.delay = delay
+        self.ran = []
+        self.gui_active = 0
+        self.gui_overlap = False
+        self._lock = threading.Lock()
+
+    def execute_command(self, command):
+        time.sleep(self.delay)
+        with self._lock:
+            self.ran.append(command)
+        return ('', 'failed', 1) if 'false' in command else ('ok', '', 0)
+
+    def perform_gui_action(self, action, target=None, coordinates=None, text=None):
+        with self._lock:
+            self.gui_active += 1
+            self.gui_overlap = self.gui_overlap or self.gui_active > 1
+        time.sleep(self.delay)
+        with self._lock:
+            self.gui_active -= 1
+            self.ran.append(action)
+        return True
+
+    def file_operation(self, action, path, content=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.ran.append(f"{action} {path}")
+        return True, ''
+
+def run(commands, fail_fast=False, workers=4):
+    automation = FakeAutomation()
+    executor = PlanExecutor(ActionController(), automation, workers=workers, fail_fast=fail_fast)
+    try:
+        results = list(executor.run(build_plan_graph(commands, cwd=CWD)))
+    finally:
+        executor.close()
+    return results, automation
+
+def test_every_action_is_reported_once_with_its_index():
+    commands = [shell('mkdir -p /tmp/a'), shell('mkdir -p /tmp/b'), write('/tmp/a/x'), read('/tmp/a/x')]
+    results, _ = run(commands)
+    assert sorted(index for index, _ in results) == [0, 1, 2, 3]
+    assert all(result['success'] for _, result in results)
+
+def test_independent_actions_overlap():
+    commands = [shell(f'mkdir -p /tmp/p{i}') for i in range(4)]
+    start = time.perf_counter()
+    run(commands, workers=4)
+    assert time.perf_counter() - start < 4 * 0.02
+
+def test_dependencies_run_in_order():
+    commands = [shell('mkdir -p /tmp/a'), write('/tmp/a/x'), read('/tmp/a/x')]
+    _, automation = run(commands)
+    assert automation.ran == ['mkdir -p /tmp/a', 'write /tmp/a/x', 'read /tmp/a/x']
+
+def test_gui_actions_never_overlap():
+    commands = [click(1, 1), shell('mkdir -p /tmp/a'), click(2, 2), click(3, 3)]
+    _, automation = run(commands)
+    assert not automation.gui_overlap
+
+def test_dependents_of_a_failure_are_skipped():
+    commands = [shell('mkdir -p /tmp/a && false'), write('/tmp/a/x'), shell('mkdir -p /tmp/b')]
+    results, _ = run(commands, fail_fast=False)
+    by_index = dict(results)
+    assert not by_index[0]['success']
+    assert by_index[1].get('skipped')
+    assert by_index[2]['success']
+
+def test_fail_fast_cancels_what_has_not_started():
+    commands = [shell('false'), shell('mkdir -p /tmp/a'), write('/tmp/a/x')]
+    results, automation = run(commands, fail_fast=True, workers=1)
+    by_index = dict(results)
+    assert by_index[2].get('skipped')
+    assert 'write /tmp/a/x' not in automation.ran
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Lenient and streamed parsing of model-written plans"""
+from mcp.extract import extract_plan, repair_json
+from mcp.parser import CommandParser
+from mcp.streaming import ActionStreamParser
+
+MKDIR = '{"type": "command_line", "command": "mkdir -p ~/x"}'
+RM = '{"type": "command_line", "command": "rm -rf *"}'
+BROKEN = '{"type": "command_line" "command": "cd ~/x"}'
+
+def commands(plan):
+    return [action['command'] for action in plan['actions']]
+
+def test_clean_and_fenced_plans():
+    assert extract_plan(f'{{"actions": [{MKDIR}], "reasoning": "r"}}')[0] == 'clean'
+    outcome, plan = extract_plan(f'Here you go:\n```json\n{{"actions": [{MKDIR}]}}\n```\nDone.')
+    assert outcome == 'extracted'
+    assert commands(plan) == ['mkdir -p ~/x']
+
+def test_trailing_commas_are_repaired():
+    outcome, plan = extract_plan(f'{{"actions": [{MKDIR}, {RM},], "reasoning": "r",}}')
+    assert outcome == 'repaired'
+    assert len(plan['actions']) == 2
+
+def test_truncated_plan_keeps_complete_actions():
+    outcome, plan = extract_plan(f'{{"reasoning": "r", "actions": [{MKDIR}, {{"type": "command_line", "command": "rm -rf ~/x/bu')
+    assert outcome == 'salvaged'
+    assert commands(plan) == ['mkdir -p ~/x']
+    assert repair_json('{"a": [1, 2')[1]
+
+def test_malformed_action_in_a_complete_plan_fails_the_plan():
+    outcome, plan = extract_plan(f'{{"actions": [{MKDIR}, {BROKEN}, {RM}]}}')
+    assert outcome == 'failed'
+    assert plan['actions'] == []
+
+def test_truncated_plan_stops_at_a_malformed_action():
+    outcome, plan = extract_plan(f'{{"actions": [{MKDIR}, {BROKEN}, {RM}, {{"type": "comm')
+    assert outcome == 'salvaged'
+    assert commands(plan) == ['mkdir -p ~/x']
+
+def test_stream_parser_emits_nothing_after_a_malformed_action():
+    parser = ActionStreamParser()
+    emitted = parser.feed(f'{{"actions": [{MKDIR}, {BROKEN}, {RM}]}}')
+    assert commands({'actions': emitted}) == ['mkdir -p ~/x']
+    assert parser.broken
+
+def test_parse_stream_stops_at_an_invalid_action():
+    text = f'{{"actions": [{MKDIR}, {{"type": "gui_action", "action": "press"}}, {RM}]}}'
+    assert [cmd.action['command'] for cmd in CommandParser().parse_stream([text[:40], text[40:]])] == ['mkdir -p ~/x']
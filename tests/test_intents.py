@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""Prompts answered by local rules without the LLM"""
+import subprocess
+
+from mcp.intents import IntentMatcher
+from mcp.parser import CommandParser
+
+def test_terminal_working_directory_keeps_tilde_expandable():
+    commands = IntentMatcher(CommandParser()).match('open terminal in ~/apps')
+    command = commands[0].action['command']
+    assert 'gnome-terminal --working-directory ~/apps ' in command
+    args = command.split(' >/dev/null')[0].replace('setsid gnome-terminal', 'printf "%s\\n"')
+    expanded = subprocess.run(['sh', '-c', args], capture_output=True, text=True, env={'HOME': '/home/u'}).stdout
+    assert expanded.split() == ['--working-directory', '/home/u/apps']
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""LLM interfaces that delegate to routed tiers and provider groups"""
+from mcp.interface import LLMInterface
+from mcp.metrics import CallMetrics
+
+URL = 'http://127.0.0.1:9/v1/chat/completions'
+
+def walk(llm):
+    yield llm
+    for child in llm._children():
+        yield from walk(child)
+
+def test_detach_conversation_reaches_every_delegate(tmp_path):
+    backends = [{'provider': 'local', 'model': name, 'api_url': URL, 'stateful': True} for name in 'ab']
+    llm = LLMInterface({
+        'provider': 'local', 'model': 'm', 'api_url': URL, 'stateful': True, 'warm_up': False,
+        'cache': {'enabled': False}, 'similarity': {'enabled': False}, 'ledger': {'enabled': False},
+        'memory': {'enabled': True},
+        'router': {'enabled': True, 'fast': {'providers': backends}, 'strong': {}, 'path': str(tmp_path / 'router.db')}
+    })
+    try:
+        interfaces = list(walk(llm))
+        assert len(interfaces) == 5
+        for interface in interfaces:
+            interface._previous_response_id = 'resp_1'
+
+        llm.detach_conversation()
+
+        for interface in interfaces:
+            assert not interface.stateful
+            assert interface.memory is None
+            assert interface._previous_response_id is None
+        assert not llm._has_context()
+    finally:
+        llm.close()
+
+def test_escalated_fast_call_is_still_accounted(tmp_path):
+    llm = LLMInterface({
+        'provider': 'local', 'model': 'm', 'api_url': URL, 'warm_up': False,
+        'cache': {'enabled': False}, 'similarity': {'enabled': False},
+        'ledger': {'path': str(tmp_path / 'ledger.db')}, 'memory': {'enabled': False},
+        'router': {'enabled': True, 'fast': {'model': 'small'}, 'strong': {'model': 'large'},
+                   'path': str(tmp_path / 'router.db')}
+    })
+    plans = {'small': {'actions': [], 'reasoning': 'nothing to do'},
+             'large': {'actions': [{'type': 'command_line', 'command': 'ls'}], 'reasoning': 'list files'}}
+
+    def answer(tier):
+        def call(user_prompt):
+            tier._record_metrics(CallMetrics(tier.provider, tier.model, prompt_tokens=100, completion_tokens=10))
+            return plans[tier.model]
+        return call
+
+    try:
+        for tier in llm.router.tiers.values():
+            tier._call_provider = answer(tier)
+        llm.router.route = lambda user_prompt: ('fast', 0.9)
+
+        assert llm.process_prompt('list files')['actions']
+        assert llm.router.escalations == 1
+        assert llm.ledger.totals['calls'] == 2
+        assert llm.ledger.session_tokens == 220
+        assert llm.last_metrics.model == 'large'
+    finally:
+        llm.close()
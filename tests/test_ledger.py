@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""Token accounting across providers"""
+from mcp.ledger import TokenLedger
+from mcp.metrics import CallMetrics
+
+def test_session_tokens_count_cached_input_for_every_provider(tmp_path):
+    ledger = TokenLedger(path=str(tmp_path / 'ledger.db'))
+    try:
+        # OpenAI's prompt_tokens already include the cached ones
+        ledger.record('p', CallMetrics('openai', 'gpt', prompt_tokens=1200, completion_tokens=50, cache_read_tokens=1000))
+        assert ledger.session_tokens == 1250
+        # Anthropic's input_tokens leave out cache reads and writes
+        ledger.record('p', CallMetrics('anthropic', 'claude', prompt_tokens=200, completion_tokens=50,
+                                       cache_read_tokens=1000, cache_write_tokens=300))
+        assert ledger.session_tokens == 1250 + 1550
+    finally:
+        ledger.close()
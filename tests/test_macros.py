@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Recording plans as macros with slots"""
+import pytest
+
+from mcp.macros import MacroStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = MacroStore(str(tmp_path / 'macros.db'))
+    yield store
+    store.close()
+
+def shell(command: str, description: str = 'Run'):
+    return {'type': 'command_line', 'command': command, 'description': description}
+
+def test_slot_values_are_replaced_as_whole_words(store):
+    macro = store.record(None, 'create project blog', [shell('mkdir -p ~/work/blog && ls ~/work/blog/', 'Create blog')],
+                         {'name': 'blog'})
+    assert macro.prompt == 'create project {name}'
+    assert store.replay(macro, {'name': 'shop'})[0]['command'] == 'mkdir -p ~/work/shop && ls ~/work/shop/'
+
+def test_slot_value_inside_other_words_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.record(None, 'create react app app', [shell('cd ~/apps && npx create-react-app app')], {'name': 'app'})
+
+def test_longer_slot_values_take_precedence(store):
+    macro = store.record(None, 'open ~/code/site', [shell('code ~/code/site')], {'path': '~/code/site', 'leaf': 'site'})
+    assert macro.actions[0]['command'] == 'code {path}'
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Plan rewrites that must not change what a plan does"""
+from mcp.optimize import PlanOptimizer
+
+from test_plan import CWD, click, read, shell, write
+
+def optimize(*commands, existing=(), fail_fast=True):
+    optimizer = PlanOptimizer(is_dir=lambda path: path in existing)
+    return optimizer.optimize(list(commands), cwd=CWD, fail_fast=fail_fast)
+
+def test_overwritten_write_is_dropped():
+    plan, report = optimize(write('/tmp/n', 'draft'), write('/tmp/other'), write('/tmp/n', 'final'))
+    assert [cmd.action.get('content') for cmd in plan] == ['', 'final']
+    assert report['dead_writes'] == 1
+
+def test_write_read_by_a_file_operation_is_kept():
+    _, report = optimize(write('/tmp/n', 'draft'), read('/tmp/n'), write('/tmp/n', 'final'))
+    assert report['dead_writes'] == 0
+
+def test_write_before_a_shell_command_is_kept():
+    # The script reads the file although its resources only name the directory
+    _, report = optimize(write('~/notes.txt', 'draft'), shell('cd ~/proj && python summarize.py ~/notes.txt'),
+                         write('~/notes.txt', 'final'))
+    assert report['dead_writes'] == 0
+    _, report = optimize(write('/tmp/n', 'draft'), shell('ls /tmp/other'), write('/tmp/n', 'final'))
+    assert report['dead_writes'] == 0
+
+def test_write_before_a_gui_action_is_kept():
+    _, report = optimize(write('/tmp/n', 'draft'), click(), write('/tmp/n', 'final'))
+    assert report['dead_writes'] == 0
+
+def test_existing_directories_are_not_created_again():
+    plan, report = optimize(shell('mkdir -p /tmp/old /tmp/new'), existing={'/tmp/old'})
+    assert [cmd.action['command'] for cmd in plan] == ['mkdir -p /tmp/new']
+    _, report = optimize(shell('mkdir /tmp/old'), existing={'/tmp/old'})
+    assert report['existing_mkdir'] == 0
+
+def test_consecutive_typing_is_joined():
+    type_a = click()
+    type_a.action.update(action='type', text='hello ')
+    type_b = click()
+    type_b.action.update(action='type', text='world')
+    plan, _ = optimize(type_a, type_b)
+    assert [cmd.action['text'] for cmd in plan] == ['hello world']
+
+def test_dependent_shell_commands_are_fused_only_with_fail_fast():
+    commands = (shell('cd /tmp/p && make'), shell('cd /tmp/p && make test'))
+    plan, _ = optimize(*commands)
+    assert [cmd.action['command'] for cmd in plan] == ['cd /tmp/p && make && make test']
+    plan, _ = optimize(*commands, fail_fast=False)
+    assert len(plan) == 2
+
+def test_shell_commands_that_would_change_meaning_are_not_fused():
+    plan, _ = optimize(shell('make'), shell('code . &'))
+    assert len(plan) == 2
+    plan, _ = optimize(shell('make'), shell('make test; make clean'))
+    assert len(plan) == 2
+
+def test_mkdir_after_an_expanded_shell_line_is_kept():
+    for earlier in ('rm -rf $HOME/build', 'rm -rf ~/bui*', 'rm -rf ~/{build,dist}', 'echo $(rm -rf ~/build)'):
+        plan, report = optimize(shell(earlier), shell('mkdir -p ~/build'), shell('cp a.txt ~/build/'),
+                                existing={'/root/build', '/home/user/build'}, fail_fast=False)
+        assert report['existing_mkdir'] == 0, earlier
+        assert len(plan) == 3
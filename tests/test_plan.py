@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Dependency analysis of parsed plans"""
+from mcp.parser import Command
+from mcp.plan import build_plan_graph
+
+CWD = '/home/user'
+
+def shell(command: str) -> Command:
+    return Command('command_line', {'command': command}, command)
+
+def write(path: str, content: str = '') -> Command:
+    return Command('file_operation', {'action': 'write', 'path': path, 'content': content}, f"write {path}")
+
+def read(path: str) -> Command:
+    return Command('file_operation', {'action': 'read', 'path': path, 'content': ''}, f"read {path}")
+
+def click(x: int = 10, y: int = 10) -> Command:
+    return Command('gui_action', {'action': 'click', 'target': '', 'coordinates': [x, y], 'text': ''}, 'click')
+
+def deps(*commands: Command):
+    return [node.deps for node in build_plan_graph(list(commands), cwd=CWD).nodes]
+
+def test_independent_paths_have_no_edges():
+    assert deps(shell('mkdir -p /tmp/a'), shell('mkdir -p /tmp/b')) == [[], []]
+
+def test_file_inside_created_directory_waits_for_it():
+    assert deps(shell('mkdir -p /tmp/a'), write('/tmp/a/x.txt')) == [[], [0]]
+
+def test_read_after_write_and_write_after_read():
+    assert deps(write('/tmp/x'), read('/tmp/x'), write('/tmp/x')) == [[], [0], [0, 1]]
+
+def test_cd_prefix_resolves_relative_paths():
+    assert deps(shell('mkdir -p /tmp/p'), shell('cd /tmp/p && touch out.txt'), read('/tmp/p/out.txt')) == [[], [0], [0, 1]]
+
+def test_gui_actions_stay_in_order_with_everything():
+    assert deps(click(), shell('mkdir -p /tmp/a'), click()) == [[], [0], [0, 1]]
+    # The GUI may open a file written before it, or save one read after it
+    assert deps(write('/tmp/a'), click(), read('/tmp/b')) == [[], [0], [1]]
+    assert deps(click(), shell('mkdir -p /tmp/a'), shell('mkdir -p /tmp/b')) == [[], [0], [0]]
+
+def test_unknown_program_is_a_barrier():
+    assert deps(shell('mkdir -p /tmp/a'), shell('make'), shell('mkdir -p /tmp/b')) == [[], [0], [1]]
+
+def test_sleep_orders_actions_after_it():
+    # Waiting for an app started in the background before clicking into it
+    assert deps(shell('google-chrome &'), shell('sleep 3'), click()) == [[], [0], [1]]
+    assert deps(shell('mkdir -p /tmp/a'), shell('sleep 1'), write('/tmp/b')) == [[], [0], [1]]
+
+def test_wait_orders_actions_after_it():
+    assert deps(click(), shell('wait'), click()) == [[], [0], [1]]
+
+def test_find_reads_its_roots():
+    assert deps(write('/tmp/a/x'), shell('find /tmp/a -name "*.txt"')) == [[], [0]]
+    assert deps(read('/tmp/a/x'), shell('find /tmp/a -name "*.txt"')) == [[], []]
+
+def test_find_delete_writes_its_roots():
+    assert deps(read('/tmp/a/x'), shell('find /tmp/a -name "*.tmp" -delete'), read('/tmp/a/y')) == [[], [0], [1]]
+
+def test_find_exec_is_a_barrier():
+    assert deps(read('/tmp/b'), shell('find /tmp/a -exec rm {} +'), read('/tmp/c')) == [[], [0], [1]]
+
+def test_sort_output_is_a_write():
+    assert deps(read('/tmp/out'), shell('sort -o /tmp/out /tmp/in'), read('/tmp/out')) == [[], [0], [1]]
+    assert deps(read('/tmp/out'), shell('sort --output=/tmp/out /tmp/in')) == [[], [0]]
+    assert deps(write('/tmp/in'), shell('sort /tmp/in')) == [[], [0]]
+
+def test_critical_path():
+    graph = build_plan_graph([shell('mkdir -p /tmp/a'), write('/tmp/a/x'), shell('mkdir -p /tmp/b'), read('/tmp/a/x')],
+                             cwd=CWD)
+    assert graph.critical_path == [0, 1, 3]
+    assert graph.critical_path_length == 3
+    assert graph.width == 2
+    assert graph.ready(set()) == [0, 2]
+    assert graph.blockers(3, {0}) == [1]
+
+def test_unknown_program_after_cd_is_still_a_barrier():
+    # pip install in one directory makes the package importable everywhere
+    assert deps(shell('cd ~/a && pip install foo'), shell('cd ~/b && python -c "import foo"')) == [[], [0]]
+    # sed -i edits a file outside the directory it was started in
+    assert deps(shell('cat ~/x/a > ~/y'), shell('cd ~/y2 && sed -i s/a/b/ ~/y')) == [[], [0]]
+
+def test_expanded_words_are_a_barrier():
+    assert deps(shell('rm -rf $HOME/build'), write('~/build/a.txt')) == [[], [0]]
+    assert deps(shell('rm -f *.log'), shell('cat app.log')) == [[], [0]]
+    assert deps(shell('mkdir -p proj/{src,test}'), write('proj/src/main.py')) == [[], [0]]
+    assert deps(shell('echo $(rm -rf x)'), read('x')) == [[], [0]]
+    assert deps(shell('echo `rm -rf x`'), read('x')) == [[], [0]]
+    # Quoted patterns are passed to the program as they are
+    assert deps(read('/tmp/b/x'), shell("find /tmp/a -name '*.txt'"), read('/tmp/b/y')) == [[], [], []]
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Provider groups and their circuit breakers"""
+from mcp.providers import ProviderGroup
+
+PLAN = {'actions': [{'type': 'command_line', 'command': 'ls'}], 'reasoning': 'list'}
+
+class FakeLLM:
+    """Answers with a plan, or raises while ``down`` is set"""
+
+    def __init__(self, config):
+        self.provider = 'fake'
+        self.model = config['model']
+        self.down = False
+        self.last_metrics = None
+
+    def _call_provider(self, user_prompt):
+        if self.down:
+            raise ConnectionError(f"{self.model} is down")
+        return PLAN
+
+def test_race_only_takes_trial_calls_it_sends():
+    group = ProviderGroup({'mode': 'race', 'race_count': 2,
+                           'providers': [{'model': m} for m in 'abc']}, factory=FakeLLM)
+    a, b, c = group.backends
+    c.breaker.state, c.breaker.opened_at = 'open', -1e9  # reset_timeout long past: due for a trial
+
+    assert group.call('list files')[0] == PLAN
+    assert not c.breaker._trial_in_flight
+
+    a.llm.down = b.llm.down = True
+    a.breaker.state = b.breaker.state = 'open'
+    a.breaker.opened_at = b.breaker.opened_at = float('inf')
+    assert group.call('list files')[0] == PLAN
+    assert c.breaker.state == 'closed'
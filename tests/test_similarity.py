@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Near-duplicate prompt lookup"""
+import pytest
+
+from mcp.similarity import SimilarityIndex
+
+PLAN = {'actions': [{'type': 'command_line', 'command': 'google-chrome &'}], 'reasoning': 'open chrome'}
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarityIndex(path=str(tmp_path / 'similar.db'))
+    yield index
+    index.close()
+
+def test_rewordings_share_a_plan(index):
+    index.add('launch chrome', PLAN)
+    assert index.lookup('open google chrome') == PLAN
+    assert index.lookup('start chrome browser') == PLAN
+
+def test_opposite_verbs_do_not_match(index):
+    index.add('install htop package', PLAN)
+    assert index.lookup('uninstall htop package') is None
+    index.add('open terminal', PLAN)
+    assert index.lookup('close terminal') is None
+    assert index.lookup("don't open terminal") is None
+
+def test_paths_must_match_exactly(index):
+    index.add('create folder ~/apps/a', PLAN)
+    assert index.lookup('create folder ~/apps/b') is None